@@ -95,3 +95,6 @@ MULTI_SELECT_MAX_SELECT_VALUE = 100
 DEFAULT_PAGE_LIMIT = 10
 
 CALCULATED_SORT_FIELD_RX = r'^_cc_calculated_(\d+)$'
+
+# Threads used to generate the files of a build (see PARALLEL_APP_BUILD_FILES)
+BUILD_FILES_MAX_WORKERS = 4
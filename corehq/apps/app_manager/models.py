@@ -7,11 +7,13 @@ import logging
 import os
 import random
 import re
+import threading
 import types
 import uuid
 from collections import Counter, OrderedDict, defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
-from functools import wraps
+from functools import partial, wraps
 from io import open
 from itertools import chain
 from mimetypes import guess_type
@@ -23,7 +25,7 @@ from django.contrib import admin, messages
 from django.contrib.auth.hashers import make_password
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db import DEFAULT_DB_ALIAS, models
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, models
 from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils.translation import gettext as _
@@ -200,6 +202,9 @@ ANDROID_LOGO_PROPERTY_MAPPING = {
 LATEST_APK_VALUE = 'latest'
 LATEST_APP_VALUE = 0
 
+# state of the worker threads of Application._create_all_files_concurrently
+_build_file_worker = threading.local()
+
 
 class LabelProperty(DictProperty):
     """Stores a {lang_code: translated_string} dict"""
@@ -4270,8 +4275,17 @@ class ApplicationBase(LazyBlobDoc, SnapshotMixin,
                                      'files/%s' % filepath)
 
     @property
-    @memoized
     def timing_context(self):
+        # worker threads of _create_all_files_concurrently time the file they
+        # are making in a context of their own
+        worker_timing_context = getattr(_build_file_worker, 'timing_context', None)
+        if worker_timing_context is not None:
+            return worker_timing_context
+        return self._timing_context
+
+    @property
+    @memoized
+    def _timing_context(self):
         return TimingContext(self.name)
 
     def validate_app(self):
@@ -4942,25 +4956,131 @@ class Application(ApplicationBase, ApplicationMediaMixin, ApplicationIntegration
     @time_method()
     def _make_language_files(self, prefix, build_profile_id):
         return {
-            "{}{}/app_strings.txt".format(prefix, lang):
-                self.create_app_strings(lang, build_profile_id).encode('utf-8')
+            "{}{}/app_strings.txt".format(prefix, lang): self._create_app_strings_file(lang, build_profile_id)
             for lang in ['default'] + self.get_build_langs(build_profile_id)
         }
 
+    def _create_app_strings_file(self, lang, build_profile_id):
+        return self.create_app_strings(lang, build_profile_id).encode('utf-8')
+
     @time_method()
     def _get_form_files(self, prefix, build_profile_id):
-        files = {}
+        return {
+            prefix + filename: self._render_form_file(form, build_profile_id)
+            for filename, form in self._get_build_forms()
+        }
+
+    def _get_build_forms(self):
         for form_stuff in self.get_forms(bare=False):
             def exclude_form(form):
                 return isinstance(form, ShadowForm) or form.is_a_disabled_release_form()
 
             if not exclude_form(form_stuff['form']):
-                filename = prefix + self.get_form_filename(**form_stuff)
-                form = form_stuff['form']
-                try:
-                    files[filename] = form.render_xform(build_profile_id=build_profile_id)
-                except XFormException as e:
-                    raise XFormException(_('Error in form "{}": {}').format(trans(form.name), e))
+                yield self.get_form_filename(**form_stuff), form_stuff['form']
+
+    def _render_form_file(self, form, build_profile_id):
+        try:
+            return form.render_xform(build_profile_id=build_profile_id)
+        except XFormException as e:
+            raise XFormException(_('Error in form "{}": {}').format(trans(form.name), e))
+
+    def _get_previous_form_file(self, path, form):
+        """Get the form's XML from the previous build if the form has not
+        changed since then (see ``set_form_versions``), otherwise None
+
+        :param path: The form's path in the build files, including the
+        build profile prefix.
+        """
+        latest_build = self._get_version_comparison_build()
+        if (
+            form.version is None
+            or not latest_build
+            or latest_build.copy_of != self.origin_id
+            or latest_build.version >= self.version
+        ):
+            return None
+        try:
+            previous_form = latest_build.get_form(form.unique_id)
+            if previous_form.get_version() != form.version:
+                return None
+            return latest_build.fetch_attachment('files/%s' % path)
+        except (ResourceNotFound, FormNotFoundException):
+            return None
+
+    def _create_form_file(self, path, form, build_profile_id):
+        previous_file = self._get_previous_form_file(path, form)
+        if previous_file is not None:
+            return previous_file
+        return self._render_form_file(form, build_profile_id)
+
+    def _create_all_files_concurrently(self, prefix, build_profile_id):
+        """Generate the files of ``create_all_files`` in a thread pool
+
+        Form XML of a build profile is copied from the previous build if
+        the form has not changed. The time taken to generate each file is
+        added to ``timing_context``.
+
+        The workers only read the build document: each file is rendered
+        from XForm and suite objects of its own, and the previous build has
+        been loaded by ``set_form_versions``. The memoized methods and the
+        attachment cache of the document store their results in dicts, so
+        a value that two workers need at the same time is at worst computed
+        twice. Each worker times its file in its own ``TimingContext``,
+        since a context can only be used by one thread.
+        """
+        makers = {}
+        flavors = [None, self.commcare_flavor] if self.commcare_flavor else [None]
+        for commcare_flavor, with_media, is_odk in itertools.product(flavors, [False, True], [False, True]):
+            filename = '{}{}profile{}.{}'.format(
+                prefix,
+                'media_' if with_media else '',
+                '-{}'.format(commcare_flavor) if commcare_flavor else '',
+                'ccpr' if is_odk else 'xml',
+            )
+            makers[filename] = partial(
+                self.create_profile,
+                is_odk=is_odk,
+                with_media=with_media,
+                build_profile_id=build_profile_id,
+                commcare_flavor=commcare_flavor,
+            )
+        makers['{}suite.xml'.format(prefix)] = partial(self.create_suite, build_profile_id)
+        makers['{}media_suite.xml'.format(prefix)] = partial(self.create_media_suite, build_profile_id)
+        for lang in ['default'] + self.get_build_langs(build_profile_id):
+            makers["{}{}/app_strings.txt".format(prefix, lang)] = partial(
+                self._create_app_strings_file, lang, build_profile_id)
+        for filename, form in self._get_build_forms():
+            if build_profile_id:
+                # without a build profile, set_form_versions has already rendered the form
+                makers[prefix + filename] = partial(
+                    self._create_form_file, prefix + filename, form, build_profile_id)
+            else:
+                makers[prefix + filename] = partial(self._render_form_file, form, build_profile_id)
+
+        def make_file(filename, make):
+            timing_context = TimingContext(filename)
+            _build_file_worker.timing_context = timing_context
+            try:
+                with timing_context:
+                    return make(), timing_context.root
+            finally:
+                del _build_file_worker.timing_context
+                close_old_connections()
+
+        files = {}
+        executor = ThreadPoolExecutor(max_workers=const.BUILD_FILES_MAX_WORKERS, thread_name_prefix='app-build')
+        with executor:
+            futures = {
+                filename: executor.submit(make_file, filename, make)
+                for filename, make in makers.items()
+            }
+            practice_user_restore = self.create_practice_user_restore(build_profile_id)
+            for filename, future in futures.items():
+                files[filename], timer = future.result()
+                if self.timing_context.is_started():
+                    self.timing_context.peek().append(timer)
+        if practice_user_restore:
+            files['{}practice_user_restore.xml'.format(prefix)] = practice_user_restore
         return files
 
     @time_method()
@@ -4969,6 +5089,9 @@ class Application(ApplicationBase, ApplicationMediaMixin, ApplicationIntegration
         self.set_form_versions()
         self.set_media_versions()
         prefix = '' if not build_profile_id else build_profile_id + '/'
+        if toggles.PARALLEL_APP_BUILD_FILES.enabled(self.domain):
+            return self._create_all_files_concurrently(prefix, build_profile_id)
+
         files = {
             '{}profile.xml'.format(prefix): self.create_profile(is_odk=False, build_profile_id=build_profile_id),
             '{}profile.ccpr'.format(prefix): self.create_profile(is_odk=True, build_profile_id=build_profile_id),
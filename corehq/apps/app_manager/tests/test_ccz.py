@@ -1,12 +1,14 @@
 import itertools
 import os
 import tempfile
+import uuid
 import zipfile
 
 from django.test import TestCase
 
 from unittest.mock import patch
 
+from corehq.apps.app_manager.models import Application
 from corehq.apps.app_manager.tests.app_factory import AppFactory
 from corehq.apps.app_manager.xform_builder import XFormBuilder
 from corehq.apps.hqmedia.models import CommCareImage
@@ -15,6 +17,7 @@ from corehq.apps.hqmedia.tasks import (
     find_missing_locale_ids_in_ccz,
 )
 from corehq.apps.hqmedia.views import iter_media_files
+from corehq.util.test_utils import flag_enabled
 
 
 class CCZTest(TestCase):
@@ -49,6 +52,41 @@ class CCZTest(TestCase):
         self.assertEqual(len(errors), 1)
         self.assertIn('forms.m0f0', errors[0])
 
+    @patch('corehq.apps.app_manager.models.validate_xform', return_value=None)
+    def test_create_all_files_concurrently(self, mock):
+        app = self.factory.app
+        files = app.create_all_files()
+        app.create_all_files.reset_cache(app)
+
+        with flag_enabled('PARALLEL_APP_BUILD_FILES'), app.timing_context:
+            concurrent_files = app.create_all_files()
+        self.assertEqual(concurrent_files, files)
+        timer_names = {timer.name for timer in app.timing_context.to_list(exclude_root=True)}
+        self.assertIn('suite.xml', timer_names)
+        self.assertIn('modules-0/forms-0.xml', timer_names)
+        # methods run by the workers are timed under the file they are making
+        suite_timer, = [timer for timer in app.timing_context.to_list() if timer.name == 'suite.xml']
+        self.assertIn('Application.create_suite', {timer.name for timer in suite_timer.to_list()})
+
+    def test_form_file_from_previous_build(self):
+        app = self.factory.app
+        app._id = uuid.uuid4().hex
+        app.version = 2
+        self.form.version = 1
+        previous_build = Application.wrap(app.to_json())
+        previous_build.copy_of = app._id
+        previous_build.version = 1
+        path = 'profile-id/modules-0/forms-0.xml'
+
+        with patch.object(Application, '_get_version_comparison_build', return_value=previous_build), \
+                patch.object(Application, 'fetch_attachment', return_value=b'<previous/>') as fetch:
+            self.assertEqual(app._create_form_file(path, self.form, 'profile-id'), b'<previous/>')
+            fetch.assert_called_once_with('files/' + path)
+
+            # the form has changed since the previous build
+            previous_build.get_form(self.form.unique_id).version = 2
+            self.assertIsNone(app._get_previous_form_file(path, self.form))
+
     def test_multimedia_integrity(self):
         icon_path = 'jr://file/commcare/icon.png'
         self.module.set_icon('en', icon_path)
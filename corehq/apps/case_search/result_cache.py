@@ -0,0 +1,126 @@
+"""Short-lived cache of case search results
+
+Enabled per domain with the ``CASE_SEARCH_RESULT_CACHE`` toggle. The
+cache stores the IDs and scores of the cases matched by a search, not
+the cases themselves, so that cached results are always served with the
+current version of each case.
+
+Cache keys include a freshness token for each domain and case type
+searched. The case search pillow replaces the token when a case of that
+type changes (see ``clear_case_search_result_cache``), so a change to any
+case that could affect the results of a search invalidates them. Keys also
+include the case search settings of the domain that affect the search, so
+that results are not served from before the settings were changed.
+
+The pillow replaces a token as soon as it has indexed a change, but the
+change is only visible to searches once the index refreshes. Results are
+therefore not cached while any of their tokens is younger than the refresh
+interval. Searches of related cases (ancestor criteria and XPath queries
+of subcases or ancestors) are not cached either, since changes to cases of
+other types would not invalidate them.
+"""
+import hashlib
+import json
+import re
+import time
+import uuid
+
+from django.core.cache import cache
+
+from corehq.apps.case_search.models import CASE_SEARCH_XPATH_QUERY_KEY
+from corehq.apps.es.const import INDEX_CONF_STANDARD
+from corehq.util.metrics import metrics_counter
+
+CASE_SEARCH_RESULT_CACHE_TIMEOUT = 60
+FRESHNESS_TOKEN_TIMEOUT = 24 * 60 * 60
+# seconds until the changes indexed before a token was replaced are searchable
+FRESHNESS_TOKEN_MIN_AGE = int(INDEX_CONF_STANDARD['index.refresh_interval'].rstrip('s')) + 1
+
+# XPath functions and paths that search cases related to the searched cases
+_RELATED_CASES_XPATH = re.compile(r'subcase-exists|subcase-count|ancestor-exists|/')
+
+
+def get_case_search_results_key(domain, case_types, criteria, query_domains, search_settings):
+    """Get the cache key of the results of a search, or None if they must
+    not be cached
+
+    The key must be got before the search is run and passed to
+    ``cache_case_search_results``, so that results are never cached under
+    a freshness token that was replaced while the search was running.
+
+    :param search_settings: JSON serializable case search settings of the
+    domain that affect the results, such as fuzzy properties.
+    """
+    if any(_searches_related_cases(c) for c in criteria):
+        return None
+    tokens = _get_freshness_tokens(query_domains, case_types)
+    if any(time.time() - created_at < FRESHNESS_TOKEN_MIN_AGE for token, created_at in tokens):
+        return None
+    key_data = json.dumps([
+        sorted(case_types),
+        sorted(query_domains),
+        _normalize_criteria(criteria),
+        search_settings,
+        [token for token, created_at in tokens],
+    ])
+    return 'case-search-results/{}/{}'.format(domain, hashlib.md5(key_data.encode('utf-8')).hexdigest())
+
+
+def get_cached_case_search_results(domain, key):
+    """Get the ``[(case_id, score), ...]`` cached for a search, or None"""
+    results = cache.get(key)
+    metrics_counter('commcare.case_search.result_cache', tags={
+        'domain': domain,
+        'result': 'miss' if results is None else 'hit',
+    })
+    return results
+
+
+def cache_case_search_results(key, results):
+    """Cache the results of a search
+
+    :param results: list of ``(case_id, score)`` tuples.
+    """
+    cache.set(key, results, CASE_SEARCH_RESULT_CACHE_TIMEOUT)
+
+
+def clear_case_search_result_cache(domain, case_type):
+    """Invalidate cached results of searches for the case type in the domain"""
+    cache.delete(_freshness_token_key(domain, case_type))
+
+
+def _normalize_criteria(criteria):
+    # criteria are combined with AND and multiple values of a criterion
+    # with OR, so neither order affects the results
+    return sorted(
+        [c.key, sorted(c.value) if c.has_multiple_terms else c.value]
+        for c in criteria
+    )
+
+
+def _searches_related_cases(criteria):
+    if criteria.is_ancestor_query:
+        return True
+    if criteria.key == CASE_SEARCH_XPATH_QUERY_KEY:
+        xpaths = criteria.value if criteria.has_multiple_terms else [criteria.value]
+        return any(_RELATED_CASES_XPATH.search(xpath) for xpath in xpaths)
+    return False
+
+
+def _get_freshness_tokens(domains, case_types):
+    keys = sorted({
+        _freshness_token_key(domain, case_type)
+        for domain in domains
+        for case_type in case_types
+    })
+    # each token is a (token, created_at) tuple
+    tokens = {key: token for key, token in cache.get_many(keys).items() if isinstance(token, tuple)}
+    missing_tokens = {key: (uuid.uuid4().hex, time.time()) for key in keys if key not in tokens}
+    if missing_tokens:
+        cache.set_many(missing_tokens, FRESHNESS_TOKEN_TIMEOUT)
+        tokens.update(missing_tokens)
+    return [tokens[key] for key in keys]
+
+
+def _freshness_token_key(domain, case_type):
+    return 'case-search-freshness/{}/{}'.format(domain, case_type)
@@ -11,8 +11,13 @@ from corehq.apps.app_manager.models import (
     DetailColumn,
 )
 from corehq.apps.app_manager.tests.app_factory import AppFactory
-from corehq.apps.case_search.const import IS_RELATED_CASE
-from corehq.apps.case_search.models import CaseSearchConfig, SearchCriteria
+from corehq.apps.case_search.const import IS_RELATED_CASE, RELEVANCE_SCORE
+from corehq.apps.case_search.models import (
+    CaseSearchConfig,
+    FuzzyProperties,
+    SearchCriteria,
+)
+from corehq.apps.case_search.result_cache import clear_case_search_result_cache
 from corehq.apps.domain.shortcuts import create_user
 from corehq.apps.es.case_search import case_search_adapter
 from corehq.apps.es.tests.utils import (
@@ -20,8 +25,9 @@ from corehq.apps.es.tests.utils import (
     es_test,
 )
 from corehq.form_processor.tests.utils import FormProcessorTestUtils
+from corehq.util.test_utils import flag_enabled
 
-from ..utils import get_case_search_results
+from ..utils import CaseSearchQueryBuilder, get_case_search_results
 
 
 @es_test(requires=[case_search_adapter], setup_class=True)
@@ -94,3 +100,43 @@ class TestCaseSearchEndpoint(TestCase):
             ("Jane", None),
             ("Villanueva", "true"),
         ])
+
+    @flag_enabled('CASE_SEARCH_RESULT_CACHE')
+    @mock.patch('corehq.apps.case_search.result_cache.FRESHNESS_TOKEN_MIN_AGE', 0)
+    def test_result_cache(self):
+        criteria = [SearchCriteria('family', 'Villanueva')]
+        self.addCleanup(clear_case_search_result_cache, self.domain, 'person')
+        res = get_case_search_results(self.domain, ['person'], criteria)
+        self.assertItemsEqual(["Jane", "Xiomara", "Alba"], [case.name for case in res])
+
+        with mock.patch.object(CaseSearchQueryBuilder, 'build_query') as build_query:
+            cached_res = get_case_search_results(self.domain, ['person'], criteria)
+        build_query.assert_not_called()
+        self.assertEqual([case.case_id for case in res], [case.case_id for case in cached_res])
+        self.assertEqual(
+            [case.get_case_property(RELEVANCE_SCORE) for case in res],
+            [case.get_case_property(RELEVANCE_SCORE) for case in cached_res],
+        )
+
+        clear_case_search_result_cache(self.domain, 'person')
+        with mock.patch.object(CaseSearchQueryBuilder, 'build_query', wraps=CaseSearchQueryBuilder.build_query,
+                               autospec=True) as build_query:
+            get_case_search_results(self.domain, ['person'], criteria)
+        build_query.assert_called_once()
+
+    @flag_enabled('CASE_SEARCH_RESULT_CACHE')
+    @mock.patch('corehq.apps.case_search.result_cache.FRESHNESS_TOKEN_MIN_AGE', 0)
+    def test_result_cache_settings_changed(self):
+        criteria = [SearchCriteria('family', 'Villanueva')]
+        self.addCleanup(clear_case_search_result_cache, self.domain, 'person')
+        get_case_search_results(self.domain, ['person'], criteria)
+
+        config = CaseSearchConfig.objects.get(domain=self.domain)
+        fuzzy_properties = FuzzyProperties.objects.create(
+            domain=self.domain, case_type='person', properties=['family'])
+        config.fuzzy_properties.add(fuzzy_properties)
+        self.addCleanup(fuzzy_properties.delete)
+        with mock.patch.object(CaseSearchQueryBuilder, 'build_query', wraps=CaseSearchQueryBuilder.build_query,
+                               autospec=True) as build_query:
+            get_case_search_results(self.domain, ['person'], criteria)
+        build_query.assert_called_once()
@@ -21,6 +21,7 @@ from corehq.apps.case_search.utils import (
 )
 from corehq.apps.es import CaseSearchES
 from corehq.apps.es.case_search import wrap_case_search_hit
+from corehq.apps.es.es_query import run_multi_search
 from corehq.apps.es.tests.test_case_search_es import BaseCaseSearchTest
 from corehq.apps.es.tests.utils import es_test
 
@@ -323,6 +324,39 @@ class TestGetRelatedCases(BaseCaseSearchTest):
         all_related_cases = get_related_cases_result_helper(include_all_related_cases=True)
         self._assert_case_ids(EXPECTED_ALL_RELATED_CASES, all_related_cases)
 
+    def test_get_related_cases_result_batches_lookups(self):
+        # c2 > c1 > a1
+        # c2 :> h1
+        # d1 > c1
+        cases = [
+            {'_id': 'a1', 'case_type': 'a'},
+            {'_id': 'h1', 'case_type': 'h'},
+            {'_id': 'c1', 'case_type': 'c', 'index': {
+                'parent': ('a', 'a1'),
+            }},
+            {'_id': 'c2', 'case_type': 'c', 'index': {
+                'parent': ('c', 'c1'),
+                'host': ('h', 'h1', 'extension'),
+            }},
+            {'_id': 'd1', 'case_type': 'd', 'index': {
+                'parent': ('c', 'c1'),
+            }},
+        ]
+        self._bootstrap_cases_in_es_for_domain(self.domain, cases)
+        hits = CaseSearchES().domain(self.domain).case_type("c").run().hits
+        source_cases = [wrap_case_search_hit(result) for result in hits]
+
+        with patch("corehq.apps.case_search.utils.get_child_case_types", return_value={"d"}), \
+                patch("corehq.apps.case_search.utils.get_search_detail_relationship_paths",
+                      return_value={"parent", "host", "parent/parent"}), \
+                patch("corehq.apps.case_search.utils.run_multi_search", wraps=run_multi_search) as multi_search:
+            results = get_related_cases_result(_QueryHelper(self.domain), None, {"c"}, source_cases, False)
+
+        self.assertEqual({case.case_id for case in results}, {"a1", "c1", "h1", "d1"})
+        # parent, host and child lookups are sent together; c1 and a1 are
+        # not fetched again for "parent/parent"
+        self.assertEqual([len(call.args[0]) for call in multi_search.call_args_list], [3])
+
     def _assert_related_case_ids(self, cases, paths, expected_case_ids):
         results = get_path_related_cases_results(_QueryHelper(self.domain), cases, paths)
         self._assert_case_ids(expected_case_ids, results)
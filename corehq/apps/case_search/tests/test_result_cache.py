@@ -0,0 +1,47 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from corehq.apps.case_search.models import CASE_SEARCH_XPATH_QUERY_KEY, SearchCriteria
+from corehq.apps.case_search.result_cache import (
+    clear_case_search_result_cache,
+    get_case_search_results_key,
+)
+
+
+class TestCaseSearchResultsKey(SimpleTestCase):
+    domain = 'test-case-search-results-key'
+
+    def setUp(self):
+        self.addCleanup(clear_case_search_result_cache, self.domain, 'person')
+
+    def _get_key(self, criteria):
+        return get_case_search_results_key(self.domain, ['person'], criteria, [self.domain], [])
+
+    def test_new_token_is_not_cached(self):
+        # the changes that replaced the token may not be searchable yet
+        self.assertIsNone(self._get_key([SearchCriteria('name', 'Jane')]))
+
+    @patch('corehq.apps.case_search.result_cache.FRESHNESS_TOKEN_MIN_AGE', 0)
+    def test_key(self):
+        key = self._get_key([SearchCriteria('name', 'Jane'), SearchCriteria('family', ['b', 'a'])])
+        self.assertIsNotNone(key)
+        self.assertEqual(
+            self._get_key([SearchCriteria('family', ['a', 'b']), SearchCriteria('name', 'Jane')]),
+            key,
+        )
+
+        clear_case_search_result_cache(self.domain, 'person')
+        self.assertNotEqual(self._get_key([SearchCriteria('name', 'Jane')]), key)
+
+    @patch('corehq.apps.case_search.result_cache.FRESHNESS_TOKEN_MIN_AGE', 0)
+    def test_related_case_criteria_are_not_cached(self):
+        for criteria in [
+            SearchCriteria('parent/name', 'Jane'),
+            SearchCriteria(CASE_SEARCH_XPATH_QUERY_KEY, "ancestor-exists(parent, name = 'Jane')"),
+            SearchCriteria(CASE_SEARCH_XPATH_QUERY_KEY, "subcase-exists('parent', status = 'open')"),
+            SearchCriteria(CASE_SEARCH_XPATH_QUERY_KEY, "parent/name = 'Jane'"),
+        ]:
+            with self.subTest(criteria=criteria):
+                self.assertIsNone(self._get_key([criteria]))
+        self.assertIsNotNone(self._get_key([SearchCriteria(CASE_SEARCH_XPATH_QUERY_KEY, "name = 'Jane'")]))
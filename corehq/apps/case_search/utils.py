@@ -25,7 +25,13 @@ from corehq.apps.case_search.models import (
     CaseSearchConfig,
     extract_search_request_config,
 )
+from corehq.apps.case_search.result_cache import (
+    cache_case_search_results,
+    get_cached_case_search_results,
+    get_case_search_results_key,
+)
 from corehq.apps.es import case_search, filters, queries
+from corehq.apps.es.es_query import run_multi_search
 from corehq.apps.es.case_search import (
     CaseSearchES,
     case_property_missing,
@@ -39,6 +45,8 @@ from corehq.apps.registry.exceptions import (
     RegistryNotFound,
 )
 from corehq.apps.registry.helper import DataRegistryHelper
+from corehq.toggles import CASE_SEARCH_RESULT_CACHE
+from corehq.util.metrics import metrics_histogram_timer
 
 
 def get_case_search_results_from_request(domain, app_id, couch_user, request_dict):
@@ -69,6 +77,15 @@ def get_case_search_results(domain, case_types, criteria,
 
 def get_primary_case_search_results(helper, domain, case_types, criteria):
     builder = CaseSearchQueryBuilder(domain, case_types, helper.query_domains)
+    cache_key = None
+    if CASE_SEARCH_RESULT_CACHE.enabled(domain):
+        cache_key = get_case_search_results_key(
+            domain, case_types, criteria, helper.query_domains, builder.get_search_settings())
+    if cache_key is not None:
+        cached_results = get_cached_case_search_results(domain, cache_key)
+        if cached_results is not None:
+            return _get_cached_primary_case_search_results(helper, cached_results)
+
     try:
         search_es = builder.build_query(criteria)
     except TooManyRelatedCasesError:
@@ -89,6 +106,23 @@ def get_primary_case_search_results(helper, domain, case_types, criteria):
         raise
 
     cases = [helper.wrap_case(hit, include_score=True) for hit in hits]
+    if cache_key is not None:
+        cache_case_search_results(cache_key, [(hit['_id'], hit['_score']) for hit in hits])
+    return cases
+
+
+def _get_cached_primary_case_search_results(helper, cached_results):
+    """Get the current version of the cases of cached search results"""
+    if not cached_results:
+        return []
+    hits = helper.get_base_queryset().case_ids([case_id for case_id, score in cached_results]).run().raw_hits
+    hits_by_id = {hit['_id']: hit for hit in hits}
+    cases = []
+    for case_id, score in cached_results:
+        hit = hits_by_id.get(case_id)
+        if hit is not None:
+            hit['_score'] = score
+            cases.append(helper.wrap_case(hit, include_score=True))
     return cases
 
 
@@ -261,6 +295,16 @@ class CaseSearchQueryBuilder:
                 value = re.sub(to_remove, '', value)
         return value
 
+    def get_search_settings(self):
+        """The case search settings of the domain that affect the query"""
+        return [
+            sorted(self._fuzzy_properties),
+            sorted(
+                [case_property, sorted(patterns)]
+                for case_property, patterns in self._patterns_to_remove.items()
+            ),
+        ]
+
     @cached_property
     def _patterns_to_remove(self):
         patterns_by_property = defaultdict(list)
@@ -296,11 +340,15 @@ def get_and_tag_related_cases(helper, app_id, case_types, cases,
 
     expanded_case_results = []
     if custom_related_case_property:
-        expanded_case_results.extend(get_expanded_case_results(helper, custom_related_case_property, cases))
+        with _related_cases_timer('expanded'):
+            expanded_case_results.extend(
+                get_expanded_case_results(helper, custom_related_case_property, cases))
 
     unfiltered_results = expanded_case_results
     top_level_cases = cases + expanded_case_results
-    related_cases = get_related_cases_result(helper, app, case_types, top_level_cases, include_all_related_cases)
+    lookups = _RelatedCaseLookups(helper, top_level_cases)
+    related_cases = get_related_cases_result(
+        helper, app, case_types, top_level_cases, include_all_related_cases, lookups)
     if related_cases:
         unfiltered_results.extend(related_cases)
     initial_case_ids = {case.case_id for case in cases}
@@ -313,19 +361,34 @@ def get_and_tag_related_cases(helper, app_id, case_types, cases,
 
 
 
-def get_related_cases_result(helper, app, case_types, source_cases, include_all_related_cases):
+def get_related_cases_result(helper, app, case_types, source_cases, include_all_related_cases, lookups=None):
     """
     Gets parent, child, and extension cases through sync algorithm if configured.
     Otherwise, gets case property path defined in search details and child case types
     used by search detail tab nodesets.
+
+    The path and child case lookups are sent to Elasticsearch together, one
+    request per level of the deepest path.
     """
     if include_all_related_cases:
-        return _get_all_related_cases(helper, source_cases)
-    else:
+        with _related_cases_timer('all_related'):
+            return _get_all_related_cases(helper, source_cases)
+
+    with _related_cases_timer('app_defined'):
+        lookups = lookups or _RelatedCaseLookups(helper, source_cases)
+        child_case_types = _get_child_case_types_referenced_in_app(app, case_types)
+        child_cases = None
+        if child_case_types:
+            source_case_ids = {case.case_id for case in source_cases}
+            child_cases = lookups.get_child_cases(source_case_ids, child_case_types)
+
         results = []
-        results.extend(_get_search_detail_path_defined_cases(helper, app, case_types, source_cases))
-        source_case_ids = {case.case_id for case in source_cases}
-        results.extend(_get_child_cases_referenced_in_app(helper, app, case_types, source_case_ids))
+        paths = _get_search_detail_paths(app, case_types)
+        if paths:
+            results.extend(get_path_related_cases_results(helper, source_cases, paths, lookups))
+        if child_cases:
+            lookups.run()
+            results.extend(child_cases.cases)
         return results
 
 
@@ -337,26 +400,18 @@ def _get_all_related_cases(helper, source_cases):
     return results
 
 
-def _get_search_detail_path_defined_cases(helper, app, case_types, source_cases):
-    paths = [
+def _get_search_detail_paths(app, case_types):
+    return {
         rel for rels in [get_search_detail_relationship_paths(app, case_type) for case_type in case_types]
         for rel in rels
-    ]
-    result = []
-    if paths:
-        result.extend(get_path_related_cases_results(helper, source_cases, paths))
-    return result
+    }
 
 
-def _get_child_cases_referenced_in_app(helper, app, case_types, source_case_ids):
-    child_case_types = [
+def _get_child_case_types_referenced_in_app(app, case_types):
+    return {
         _type for types in [get_child_case_types(app, case_type) for case_type in case_types]
         for _type in types
-    ]
-    result = []
-    if child_case_types:
-        result.extend(get_child_case_results(helper, source_case_ids, child_case_types))
-    return result
+    }
 
 
 def get_search_detail_relationship_paths(app, case_type):
@@ -378,31 +433,34 @@ def get_search_detail_relationship_paths(app, case_type):
     return paths
 
 
-def get_path_related_cases_results(helper, cases, paths):
+def get_path_related_cases_results(helper, cases, paths, lookups=None):
     """
     Given a set of cases and a set of case property paths,
     fetches ES documents for all cases referenced by those paths.
+
+    The cases at the same depth of all paths (e.g. "parent" and "host",
+    then "parent/parent") are fetched in one request.
     """
     if not cases:
         return []
 
-    results_cache = {}
-    for path in paths:
-        current_cases = cases
-        parts = path.split("/")
-        for index, identifier in enumerate(parts):
-            fragment = "/".join(parts[:index + 1])
-            if fragment in results_cache:
-                current_cases = results_cache[fragment]
-            else:
-                indices = [case.get_index(identifier) for case in current_cases]
-                related_case_ids = {i.referenced_id for i in indices if i}
-                current_cases = _get_case_search_cases(helper, related_case_ids)
-                results_cache[fragment] = current_cases
+    lookups = lookups or _RelatedCaseLookups(helper, cases)
+    paths_parts = [path.split("/") for path in paths]
+    results_by_fragment = {}
+    for depth in range(max((len(parts) for parts in paths_parts), default=0)):
+        for parts in paths_parts:
+            fragment = "/".join(parts[:depth + 1])
+            if depth >= len(parts) or fragment in results_by_fragment:
+                continue
+            current_cases = results_by_fragment["/".join(parts[:depth])].cases if depth else cases
+            indices = [case.get_index(parts[depth]) for case in current_cases]
+            related_case_ids = {i.referenced_id for i in indices if i}
+            results_by_fragment[fragment] = lookups.get_cases(related_case_ids)
+        lookups.run()
 
     results = []
     for path in paths:
-        results.extend(results_cache[path])
+        results.extend(results_by_fragment[path].cases)
 
     return results
 
@@ -425,12 +483,16 @@ def get_child_case_types(app, case_type):
 
 
 def get_child_case_results(helper, parent_case_ids, child_case_types=None):
+    filter = _get_child_case_query(helper, parent_case_ids, child_case_types)
+    results = filter.run().hits
+    return [helper.wrap_case(result) for result in results]
+
+
+def _get_child_case_query(helper, parent_case_ids, child_case_types=None):
     filter = helper.get_base_queryset().get_child_cases(parent_case_ids, "parent")
     if child_case_types:
         filter = filter.case_type(child_case_types)
-
-    results = filter.run().hits
-    return [helper.wrap_case(result) for result in results]
+    return filter
 
 
 def get_expanded_case_results(helper, custom_related_case_property, cases):
@@ -445,6 +507,65 @@ def _get_case_search_cases(helper, case_ids):
     results = helper.get_base_queryset().case_ids(case_ids).run().hits
     return [helper.wrap_case(result) for result in results]
 
+
+def _related_cases_timer(stage):
+    return metrics_histogram_timer(
+        'commcare.case_search.related_cases.duration',
+        timing_buckets=(0.1, 0.5, 1, 5, 20),
+        tags={'stage': stage},
+    )
+
+
+class _RelatedCaseLookups:
+    """Related case lookups for a single case search request
+
+    Lookups that don't depend on each other are queued and sent to
+    Elasticsearch together by ``run``. Cases that have already been fetched
+    for the request are not fetched again.
+    """
+
+    def __init__(self, helper, fetched_cases=()):
+        self.helper = helper
+        self.fetched_cases = {case.case_id: case for case in fetched_cases}
+        self.pending = []
+
+    def get_cases(self, case_ids):
+        """Get a lookup for the cases with the given IDs
+
+        Its ``cases`` are available after ``run`` has been called.
+        """
+        lookup = _CaseLookup(cases=[
+            self.fetched_cases[case_id] for case_id in case_ids if case_id in self.fetched_cases
+        ])
+        missing_case_ids = set(case_ids) - set(self.fetched_cases)
+        if missing_case_ids:
+            lookup.query = self.helper.get_base_queryset().case_ids(missing_case_ids)
+            self.pending.append(lookup)
+        return lookup
+
+    def get_child_cases(self, parent_case_ids, child_case_types=None):
+        lookup = _CaseLookup(query=_get_child_case_query(self.helper, parent_case_ids, child_case_types))
+        self.pending.append(lookup)
+        return lookup
+
+    def run(self):
+        lookups, self.pending = self.pending, []
+        if not lookups:
+            return
+        results = run_multi_search([lookup.query for lookup in lookups])
+        for lookup, result in zip(lookups, results):
+            for hit in result.hits:
+                case = self.helper.wrap_case(hit)
+                lookup.cases.append(self.fetched_cases.setdefault(case.case_id, case))
+
+
+class _CaseLookup:
+
+    def __init__(self, query=None, cases=None):
+        self.query = query
+        self.cases = cases if cases is not None else []
+
+
 # Warning: '_tag_is_related_case' may cause the relevant user-defined properties to be overwritten.
 def _tag_is_related_case(case):
     case.case_json[IS_RELATED_CASE] = "true"
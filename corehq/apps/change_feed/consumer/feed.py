@@ -1,5 +1,7 @@
 import json
 from copy import copy
+from datetime import datetime
+from functools import lru_cache
 from typing import Dict, Iterator, Optional
 
 from django.conf import settings
@@ -14,11 +16,13 @@ from pillowtop.feed.interface import Change, ChangeFeed, ChangeMeta
 from pillowtop.models import kafka_seq_to_str
 
 from corehq.apps.change_feed.data_sources import get_document_store
+from corehq.apps.change_feed.document_cache import invalidate_cached_document
 from corehq.apps.change_feed.exceptions import UnknownDocumentStore
 from corehq.apps.change_feed.topics import validate_offsets
 
 MIN_TIMEOUT = 500
 MAX_TIMEOUT = 1000 * 60 * 60 * 24  # 1 day in ms
+DOCUMENT_STORE_CACHE_SIZE = 1000
 
 
 class KafkaChangeFeed(ChangeFeed):
@@ -98,12 +102,18 @@ class KafkaChangeFeed(ChangeFeed):
             # no need to do anything since this is just telling us we've reached the end of the feed
             pass
 
-    def get_current_checkpoint_offsets(self):
+    def get_current_checkpoint_offsets(self, processed_offsets=None):
+        """
+        :param processed_offsets: offsets to checkpoint instead of all the
+            offsets processed so far, see ``get_processed_offsets``
+        """
         # the way kafka works, the checkpoint should increment by 1 because
         # querying the feed is inclusive of the value passed in.
         latest_offsets = self.get_latest_offsets()
+        if processed_offsets is None:
+            processed_offsets = self.get_processed_offsets()
         ret = {}
-        for topic_partition, sequence in self.get_processed_offsets().items():
+        for topic_partition, sequence in processed_offsets.items():
             if sequence == latest_offsets[topic_partition]:
                 # this topic and partition is totally up to date and if we add 1
                 # then kafka will give us an offset out of range error.
@@ -194,17 +204,17 @@ class KafkaCheckpointEventHandler(PillowCheckpointEventHandler):
         self.change_feed = change_feed
 
     def get_new_seq(self, change):
-        return self.change_feed.get_current_checkpoint_offsets()
+        return self.change_feed.get_current_checkpoint_offsets(change.processed_offsets)
 
 
 def change_from_kafka_message(message):
     change_meta = change_meta_from_kafka_message(message.value)
+    invalidate_cached_document(change_meta)
     try:
-        document_store = get_document_store(
-            data_source_type=change_meta.data_source_type,
-            data_source_name=change_meta.data_source_name,
-            domain=change_meta.domain,
-            load_source="change_feed",
+        document_store = _get_document_store(
+            change_meta.data_source_type,
+            change_meta.data_source_name,
+            change_meta.domain,
         )
     except UnknownDocumentStore:
         document_store = None
@@ -224,5 +234,79 @@ def change_from_kafka_message(message):
     )
 
 
+@lru_cache(maxsize=DOCUMENT_STORE_CACHE_SIZE)
+def _get_document_store(data_source_type, data_source_name, domain):
+    return get_document_store(
+        data_source_type=data_source_type,
+        data_source_name=data_source_name,
+        domain=domain,
+        load_source="change_feed",
+    )
+
+
 def change_meta_from_kafka_message(message):
-    return ChangeMeta.wrap(json.loads(message))
+    data = json.loads(message)
+    try:
+        return KafkaChangeMeta(data)
+    except (AttributeError, TypeError, ValueError):
+        # let ChangeMeta validate (and reject) anything unexpected
+        return ChangeMeta.wrap(data)
+
+
+class KafkaChangeMeta(object):
+    """
+    Equivalent of ChangeMeta for changes read from Kafka.
+
+    Much cheaper to create than ChangeMeta because it does not validate and
+    wrap each property, which is significant on busy pillows. It has the
+    same attributes as ChangeMeta, and ``to_json()``.
+    """
+    __slots__ = (
+        'document_id',
+        'document_rev',
+        'data_source_type',
+        'data_source_name',
+        'document_type',
+        'document_subtype',
+        'domain',
+        'is_deletion',
+        'publish_timestamp',
+        'attempts',
+        'original_publication_datetime',
+        '_transaction_id',
+    )
+    _properties = __slots__[:-1]
+    _required_properties = ('document_id', 'data_source_type', 'data_source_name')
+    _datetime_properties = {
+        name: ChangeMeta.properties()[name]
+        for name in ('publish_timestamp', 'original_publication_datetime')
+    }
+
+    def __init__(self, data):
+        """
+        :raises ValueError: if ``data`` is not a valid ChangeMeta
+        """
+        if not data.keys() <= set(self._properties):
+            raise ValueError("Unexpected properties: {}".format(set(data) - set(self._properties)))
+        if any(data.get(name) is None for name in self._required_properties):
+            raise ValueError("Missing required properties")
+
+        for name in self._properties:
+            setattr(self, name, data.get(name))
+        for name, prop in self._datetime_properties.items():
+            if name not in data:
+                setattr(self, name, datetime.utcnow())
+            elif data[name] is not None:
+                setattr(self, name, prop.wrap(data[name]))
+        if 'attempts' not in data:
+            self.attempts = 0
+
+    def to_json(self):
+        data = {name: getattr(self, name) for name in self._properties}
+        for name, prop in self._datetime_properties.items():
+            if data[name] is not None:
+                data[name] = prop.unwrap(data[name])[1]
+        return data
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.to_json())
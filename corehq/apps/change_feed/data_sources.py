@@ -4,6 +4,7 @@ from casexml.apps.phone.document_store import SyncLogDocumentStore
 from pillowtop.dao.couch import CouchDocumentStore
 
 from corehq.apps.change_feed import topics
+from corehq.apps.change_feed.document_cache import get_cached_document_store
 from corehq.apps.change_feed.exceptions import UnknownDocumentStore
 from corehq.apps.locations.document_store import (
     LOCATION_DOC_TYPE,
@@ -41,6 +42,7 @@ SYNCLOG_SQL = 'synclog-sql'
 def get_document_store(data_source_type, data_source_name, domain, load_source="unknown"):
     # change this to just 'data_source_name' after June 2018
     type_or_name = (data_source_type, data_source_name)
+    cached_doc_type = None
     if data_source_type == SOURCE_COUCH:
         try:
             return CouchDocumentStore(couch_config.get_db_for_db_name(data_source_name))
@@ -52,9 +54,11 @@ def get_document_store(data_source_type, data_source_name, domain, load_source="
     elif FORM_SQL in type_or_name:
         store = FormDocumentStore(domain)
         load_counter = form_load_counter
+        cached_doc_type = FORM_SQL
     elif CASE_SQL in type_or_name:
         store = CaseDocumentStore(domain)
         load_counter = case_load_counter
+        cached_doc_type = CASE_SQL
     elif SMS in type_or_name:
         store = SMSDocumentStore()
         load_counter = sms_load_counter
@@ -70,7 +74,7 @@ def get_document_store(data_source_type, data_source_name, domain, load_source="
             'getting document stores for backend {} is not supported!'.format(data_source_type)
         )
     track_load = load_counter(load_source, domain)
-    return DocStoreLoadTracker(store, track_load)
+    return get_cached_document_store(DocStoreLoadTracker(store, track_load), cached_doc_type)
 
 
 def get_document_store_for_doc_type(domain, doc_type, case_type_or_xmlns=None, load_source="unknown"):
@@ -85,9 +89,11 @@ def get_document_store_for_doc_type(domain, doc_type, case_type_or_xmlns=None, l
     if doc_type in XFormInstance.ALL_DOC_TYPES:
         store = FormDocumentStore(domain, xmlns=case_type_or_xmlns)
         load_counter = form_load_counter
+        cached_doc_type = FORM_SQL
     elif doc_type in document_types.CASE_DOC_TYPES:
         store = CaseDocumentStore(domain, case_type=case_type_or_xmlns)
         load_counter = case_load_counter
+        cached_doc_type = CASE_SQL
     elif doc_type == LOCATION_DOC_TYPE:
         return LocationDocumentStore(domain)
     elif doc_type == topics.LEDGER:
@@ -100,4 +106,4 @@ def get_document_store_for_doc_type(domain, doc_type, case_type_or_xmlns=None, l
             doc_type=doc_type
         )
     track_load = load_counter(load_source, domain)
-    return DocStoreLoadTracker(store, track_load)
+    return get_cached_document_store(DocStoreLoadTracker(store, track_load), cached_doc_type)
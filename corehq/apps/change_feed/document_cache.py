@@ -0,0 +1,257 @@
+"""Process-wide cache of documents for pillow processes
+
+Several processors of a pillow often need the same documents: the
+processors of the form pillow each load the form of a change, and
+``related_doc`` UCR expressions repeatedly load the same parent cases
+across consecutive chunks. ``Change.get_document`` only caches a document
+on the change object, so the cache in this module lets the document stores
+of a pillow process share the documents they have loaded.
+
+The cache is disabled unless it is enabled with ``enable_document_cache``,
+which ``run_ptop`` does when ``--document-cache-size`` (or
+``settings.PILLOW_DOCUMENT_CACHE_SIZE``) is set. It must not be enabled in
+other processes since it relies on the change feed of the pillow to
+invalidate cached documents: ``change_from_kafka_message`` invalidates the
+cached document of every change read from the feed, so a document that is
+loaded after a change to it has been read is never older than that change.
+
+A pillow process does not see changes to documents in the partitions of
+other processes, or in topics it does not consume, so only documents that
+a change has been read for are cached. Other documents, such as parent
+cases in other partitions, are always fetched. A document is not cached
+either if a change to it is read while it is being fetched, since the
+fetched version may be older than the change. Documents also expire after
+``max_age`` seconds, in case the partitions of the process are reassigned.
+
+Documents are cached as JSON so that each caller gets its own copy, and
+so that the size of the cache can be bounded in bytes.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from pillowtop.dao.interface import DocumentStore
+
+from corehq.util.metrics import metrics_counter
+
+_document_cache = None
+
+# number of documents that DocumentCache remembers reading changes for
+MAX_TRACKED_CHANGES = 100000
+
+
+def enable_document_cache(max_size, max_age=None):
+    """Enable the document cache in this process
+
+    :param max_size: Maximum size of the cached documents in bytes.
+    :param max_age: Seconds after which a cached document expires.
+    Defaults to ``settings.PILLOW_DOCUMENT_CACHE_MAX_AGE``.
+    """
+    global _document_cache
+    if max_age is None:
+        max_age = settings.PILLOW_DOCUMENT_CACHE_MAX_AGE
+    _document_cache = DocumentCache(max_size, max_age)
+    return _document_cache
+
+
+def disable_document_cache():
+    global _document_cache
+    _document_cache = None
+
+
+def get_document_cache():
+    """Get the document cache of this process or ``None`` if it is disabled"""
+    return _document_cache
+
+
+def invalidate_cached_document(change_meta):
+    """Invalidate the cached document of a change read from a change feed"""
+    if _document_cache is not None:
+        _document_cache.invalidate(change_meta.document_id, change_meta.document_rev)
+
+
+def get_cached_document_store(store, doc_type):
+    """Wrap a document store with the document cache if it is enabled
+
+    :param doc_type: The type of the documents in the store, or ``None``
+    if its documents should not be cached. Documents are only served from
+    the cache to stores of the same type and domain.
+    """
+    if _document_cache is None or doc_type is None:
+        return store
+    return CachedDocumentStore(store, doc_type, _document_cache)
+
+
+class DocumentCache(object):
+    """Thread-safe LRU cache of documents bounded by the size of their JSON
+
+    Entries are keyed on document ID and are only returned for lookups of
+    the same document type and domain. Each entry records the version
+    (``_rev`` or ``server_modified_on``) of its document so that a change
+    to the same version does not invalidate it.
+
+    The cache counts the changes read from the feed (see ``invalidate``),
+    and remembers the count at the last change to each of the most recently
+    changed documents. ``set`` uses them to only cache documents that a
+    change was read for before, and not since, they were fetched.
+    """
+
+    def __init__(self, max_size, max_age, max_tracked_changes=MAX_TRACKED_CHANGES):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.max_tracked_changes = max_tracked_changes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._change_count = 0
+        self._last_change_counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, doc_type, domain, doc_id):
+        """Get a copy of a cached document or ``None``"""
+        with self._lock:
+            entry = self._entries.get(doc_id)
+            if entry is not None:
+                if entry.expires_at < time.monotonic():
+                    self._remove(doc_id)
+                    entry = None
+                elif entry.doc_type == doc_type and entry.domain == domain:
+                    self._entries.move_to_end(doc_id)
+                else:
+                    entry = None
+        _record_lookup(doc_type, hit=entry is not None)
+        return None if entry is None else json.loads(entry.doc_json)
+
+    def get_change_count(self):
+        """Get the number of changes read so far, to pass to ``set`` with a
+        document that is fetched after calling this"""
+        with self._lock:
+            return self._change_count
+
+    def set(self, doc_type, domain, doc, change_count):
+        """Cache a document unless no change to it was read before
+        ``change_count`` changes were, or a change to it was read since"""
+        if not doc:
+            return
+        try:
+            doc_json = json.dumps(doc)
+        except TypeError:
+            # not a plain JSON document
+            return
+        doc_id = doc.get('_id')
+        if doc_id is None:
+            return
+        size = len(doc_json)
+        with self._lock:
+            self._remove(doc_id)
+            last_change_count = self._last_change_counts.get(doc_id)
+            if last_change_count is None or last_change_count > change_count or size > self.max_size:
+                return
+            self._entries[doc_id] = _Entry(
+                doc_type,
+                domain,
+                _get_version(doc),
+                doc_json,
+                size,
+                time.monotonic() + self.max_age,
+            )
+            self.size += size
+            while self.size > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, doc_id, version=None):
+        """Record a change to a document read from the feed, and remove the
+        cached document unless it is the given version"""
+        with self._lock:
+            self._change_count += 1
+            self._last_change_counts[doc_id] = self._change_count
+            self._last_change_counts.move_to_end(doc_id)
+            if len(self._last_change_counts) > self.max_tracked_changes:
+                self._last_change_counts.popitem(last=False)
+            entry = self._entries.get(doc_id)
+            if entry is not None and (version is None or entry.version != version):
+                self._remove(doc_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, doc_id):
+        entry = self._entries.pop(doc_id, None)
+        if entry is not None:
+            self.size -= entry.size
+
+
+class _Entry(object):
+    __slots__ = ('doc_type', 'domain', 'version', 'doc_json', 'size', 'expires_at')
+
+    def __init__(self, doc_type, domain, version, doc_json, size, expires_at):
+        self.doc_type = doc_type
+        self.domain = domain
+        self.version = version
+        self.doc_json = doc_json
+        self.size = size
+        self.expires_at = expires_at
+
+
+def _get_version(doc):
+    return doc.get('_rev') or doc.get('server_modified_on')
+
+
+def _record_lookup(doc_type, hit):
+    metrics_counter('commcare.change_feed.document_cache', tags={
+        'doc_type': doc_type,
+        'result': 'hit' if hit else 'miss',
+    })
+
+
+class CachedDocumentStore(DocumentStore):
+    """Document store that reads documents through the document cache"""
+
+    def __init__(self, store, doc_type, cache):
+        # doc_type is the data source name of the documents (e.g. 'case-sql')
+        # since the doc_type of a form changes when it is archived
+        self.store = store
+        self.doc_type = doc_type
+        self.cache = cache
+
+    def get_document(self, doc_id):
+        doc = self.cache.get(self.doc_type, self.domain, doc_id)
+        if doc is None:
+            change_count = self.cache.get_change_count()
+            # DocumentNotFoundError is not cached
+            doc = self.store.get_document(doc_id)
+            self.cache.set(self.doc_type, self.domain, doc, change_count)
+        return doc
+
+    def iter_document_ids(self):
+        return self.store.iter_document_ids()
+
+    def iter_documents(self, ids):
+        missing_ids = []
+        for doc_id in ids:
+            doc = self.cache.get(self.doc_type, self.domain, doc_id)
+            if doc is None:
+                missing_ids.append(doc_id)
+            else:
+                yield doc
+        change_count = self.cache.get_change_count()
+        for doc in self.store.iter_documents(missing_ids):
+            self.cache.set(self.doc_type, self.domain, doc, change_count)
+            yield doc
+
+    @property
+    def domain(self):
+        return getattr(self.store, 'domain', None)
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def __repr__(self):
+        return 'CachedDocumentStore({!r})'.format(self.store)
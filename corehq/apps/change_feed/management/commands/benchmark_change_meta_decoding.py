@@ -0,0 +1,44 @@
+import json
+import time
+import uuid
+
+from django.core.management import BaseCommand
+
+from pillowtop.feed.interface import ChangeMeta
+
+from corehq.apps.change_feed import data_sources
+from corehq.apps.change_feed.consumer.feed import change_meta_from_kafka_message
+
+
+class Command(BaseCommand):
+    help = "Report how many Kafka change messages per second are decoded into change metadata"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=100000)
+
+    def handle(self, messages, **options):
+        message_values = [
+            json.dumps(ChangeMeta(
+                document_id=uuid.uuid4().hex,
+                data_source_type=data_sources.SOURCE_SQL,
+                data_source_name=data_sources.CASE_SQL,
+                document_type='CommCareCase',
+                document_subtype='person',
+                domain='benchmark-domain',
+                is_deletion=False,
+            ).to_json()).encode('utf-8')
+            for i in range(messages)
+        ]
+
+        def decode_with_change_meta(value):
+            return ChangeMeta.wrap(json.loads(value))
+
+        for name, decode in [
+            ('ChangeMeta.wrap', decode_with_change_meta),
+            ('change_meta_from_kafka_message', change_meta_from_kafka_message),
+        ]:
+            start = time.perf_counter()
+            for value in message_values:
+                decode(value)
+            duration = time.perf_counter() - start
+            print(f"{name}: {messages / duration:,.0f} messages/sec")
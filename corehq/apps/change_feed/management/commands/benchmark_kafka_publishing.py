@@ -0,0 +1,67 @@
+import time
+import uuid
+
+from django.core.management import BaseCommand
+
+from pillowtop.feed.interface import ChangeMeta
+
+from corehq.apps.change_feed import topics
+from corehq.apps.change_feed.producer import ChangeProducer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the time taken to publish the changes of a form submission one at a "
+        "time and in a batch, using a fake Kafka producer with a fixed ack latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cases', type=int, default=20, help='Number of cases per form')
+        parser.add_argument('--forms', type=int, default=50)
+        parser.add_argument('--ack-latency-ms', type=float, default=5)
+
+    def handle(self, cases, forms, ack_latency_ms, **options):
+        producer = ChangeProducer()
+        producer._producer = FakeKafkaProducer(ack_latency_ms / 1000)
+
+        def publish_form():
+            producer.send_change(topics.FORM_SQL, _change_meta())
+            for i in range(cases):
+                producer.send_change(topics.CASE_SQL, _change_meta())
+
+        def publish_form_in_batch():
+            with producer.batch():
+                publish_form()
+
+        print(f"{forms} forms with {cases} cases, {ack_latency_ms}ms ack latency")
+        for name, func in [('one at a time', publish_form), ('batched', publish_form_in_batch)]:
+            start = time.perf_counter()
+            for i in range(forms):
+                func()
+            duration = time.perf_counter() - start
+            print(f"{name}: {duration / forms * 1000:.2f}ms per form")
+
+
+class FakeKafkaProducer(object):
+    """Acknowledges each message a fixed time after it is sent"""
+
+    def __init__(self, ack_latency):
+        self.ack_latency = ack_latency
+
+    def send(self, topic, value, key=None):
+        return FakeFuture(time.perf_counter() + self.ack_latency)
+
+
+class FakeFuture(object):
+
+    def __init__(self, acked_at):
+        self.acked_at = acked_at
+
+    def get(self):
+        wait = self.acked_at - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _change_meta():
+    return ChangeMeta(document_id=uuid.uuid4().hex, data_source_type='dummy-type', data_source_name='dummy-name')
@@ -1,6 +1,8 @@
 import json
 import logging
+import threading
 import uuid
+from contextlib import contextmanager
 from functools import partial
 
 from django.conf import settings
@@ -20,6 +22,7 @@ class ChangeProducer(object):
     def __init__(self, auto_flush=True):
         self.auto_flush = auto_flush
         self._producer = None
+        self._batch = threading.local()
 
     @property
     def producer(self):
@@ -32,16 +35,50 @@ class ChangeProducer(object):
             client_id="cchq-producer",
             retries=3,
             acks=1,
-            key_serializer=lambda key: str(key).encode()
+            key_serializer=lambda key: str(key).encode(),
+            linger_ms=settings.KAFKA_PRODUCER_LINGER_MS,
+            batch_size=settings.KAFKA_PRODUCER_BATCH_SIZE,
+            compression_type=settings.KAFKA_PRODUCER_COMPRESSION_TYPE,
         )
         return self._producer
 
+    @contextmanager
+    def batch(self):
+        """Send the changes published in this context together
+
+        Instead of waiting for each change to be sent, wait for all of them
+        to be sent when the context exits. Raises ``KafkaPublishingError``
+        if any of them could not be sent, like ``send_change`` does when
+        ``auto_flush`` is set.
+
+        Batches are per thread. Nested batches are part of the outermost one.
+        """
+        if getattr(self._batch, 'futures', None) is not None:
+            yield
+            return
+
+        self._batch.futures = futures = []
+        try:
+            yield
+        finally:
+            self._batch.futures = None
+
+        try:
+            for future in futures:
+                future.get()
+        except Exception as e:
+            raise KafkaPublishingError(e)
+
     def send_change(self, topic, change_meta):
         message = change_meta.to_json()
         message_json_dump = json.dumps(message).encode('utf-8')
         change_meta._transaction_id = uuid.uuid4().hex
+        batch_futures = getattr(self._batch, 'futures', None)
         try:
             future = self.producer.send(topic, message_json_dump, key=change_meta.document_id)
+            if batch_futures is not None:
+                batch_futures.append(future)
+                return
             if self.auto_flush:
                 future.get()
         except Exception as e:
@@ -0,0 +1,201 @@
+import json
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from pillowtop.dao.exceptions import DocumentNotFoundError
+from pillowtop.dao.mock import MockDocumentStore
+from pillowtop.feed.interface import ChangeMeta
+
+from corehq.apps.change_feed import data_sources
+from corehq.apps.change_feed.document_cache import (
+    CachedDocumentStore,
+    DocumentCache,
+    disable_document_cache,
+    enable_document_cache,
+    get_cached_document_store,
+    invalidate_cached_document,
+)
+
+
+class DocumentCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = DocumentCache(max_size=1000, max_age=60)
+
+    def test_get_returns_copy(self):
+        doc = _doc('abc')
+        _cache_doc(self.cache, 'case-sql', doc)
+        cached = self.cache.get('case-sql', 'test', 'abc')
+        self.assertEqual(cached, doc)
+        cached['name'] = 'changed'
+        self.assertEqual(self.cache.get('case-sql', 'test', 'abc'), doc)
+
+    def test_get_other_type_or_domain(self):
+        _cache_doc(self.cache, 'case-sql', _doc('abc'))
+        self.assertIsNone(self.cache.get('form-sql', 'test', 'abc'))
+        self.assertIsNone(self.cache.get('case-sql', 'other', 'abc'))
+
+    def test_evicts_least_recently_used(self):
+        docs = [_doc(doc_id) for doc_id in ['a', 'b', 'c']]
+        self.cache.max_size = 2 * len(json.dumps(docs[0]))
+        _cache_doc(self.cache, 'case-sql', docs[0])
+        _cache_doc(self.cache, 'case-sql', docs[1])
+        self.cache.get('case-sql', 'test', 'a')
+        _cache_doc(self.cache, 'case-sql', docs[2])
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.size, self.cache.max_size)
+        self.assertIsNotNone(self.cache.get('case-sql', 'test', 'a'))
+        self.assertIsNone(self.cache.get('case-sql', 'test', 'b'))
+        self.assertIsNotNone(self.cache.get('case-sql', 'test', 'c'))
+
+    def test_does_not_cache_large_documents(self):
+        _cache_doc(self.cache, 'case-sql', _doc('abc', name='x' * 1000))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size, 0)
+
+    def test_expired_documents(self):
+        _cache_doc(self.cache, 'case-sql', _doc('abc'))
+        with patch('corehq.apps.change_feed.document_cache.time.monotonic', return_value=float('inf')):
+            self.assertIsNone(self.cache.get('case-sql', 'test', 'abc'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_invalidate(self):
+        _cache_doc(self.cache, 'case-sql', _doc('abc'))
+        self.cache.invalidate('abc')
+        self.assertIsNone(self.cache.get('case-sql', 'test', 'abc'))
+        self.assertEqual(self.cache.size, 0)
+
+    def test_invalidate_same_version(self):
+        _cache_doc(self.cache, 'couch', _doc('abc', _rev='1-a'))
+        self.cache.invalidate('abc', '1-a')
+        self.assertIsNotNone(self.cache.get('couch', 'test', 'abc'))
+        self.cache.invalidate('abc', '2-b')
+        self.assertIsNone(self.cache.get('couch', 'test', 'abc'))
+
+    def test_does_not_cache_documents_without_changes(self):
+        self.cache.set('case-sql', 'test', _doc('abc'), self.cache.get_change_count())
+        self.assertEqual(len(self.cache), 0)
+
+    def test_does_not_cache_documents_changed_while_fetched(self):
+        self.cache.invalidate('abc')
+        change_count = self.cache.get_change_count()
+        self.cache.invalidate('abc')
+        self.cache.set('case-sql', 'test', _doc('abc'), change_count)
+        self.assertIsNone(self.cache.get('case-sql', 'test', 'abc'))
+
+        self.cache.invalidate('def')
+        self.cache.set('case-sql', 'test', _doc('abc'), self.cache.get_change_count())
+        self.assertIsNotNone(self.cache.get('case-sql', 'test', 'abc'))
+
+    def test_forgets_oldest_changes(self):
+        self.cache.max_tracked_changes = 1
+        self.cache.invalidate('abc')
+        self.cache.invalidate('def')
+        self.cache.set('case-sql', 'test', _doc('abc'), self.cache.get_change_count())
+        self.cache.set('case-sql', 'test', _doc('def'), self.cache.get_change_count())
+        self.assertIsNone(self.cache.get('case-sql', 'test', 'abc'))
+        self.assertIsNotNone(self.cache.get('case-sql', 'test', 'def'))
+
+    def test_records_hits_and_misses(self):
+        _cache_doc(self.cache, 'case-sql', _doc('abc'))
+        with patch('corehq.apps.change_feed.document_cache.metrics_counter') as counter:
+            self.cache.get('case-sql', 'test', 'abc')
+            self.cache.get('case-sql', 'test', 'def')
+        self.assertEqual([call.kwargs['tags']['result'] for call in counter.call_args_list], ['hit', 'miss'])
+
+
+class CachedDocumentStoreTest(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = DocumentCache(max_size=10000, max_age=60)
+        self.docs = {doc_id: _doc(doc_id) for doc_id in ['a', 'b', 'c']}
+        self.store = CachedDocumentStore(MockDocumentStore(self.docs), 'case-sql', self.cache)
+        for doc_id in self.docs:
+            self.cache.invalidate(doc_id)
+
+    def test_get_document(self):
+        self.assertEqual(self.store.get_document('a'), self.docs['a'])
+        self.docs['a'] = _doc('a', name='changed')
+        self.assertEqual(self.store.get_document('a')['name'], 'test')
+
+        self.cache.invalidate('a')
+        self.assertEqual(self.store.get_document('a')['name'], 'changed')
+
+    def test_get_document_changed_while_fetched(self):
+        store = self.store.store
+        fetch_document = store.get_document
+
+        def get_document(doc_id):
+            doc = fetch_document(doc_id)
+            # a change to the document is read before it is cached
+            self.cache.invalidate(doc_id)
+            return doc
+
+        with patch.object(store, 'get_document', get_document):
+            self.assertEqual(self.store.get_document('a'), self.docs['a'])
+        self.assertEqual(len(self.cache), 0)
+
+    def test_get_document_without_changes(self):
+        docs = {'d': _doc('d')}
+        store = CachedDocumentStore(MockDocumentStore(docs), 'case-sql', self.cache)
+        self.assertEqual(store.get_document('d'), docs['d'])
+        self.assertEqual(len(self.cache), 0)
+
+    def test_get_missing_document(self):
+        with self.assertRaises(DocumentNotFoundError):
+            self.store.get_document('missing')
+        self.assertEqual(len(self.cache), 0)
+
+    def test_iter_documents(self):
+        self.store.get_document('b')
+        self.docs['b'] = _doc('b', name='changed')
+        docs = {doc['_id']: doc for doc in self.store.iter_documents(['a', 'b', 'c'])}
+        self.assertEqual(set(docs), {'a', 'b', 'c'})
+        self.assertEqual(docs['b']['name'], 'test')
+        self.assertEqual(len(self.cache), 3)
+
+
+class DocumentCacheEnabledTest(SimpleTestCase):
+
+    def tearDown(self):
+        disable_document_cache()
+
+    def test_disabled(self):
+        store = MockDocumentStore()
+        self.assertIs(get_cached_document_store(store, 'case-sql'), store)
+        invalidate_cached_document(_change_meta('abc'))
+
+    def test_document_stores_use_cache(self):
+        store = data_sources.get_document_store(data_sources.SOURCE_SQL, data_sources.CASE_SQL, 'test')
+        self.assertNotIsInstance(store, CachedDocumentStore)
+
+        enable_document_cache(1000)
+        store = data_sources.get_document_store(data_sources.SOURCE_SQL, data_sources.CASE_SQL, 'test')
+        self.assertIsInstance(store, CachedDocumentStore)
+        self.assertEqual(store.domain, 'test')
+        store = data_sources.get_document_store_for_doc_type('test', 'XFormInstance')
+        self.assertIsInstance(store, CachedDocumentStore)
+        store = data_sources.get_document_store(data_sources.SOURCE_SQL, data_sources.LEDGER_V2, 'test')
+        self.assertNotIsInstance(store, CachedDocumentStore)
+
+    def test_invalidate_change(self):
+        cache = enable_document_cache(1000)
+        _cache_doc(cache, 'case-sql', _doc('abc'))
+        invalidate_cached_document(_change_meta('abc'))
+        self.assertEqual(len(cache), 0)
+
+
+def _doc(doc_id, **kw):
+    return dict({'_id': doc_id, 'domain': 'test', 'name': 'test'}, **kw)
+
+
+def _change_meta(doc_id):
+    return ChangeMeta(document_id=doc_id, data_source_type='sql', data_source_name='case-sql', domain='test')
+
+
+def _cache_doc(cache, doc_type, doc):
+    # documents are only cached once a change to them has been read
+    cache.invalidate(doc['_id'])
+    cache.set(doc_type, 'test', doc, cache.get_change_count())
@@ -1,5 +1,7 @@
+import json
 import uuid
 from copy import deepcopy
+from datetime import datetime
 
 from django.test import SimpleTestCase, TestCase
 
@@ -11,7 +13,9 @@ from pillowtop.processors.sample import CountingProcessor
 from corehq.apps.change_feed import topics
 from corehq.apps.change_feed.consumer.feed import (
     KafkaChangeFeed,
+    KafkaChangeMeta,
     KafkaCheckpointEventHandler,
+    change_meta_from_kafka_message,
 )
 from corehq.apps.change_feed.exceptions import UnavailableKafkaOffset
 from corehq.apps.change_feed.producer import producer
@@ -118,6 +122,50 @@ class KafkaCheckpointTest(TestCase):
         self.assertEqual(feed.get_current_checkpoint_offsets(), current_kafka_offsets)
 
 
+class ChangeMetaFromKafkaMessageTest(SimpleTestCase):
+
+    def test_same_as_change_meta(self):
+        meta = ChangeMeta(
+            document_id=uuid.uuid4().hex,
+            data_source_type='sql',
+            data_source_name='case-sql',
+            document_type='CommCareCase',
+            document_subtype='mother',
+            domain='kafka-test-domain',
+            is_deletion=False,
+            publish_timestamp=datetime(2023, 1, 2, 3, 4, 5),
+            attempts=2,
+        )
+        message = json.dumps(meta.to_json()).encode('utf-8')
+        decoded = change_meta_from_kafka_message(message)
+        self.assertIsInstance(decoded, KafkaChangeMeta)
+        self.assertEqual(decoded.to_json(), ChangeMeta.wrap(json.loads(message)).to_json())
+        self.assertEqual(decoded.publish_timestamp, datetime(2023, 1, 2, 3, 4, 5))
+        self.assertEqual(decoded.attempts, 2)
+
+    def test_defaults(self):
+        message = json.dumps({
+            'document_id': 'abc',
+            'data_source_type': 'sql',
+            'data_source_name': 'case-sql',
+        })
+        decoded = change_meta_from_kafka_message(message)
+        self.assertIsInstance(decoded, KafkaChangeMeta)
+        self.assertIsNone(decoded.domain)
+        self.assertEqual(decoded.attempts, 0)
+        self.assertIsInstance(decoded.publish_timestamp, datetime)
+
+    def test_unexpected_message_is_validated_by_change_meta(self):
+        message = json.dumps({
+            'document_id': 'abc',
+            'data_source_type': 'sql',
+            'data_source_name': 'case-sql',
+            'unknown_property': 1,
+        })
+        with self.assertRaises(AttributeError):
+            change_meta_from_kafka_message(message)
+
+
 def publish_stub_change(topic):
     meta = ChangeMeta(document_id=uuid.uuid4().hex, data_source_type='dummy-type', data_source_name='dummy-name')
     producer.send_change(topic, meta)
@@ -0,0 +1,80 @@
+import uuid
+
+from django.test import SimpleTestCase
+
+from pillowtop.feed.interface import ChangeMeta
+
+from corehq.apps.change_feed import topics
+from corehq.apps.change_feed.producer import ChangeProducer
+from corehq.form_processor.exceptions import KafkaPublishingError
+
+
+class ChangeProducerBatchTest(SimpleTestCase):
+
+    def setUp(self):
+        self.kafka_producer = FakeKafkaProducer()
+        self.producer = ChangeProducer()
+        self.producer._producer = self.kafka_producer
+
+    def test_send_change_waits_for_each_change(self):
+        self.producer.send_change(topics.CASE_SQL, _change_meta())
+        self.assertEqual(self.kafka_producer.waited_for, [True])
+
+    def test_batch_waits_for_changes_on_exit(self):
+        with self.producer.batch():
+            for i in range(3):
+                self.producer.send_change(topics.CASE_SQL, _change_meta())
+            self.assertEqual(len(self.kafka_producer.futures), 3)
+            self.assertEqual(self.kafka_producer.waited_for, [False, False, False])
+        self.assertEqual(self.kafka_producer.waited_for, [True, True, True])
+
+    def test_nested_batch(self):
+        with self.producer.batch():
+            with self.producer.batch():
+                self.producer.send_change(topics.CASE_SQL, _change_meta())
+            self.assertEqual(self.kafka_producer.waited_for, [False])
+        self.assertEqual(self.kafka_producer.waited_for, [True])
+
+    def test_batch_raises_publishing_error(self):
+        with self.assertRaises(KafkaPublishingError):
+            with self.producer.batch():
+                self.producer.send_change(topics.CASE_SQL, _change_meta())
+                self.kafka_producer.error = ValueError('no broker')
+                self.producer.send_change(topics.CASE_SQL, _change_meta())
+
+        # the failed batch does not affect changes sent afterwards
+        self.kafka_producer.error = None
+        self.producer.send_change(topics.CASE_SQL, _change_meta())
+        self.assertTrue(self.kafka_producer.futures[-1].waited_for)
+
+
+class FakeKafkaProducer(object):
+
+    def __init__(self):
+        self.futures = []
+        self.error = None
+
+    def send(self, topic, value, key=None):
+        future = FakeFuture(self.error)
+        self.futures.append(future)
+        return future
+
+    @property
+    def waited_for(self):
+        return [future.waited_for for future in self.futures]
+
+
+class FakeFuture(object):
+
+    def __init__(self, error=None):
+        self.error = error
+        self.waited_for = False
+
+    def get(self):
+        self.waited_for = True
+        if self.error:
+            raise self.error
+
+
+def _change_meta():
+    return ChangeMeta(document_id=uuid.uuid4().hex, data_source_type='dummy-type', data_source_name='dummy-name')
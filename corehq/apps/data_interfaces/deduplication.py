@@ -1,19 +1,30 @@
+from collections import defaultdict
 from datetime import datetime
+from itertools import product
 
 from django.utils.text import slugify
 
+from dimagi.utils.chunked import chunked
+
 from corehq.apps.case_search.const import SPECIAL_CASE_PROPERTIES_MAP
 from corehq.apps.data_interfaces.utils import iter_cases_and_run_rules
 from corehq.apps.es import queries
 from corehq.apps.es.case_search import CaseSearchES, case_property_missing
+from corehq.apps.es.es_query import run_multi_search
 from corehq.messaging.util import MessagingRuleProgressHelper
 from corehq.apps.locations.dbaccessors import user_ids_at_locations
 
 DUPLICATE_LIMIT = 1000
+DUPLICATE_SEARCH_BATCH_SIZE = 100
+_DATE_CASE_PROPERTIES = {'date_opened', 'closed_on', 'last_modified'}
 DEDUPE_XMLNS = 'http://commcarehq.org/hq_case_deduplication_rule'
 
 
 def _get_es_filtered_case_query(domain, case, case_filter_criteria=None):
+    return _get_es_filtered_case_type_query(domain, case.type, case_filter_criteria)
+
+
+def _get_es_filtered_case_type_query(domain, case_type, case_filter_criteria=None):
     # Import here to avoid circular import error
     from corehq.apps.data_interfaces.models import (
         MatchPropertyDefinition,
@@ -23,7 +34,7 @@ def _get_es_filtered_case_query(domain, case, case_filter_criteria=None):
     if case_filter_criteria is None:
         case_filter_criteria = []
 
-    query = CaseSearchES().domain(domain).size(DUPLICATE_LIMIT).case_type(case.type)
+    query = CaseSearchES().domain(domain).size(DUPLICATE_LIMIT).case_type(case_type)
 
     def apply_criterion_to_query(query_, definition):
         if isinstance(definition, MatchPropertyDefinition):
@@ -69,19 +80,25 @@ def find_duplicate_case_ids(
     match_type="ALL",
     case_filter_criteria=None
 ):
-    if case_filter_criteria is None:
-        case_filter_criteria = []
-
-    es = _get_es_filtered_case_query(domain, case, case_filter_criteria=case_filter_criteria)
+    es = _get_duplicate_case_query(
+        domain,
+        case.type,
+        _get_case_property_values(case, case_properties),
+        include_closed,
+        match_type,
+        case_filter_criteria,
+    )
+    if es is None:
+        # We need at least one property query otherwise this would return all the cases in the domain
+        return [case.case_id]
+    return es.get_ids()
 
-    if not include_closed:
-        es = es.is_closed(False)
 
-    clause = queries.MUST if match_type == "ALL" else queries.SHOULD
+def _get_case_property_values(case, case_properties):
+    """Returns ``[(case_property_name, value), ...]`` for the properties of
+    ``case`` that have a value"""
+    values = []
     _case_json = None
-
-    at_least_one_property_query = False
-
     for case_property_name in case_properties:
         if case_property_name in SPECIAL_CASE_PROPERTIES_MAP:
             if _case_json is None:
@@ -90,22 +107,132 @@ def find_duplicate_case_ids(
         else:
             case_property_value = case.get_case_property(case_property_name)
 
-        if not case_property_value:
-            continue
+        if case_property_value:
+            values.append((case_property_name, case_property_value))
+    return values
+
 
-        at_least_one_property_query = True
+def _get_duplicate_case_query(domain, case_type, property_values, include_closed, match_type,
+                              case_filter_criteria):
+    if not property_values:
+        return None
 
+    es = _get_es_filtered_case_type_query(domain, case_type, case_filter_criteria=case_filter_criteria)
+
+    if not include_closed:
+        es = es.is_closed(False)
+
+    clause = queries.MUST if match_type == "ALL" else queries.SHOULD
+    for case_property_name, case_property_value in property_values:
         es = es.case_property_query(
             case_property_name,
             case_property_value,
             clause
         )
+    return es
 
-    if at_least_one_property_query:
-        # We need at least one property query otherwise this would return all the cases in the domain
-        return es.get_ids()
-    else:
-        return [case.case_id]
+
+class BulkDuplicateCaseFinder(object):
+    """
+    Finds the duplicates of many cases at a time for a deduplication rule.
+
+    The Elasticsearch queries that ``find_duplicate_case_ids`` would make for
+    each case are sent in ``_msearch`` requests of ``batch_size`` queries.
+
+    With ``use_blocking_index``, an "ALL" rule instead builds an index of
+    the case type's cases keyed on their values for the rule's case
+    properties, from a single scroll. Those values have to match exactly,
+    so the duplicates of a case with a value for every property can be
+    looked up in the index. Cases with blank properties are still searched.
+    """
+
+    def __init__(self, domain, rule, action, batch_size=DUPLICATE_SEARCH_BATCH_SIZE, use_blocking_index=False):
+        self.domain = domain
+        self.rule = rule
+        self.action = action
+        self.batch_size = batch_size
+        self._duplicate_case_ids = {}
+        self._blocking_index = None
+        if use_blocking_index and can_use_blocking_index(rule, action):
+            self._blocking_index = self._build_blocking_index()
+
+    def _build_blocking_index(self):
+        case_properties = self.action.case_properties
+        es = _get_es_filtered_case_type_query(
+            self.domain, self.rule.case_type, case_filter_criteria=self.rule.memoized_criteria
+        )
+        if not self.action.include_closed:
+            es = es.is_closed(False)
+        es = es.size(None).source(['case_properties'])
+
+        index = defaultdict(list)
+        for hit in es.scroll():
+            values_by_name = defaultdict(set)
+            for prop in hit.get('case_properties', []):
+                if prop['key'] in case_properties and prop.get('value'):
+                    values_by_name[prop['key']].add(prop['value'])
+            # a case can have more than one value for a property if a case
+            # property has the same name as one of SPECIAL_CASE_PROPERTIES_MAP
+            for key in product(*(values_by_name[name] for name in case_properties)):
+                index[key].append(hit['_id'])
+        return index
+
+    def prefetch(self, cases):
+        """Finds the duplicates of each of ``cases``, to be returned by ``pop``"""
+        queries_by_case_id = {}
+        for case in cases:
+            property_values = _get_case_property_values(case, self.action.case_properties)
+            if self._blocking_index is not None and len(property_values) == len(self.action.case_properties):
+                key = tuple(str(value) for _, value in property_values)
+                self._duplicate_case_ids[case.case_id] = self._blocking_index.get(key, [])[:DUPLICATE_LIMIT]
+                continue
+
+            es = _get_duplicate_case_query(
+                self.domain,
+                case.type,
+                property_values,
+                self.action.include_closed,
+                self.action.match_type,
+                self.rule.memoized_criteria,
+            )
+            if es is None:
+                self._duplicate_case_ids[case.case_id] = [case.case_id]
+            else:
+                queries_by_case_id[case.case_id] = es.exclude_source()
+
+        for case_ids in chunked(list(queries_by_case_id), self.batch_size, list):
+            results = run_multi_search([queries_by_case_id[case_id] for case_id in case_ids])
+            for case_id, result in zip(case_ids, results):
+                self._duplicate_case_ids[case_id] = result.doc_ids
+
+    def pop(self, case):
+        """Returns the prefetched duplicates of ``case``, or None if they haven't been prefetched"""
+        return self._duplicate_case_ids.pop(case.case_id, None)
+
+
+def can_use_blocking_index(rule, action):
+    """Whether the blocking index gives the same results as searching
+    Elasticsearch for each case
+
+    That is the case for "ALL" rules, as long as the rule doesn't update
+    the properties that the index depends on while the rule runs.
+    """
+    from corehq.apps.data_interfaces.models import (
+        CaseDeduplicationMatchTypeChoices,
+        MatchPropertyDefinition,
+    )
+    if action.match_type != CaseDeduplicationMatchTypeChoices.ALL:
+        return False
+    if any(name in _DATE_CASE_PROPERTIES for name in action.case_properties):
+        # these aren't indexed in the same format that they are read from the case
+        return False
+
+    indexed_properties = set(action.case_properties)
+    for criteria in rule.memoized_criteria:
+        if isinstance(criteria.definition, MatchPropertyDefinition):
+            indexed_properties.add(criteria.definition.property_name)
+    updated_properties = {prop.name for prop in action.get_properties_to_update()}
+    return not (indexed_properties & updated_properties)
 
 
 def reset_and_backfill_deduplicate_rule(rule):
@@ -136,9 +263,15 @@ def reset_deduplicate_rule(rule):
     CaseDuplicate.objects.filter(action=deduplicate_action).delete()
 
 
-def backfill_deduplicate_rule(domain, rule):
+def backfill_deduplicate_rule(domain, rule, bulk=False, batch_size=DUPLICATE_SEARCH_BATCH_SIZE):
+    """
+    :param bulk: find duplicates for ``batch_size`` cases at a time with a
+    BulkDuplicateCaseFinder, and write CaseDuplicates in bulk. Only valid
+    straight after the rule has been reset.
+    """
     from corehq.apps.data_interfaces.models import (
         AutomaticUpdateRule,
+        BulkCaseDuplicateWriter,
         CaseDeduplicationActionDefinition,
         DomainCaseRuleRun,
     )
@@ -160,15 +293,33 @@ def backfill_deduplicate_rule(domain, rule):
         case_iterator = AutomaticUpdateRule.iter_cases(
             domain, rule.case_type, include_closed=action.include_closed
         )
-        iter_cases_and_run_rules(
-            domain,
-            case_iterator,
-            [rule],
-            now,
-            run_record.id,
-            rule.case_type,
-            progress_helper=progress_helper,
-        )
+        if not bulk:
+            iter_cases_and_run_rules(
+                domain,
+                case_iterator,
+                [rule],
+                now,
+                run_record.id,
+                rule.case_type,
+                progress_helper=progress_helper,
+            )
+            return
+
+        finder = BulkDuplicateCaseFinder(domain, rule, action, batch_size=batch_size, use_blocking_index=True)
+        writer = BulkCaseDuplicateWriter(action)
+        try:
+            with action.bulk_backfill(finder, writer):
+                iter_cases_and_run_rules(
+                    domain,
+                    _iter_cases_and_prefetch_duplicates(case_iterator, rule, now, finder, writer, batch_size),
+                    [rule],
+                    now,
+                    run_record.id,
+                    rule.case_type,
+                    progress_helper=progress_helper,
+                )
+        finally:
+            writer.flush()
     finally:
         progress_helper.set_rule_complete()
         rule.last_run = now
@@ -176,6 +327,13 @@ def backfill_deduplicate_rule(domain, rule):
         rule.save(update_fields=['last_run', 'locked_for_editing'])
 
 
+def _iter_cases_and_prefetch_duplicates(case_iterator, rule, now, finder, writer, chunk_size):
+    for cases in chunked(case_iterator, chunk_size, list):
+        finder.prefetch([case for case in cases if rule.criteria_match(case, now)])
+        yield from cases
+        writer.flush()
+
+
 def get_dedupe_xmlns(rule):
     name_slug = slugify(rule.name)
     return f"{DEDUPE_XMLNS}__{name_slug}-{rule.case_type}"
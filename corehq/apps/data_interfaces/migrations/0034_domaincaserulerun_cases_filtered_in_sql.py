@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_interfaces', '0033_automaticupdaterule_deleted_on'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='domaincaserulerun',
+            name='cases_filtered_in_sql',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -1,11 +1,16 @@
+import operator
 import re
 from collections import defaultdict
+from contextlib import contextmanager
 from datetime import date, datetime, time, timedelta
+from functools import reduce
 
 from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
 from django.db import models, transaction
 from django.db.models import Q
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast, Collate
 from django.utils.translation import gettext_lazy
 
 import jsonfield
@@ -39,7 +44,12 @@ from corehq.apps.data_interfaces.deduplication import (
 )
 from corehq.apps.data_interfaces.utils import property_references_parent
 from corehq.apps.es.cases import CaseES
-from corehq.apps.hqcase.utils import bulk_update_cases, update_case, AUTO_UPDATE_XMLNS
+from corehq.apps.hqcase.utils import (
+    AUTO_UPDATE_XMLNS,
+    CASEBLOCK_CHUNKSIZE,
+    bulk_update_cases,
+    update_case,
+)
 from corehq.apps.users.util import SYSTEM_USER_ID
 from corehq.form_processor.models import DEFAULT_PARENT_IDENTIFIER
 from corehq.form_processor.exceptions import CaseNotFound
@@ -54,6 +64,10 @@ from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
     get_case_alert_schedule_instances_for_schedule_id,
     get_case_timed_schedule_instances_for_schedule_id,
 )
+from corehq.messaging.scheduling.scheduling_partitioned.models import (
+    CaseAlertScheduleInstance,
+    CaseTimedScheduleInstance,
+)
 from corehq.messaging.scheduling.tasks import (
     delete_case_alert_schedule_instances,
     delete_case_timed_schedule_instances,
@@ -74,6 +88,18 @@ from corehq.apps.users.models import CommCareUser
 
 ALLOWED_DATE_REGEX = re.compile(r'^\d{4}-\d{2}-\d{2}')
 
+# The characters that str.strip() removes, for matching blank case property
+# values in SQL the same way as MatchPropertyDefinition.check_has_value
+_BLANK_CHARS = (
+    '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000'
+)
+_BLANK_SQL_REGEX = '^[{}]*$'.format(_BLANK_CHARS)
+_NOT_BLANK_SQL_REGEX = '[^{}]'.format(_BLANK_CHARS)
+_NOT_ISO_DATE_SQL_REGEX = '^(?![0-9]{4}-[0-9]{2}-[0-9]{2})'
+# A date property value with a time and a time zone can be up to a day
+# either side of its date once converted to UTC
+_DATE_SQL_FILTER_MARGIN = timedelta(days=2)
+
 
 def _try_date_conversion(date_or_string):
     if isinstance(date_or_string, bytes):
@@ -238,13 +264,46 @@ class AutomaticUpdateRule(models.Model):
         return date
 
     @classmethod
-    def iter_cases(cls, domain, case_type, boundary_date=None, db=None, include_closed=False):
+    def iter_cases(cls, domain, case_type, boundary_date=None, db=None, include_closed=False, case_filter=None):
+        """
+        :param case_filter: (optional) A ``CaseRuleSQLFilter`` to only load the
+        cases that the rules could match
+        """
         return cls._iter_cases_from_postgres(
-            domain, case_type, boundary_date=boundary_date, db=db, include_closed=include_closed
+            domain, case_type, boundary_date=boundary_date, db=db, include_closed=include_closed,
+            case_filter=case_filter,
         )
 
     @classmethod
-    def _iter_cases_from_postgres(cls, domain, case_type, boundary_date=None, db=None, include_closed=False):
+    def _iter_cases_from_postgres(cls, domain, case_type, boundary_date=None, db=None, include_closed=False,
+                                  case_filter=None):
+        q_expression = cls._get_cases_q_expression(domain, case_type, boundary_date, include_closed)
+        alias = None
+        if case_filter is not None:
+            q_expression = q_expression & case_filter.q_expression
+            alias = case_filter.alias
+
+        if db:
+            return paginate_query(db, CommCareCase, q_expression, load_source='auto_update_rule', alias=alias)
+        else:
+            return paginate_query_across_partitioned_databases(
+                CommCareCase, q_expression, load_source='auto_update_rule', alias=alias
+            )
+
+    @classmethod
+    def count_cases(cls, domain, case_type, boundary_date=None, db=None):
+        """
+        The number of cases that ``iter_cases`` would load without a ``case_filter``
+        """
+        q_expression = cls._get_cases_q_expression(domain, case_type, boundary_date)
+        db_names = [db] if db else get_db_aliases_for_partitioned_query()
+        return sum(
+            CommCareCase.objects.using(db_name).filter(q_expression).count()
+            for db_name in db_names
+        )
+
+    @staticmethod
+    def _get_cases_q_expression(domain, case_type, boundary_date=None, include_closed=False):
         q_expression = Q(
             domain=domain,
             type=case_type,
@@ -255,14 +314,63 @@ class AutomaticUpdateRule(models.Model):
 
         if boundary_date:
             q_expression = q_expression & Q(server_modified_on__lte=boundary_date)
+        return q_expression
 
-        if db:
-            return paginate_query(db, CommCareCase, q_expression, load_source='auto_update_rule')
-        else:
-            return paginate_query_across_partitioned_databases(
-                CommCareCase, q_expression, load_source='auto_update_rule'
+    @classmethod
+    def get_case_filter(cls, rules, now):
+        """
+        Returns a ``CaseRuleSQLFilter`` that only lets through the cases that
+        any of the given rules could match, or None if that can't be done in SQL.
+        """
+        case_filter = CaseRuleSQLFilter()
+        q_expressions = []
+        for rule in rules:
+            q_expression = rule.get_case_q_expression(now, case_filter)
+            if q_expression is None:
+                return None
+            q_expressions.append(q_expression)
+
+        if not q_expressions:
+            return None
+        case_filter.q_expression = reduce(operator.or_, q_expressions)
+        return case_filter
+
+    def get_case_q_expression(self, now, case_filter):
+        """
+        Returns a Q expression that is true for at least every case that
+        ``criteria_match`` is true for, or None if the criteria can't narrow
+        down the cases in SQL. Criteria that can only be checked in Python are
+        treated as matching every case, and ``criteria_match`` is still the
+        final check for every case that is loaded.
+        """
+        if self.acts_on_cases_that_do_not_match:
+            return None
+
+        q_expressions = [
+            criteria.definition.get_case_q_expression(now, case_filter)
+            for criteria in self.memoized_criteria
+        ]
+        if self.filter_on_server_modified and self.server_modified_boundary is not None:
+            q_expressions.append(
+                Q(server_modified_on__lt=now - timedelta(days=self.server_modified_boundary))
             )
 
+        if self.criteria_operator == 'ANY':
+            if not q_expressions or None in q_expressions:
+                return None
+            return reduce(operator.or_, q_expressions)
+
+        q_expressions = [q for q in q_expressions if q is not None]
+        return reduce(operator.and_, q_expressions) if q_expressions else None
+
+    @property
+    def acts_on_cases_that_do_not_match(self):
+        return any(
+            type(action.definition).when_case_does_not_match
+            is not CaseRuleActionDefinition.when_case_does_not_match
+            for action in self.memoized_actions
+        )
+
     def activate(self, active=True):
         previous_active = self.active
         self.active = active
@@ -320,8 +428,12 @@ class AutomaticUpdateRule(models.Model):
             'case_deduplication_action_definition',
         ))
 
-    def run_rule(self, case, now):
+    def run_rule(self, case, now, case_update_batch=None, schedule_instance_batch=None):
         """
+        :param case_update_batch: an optional CaseUpdateBatch that actions which
+        support it add their case updates to, instead of submitting them right away.
+        :param schedule_instance_batch: an optional CaseScheduleInstanceBatch that
+        actions which support it load and save schedule instances through.
         :return: CaseRuleActionResult object aggregating the results from all actions.
         """
         if self.deleted:
@@ -334,9 +446,11 @@ class AutomaticUpdateRule(models.Model):
             raise self.RuleError("Invalid case given")
 
         if self.criteria_match(case, now):
-            return self.run_actions_when_case_matches(case)
+            return self.run_actions_when_case_matches(case, case_update_batch=case_update_batch,
+                                                      schedule_instance_batch=schedule_instance_batch)
         else:
-            return self.run_actions_when_case_does_not_match(case)
+            return self.run_actions_when_case_does_not_match(case,
+                                                             schedule_instance_batch=schedule_instance_batch)
 
     def criteria_match(self, case, now):
         if case.is_deleted or case.closed:
@@ -365,12 +479,18 @@ class AutomaticUpdateRule(models.Model):
         else:
             return all(results)
 
-    def _run_method_on_action_definitions(self, case, method):
+    def _run_method_on_action_definitions(self, case, method, case_update_batch=None,
+                                          schedule_instance_batch=None):
         aggregated_result = CaseRuleActionResult()
 
         for action in self.memoized_actions:
             callable_method = getattr(action.definition, method)
-            result = callable_method(case, self)
+            kwargs = {}
+            if case_update_batch is not None and action.definition.supports_case_update_batch:
+                kwargs['case_update_batch'] = case_update_batch
+            if schedule_instance_batch is not None and action.definition.supports_schedule_instance_batch:
+                kwargs['schedule_instance_batch'] = schedule_instance_batch
+            result = callable_method(case, self, **kwargs)
             if not isinstance(result, CaseRuleActionResult):
                 raise TypeError("Expected CaseRuleActionResult")
 
@@ -378,11 +498,13 @@ class AutomaticUpdateRule(models.Model):
 
         return aggregated_result
 
-    def run_actions_when_case_matches(self, case):
-        return self._run_method_on_action_definitions(case, 'when_case_matches')
+    def run_actions_when_case_matches(self, case, case_update_batch=None, schedule_instance_batch=None):
+        return self._run_method_on_action_definitions(case, 'when_case_matches', case_update_batch,
+                                                      schedule_instance_batch)
 
-    def run_actions_when_case_does_not_match(self, case):
-        return self._run_method_on_action_definitions(case, 'when_case_does_not_match')
+    def run_actions_when_case_does_not_match(self, case, schedule_instance_batch=None):
+        return self._run_method_on_action_definitions(case, 'when_case_does_not_match',
+                                                      schedule_instance_batch=schedule_instance_batch)
 
     def delete_criteria(self):
         for item in self.caserulecriteria_set.all():
@@ -547,6 +669,35 @@ class CaseRuleCriteria(models.Model):
         }
 
 
+class CaseRuleSQLFilter(object):
+    """
+    A SQL filter on CommCareCase for the cases that a set of rules could match
+
+    ``alias`` holds the expressions on ``case_json`` that ``q_expression`` refers to.
+    """
+
+    def __init__(self):
+        self.alias = {}
+        self.q_expression = None
+        self._property_aliases = {}
+
+    @property
+    def case_json(self):
+        # case_json is a text column, so it needs casting to query its properties
+        if 'rule_case_json' not in self.alias:
+            self.alias['rule_case_json'] = Cast('case_json', models.JSONField())
+        return 'rule_case_json'
+
+    def get_property_text(self, property_name):
+        """The alias of the text value of the given case_json property"""
+        if property_name not in self._property_aliases:
+            alias = 'rule_property_{}'.format(len(self._property_aliases))
+            # compare values byte by byte, e.g. so dates compare in date order
+            self.alias[alias] = Collate(KeyTextTransform(property_name, self.case_json), 'C')
+            self._property_aliases[property_name] = alias
+        return self._property_aliases[property_name]
+
+
 class CaseRuleCriteriaDefinition(models.Model):
 
     class Meta(object):
@@ -555,6 +706,13 @@ class CaseRuleCriteriaDefinition(models.Model):
     def matches(self, case, now):
         raise NotImplementedError()
 
+    def get_case_q_expression(self, now, case_filter):
+        """
+        Optionally returns a Q expression that is true for at least every case
+        that ``matches`` is true for. See AutomaticUpdateRule.get_case_q_expression
+        """
+        return None
+
 
 class MatchPropertyDefinition(CaseRuleCriteriaDefinition):
     # True when today < (the date in property_name + property_value days)
@@ -669,6 +827,52 @@ class MatchPropertyDefinition(CaseRuleCriteriaDefinition):
 
         return False
 
+    def get_case_q_expression(self, now, case_filter):
+        if not self._can_filter_in_sql():
+            return None
+
+        if self.match_type in (self.MATCH_EQUAL, self.MATCH_NOT_EQUAL):
+            q_expression = Q(**{case_filter.case_json + '__contains': {self.property_name: self.property_value}})
+            return q_expression if self.match_type == self.MATCH_EQUAL else ~q_expression
+
+        value = case_filter.get_property_text(self.property_name)
+        if self.match_type == self.MATCH_HAS_VALUE:
+            return Q(**{value + '__regex': _NOT_BLANK_SQL_REGEX})
+        if self.match_type == self.MATCH_HAS_NO_VALUE:
+            return Q(**{value + '__isnull': True}) | Q(**{value + '__regex': _BLANK_SQL_REGEX})
+
+        # The dates are compared as strings, so let through any values
+        # that don't start with an ISO date for the Python check to handle
+        days = timedelta(days=int(self.property_value))
+        not_a_date = Q(**{value + '__regex': _NOT_ISO_DATE_SQL_REGEX})
+        if self.match_type == self.MATCH_DAYS_BEFORE:
+            # now < date + days
+            earliest = (now - days - _DATE_SQL_FILTER_MARGIN).date().isoformat()
+            return Q(**{value + '__gt': earliest}) | not_a_date
+        else:
+            # now >= date + days
+            latest = (now - days + _DATE_SQL_FILTER_MARGIN).date().isoformat()
+            return Q(**{value + '__lt': latest}) | not_a_date
+
+    def _can_filter_in_sql(self):
+        # Only properties that resolve to a case_json value can be filtered
+        # on. CommCareCase fields and references to other cases can't.
+        case_fields = {field.name for field in CommCareCase._meta.fields}
+        if '/' in self.property_name or self.property_name in case_fields or self.property_name == '_id':
+            return False
+
+        if self.match_type in (self.MATCH_EQUAL, self.MATCH_NOT_EQUAL):
+            return self.property_value is not None
+        elif self.match_type in (self.MATCH_HAS_VALUE, self.MATCH_HAS_NO_VALUE):
+            return True
+        elif self.match_type in (self.MATCH_DAYS_BEFORE, self.MATCH_DAYS_AFTER):
+            try:
+                int(self.property_value)
+            except (TypeError, ValueError):
+                return False
+            return True
+        return False
+
     def matches(self, case, now):
         return {
             self.MATCH_DAYS_BEFORE: self.check_days_before,
@@ -886,11 +1090,102 @@ class CaseRuleActionResult(object):
         )
 
 
+class CaseUpdateBatch(object):
+    """
+    Collects the case updates made by rule actions so that they can be
+    submitted as forms of up to ``max_case_blocks`` case blocks each, instead
+    of one form per case.
+
+    Actions report their results as soon as they add an update. If a form
+    fails, its updates are submitted again one case at a time, and ``flush``
+    returns a CaseRuleActionResult that takes back the counts of the updates
+    that still failed and adds one error for each of them. The IDs of the
+    cases whose updates failed in the last flush are in ``failed_case_ids``.
+    """
+
+    def __init__(self, domain, max_case_blocks=CASEBLOCK_CHUNKSIZE):
+        self.domain = domain
+        self.max_case_blocks = max_case_blocks
+        self.failed_case_ids = []
+        self._rules = {}
+        self._updates_by_rule_id = defaultdict(list)
+
+    def __len__(self):
+        return sum(len(updates) for updates in self._updates_by_rule_id.values())
+
+    @property
+    def is_full(self):
+        return len(self) >= self.max_case_blocks
+
+    def add(self, rule, case_id, case_properties, close, result):
+        """
+        :param result: the CaseRuleActionResult the action reports for this update
+        """
+        self._rules[rule.pk] = rule
+        self._updates_by_rule_id[rule.pk].append((case_id, case_properties, close, result))
+
+    def flush(self):
+        correction = CaseRuleActionResult()
+        self.failed_case_ids = []
+        updates_by_rule_id = self._updates_by_rule_id
+        self._updates_by_rule_id = defaultdict(list)
+        for rule_id, updates in updates_by_rule_id.items():
+            rule = self._rules[rule_id]
+            for chunk in chunked(updates, self.max_case_blocks, list):
+                correction.add_result(self._submit(rule, chunk))
+        return correction
+
+    def _submit(self, rule, updates):
+        try:
+            form, _ = bulk_update_cases(
+                self.domain,
+                [(case_id, properties, close) for case_id, properties, close, _ in updates],
+                device_id=rule.id,
+                xmlns=AUTO_UPDATE_XMLNS,
+                form_name=rule.name,
+                user_id=SYSTEM_USER_ID,
+                max_wait=15,
+            )
+        except Exception:
+            if len(updates) > 1:
+                # find the update(s) that caused the form to fail
+                correction = CaseRuleActionResult()
+                for update in updates:
+                    correction.add_result(self._submit(rule, [update]))
+                return correction
+
+            case_id, _, _, result = updates[0]
+            self.failed_case_ids.append(case_id)
+            notify_exception(None, "Error applying case update rule", {
+                'domain': self.domain,
+                'rule_pk': rule.pk,
+                'case_id': case_id,
+            })
+            return CaseRuleActionResult(
+                num_updates=-result.num_updates,
+                num_closes=-result.num_closes,
+                num_related_updates=-result.num_related_updates,
+                num_related_closes=-result.num_related_closes,
+                num_creates=-result.num_creates,
+                num_errors=1,
+            )
+
+        rule.log_submission(form.form_id)
+        return CaseRuleActionResult()
+
+
 class CaseRuleActionDefinition(models.Model):
 
     class Meta(object):
         abstract = True
 
+    # True if when_case_matches accepts a case_update_batch keyword argument
+    supports_case_update_batch = False
+
+    # True if when_case_matches and when_case_does_not_match accept a
+    # schedule_instance_batch keyword argument
+    supports_schedule_instance_batch = False
+
     def when_case_matches(self, case, rule):
         """
         Defines the actions to be taken when the case matches the rule.
@@ -1005,7 +1300,9 @@ class UpdateCaseDefinition(BaseUpdateCaseDefinition):
     # True to close the case, otherwise False
     close_case = models.BooleanField()
 
-    def when_case_matches(self, case, rule):
+    supports_case_update_batch = True
+
+    def when_case_matches(self, case, rule, case_update_batch=None):
         cases_to_update = self.get_case_and_ancestor_updates(case)
 
         num_updates = 0
@@ -1016,9 +1313,14 @@ class UpdateCaseDefinition(BaseUpdateCaseDefinition):
         for case_id, properties in cases_to_update.items():
             if case_id == case.case_id:
                 continue
-            result = update_case(case.domain, case_id, case_properties=properties, close=False,
-                                 xmlns=AUTO_UPDATE_XMLNS, max_wait=15, device_id=rule.id, form_name=rule.name)
-            rule.log_submission(result[0].form_id)
+            if case_update_batch is not None:
+                case_update_batch.add(rule, case_id, properties, False,
+                                      CaseRuleActionResult(num_related_updates=1))
+            else:
+                result = update_case(case.domain, case_id, case_properties=properties, close=False,
+                                     xmlns=AUTO_UPDATE_XMLNS, max_wait=15, device_id=rule.id,
+                                     form_name=rule.name)
+                rule.log_submission(result[0].form_id)
             num_related_updates += 1
 
         # Update / close the case
@@ -1029,10 +1331,16 @@ class UpdateCaseDefinition(BaseUpdateCaseDefinition):
             close_case = False
 
         if close_case or properties:
-            result = update_case(case.domain, case.case_id, case_properties=properties, close=close_case,
-                                 xmlns=AUTO_UPDATE_XMLNS, max_wait=15, device_id=rule.id, form_name=rule.name)
-
-            rule.log_submission(result[0].form_id)
+            if case_update_batch is not None:
+                case_update_batch.add(rule, case.case_id, properties, close_case, CaseRuleActionResult(
+                    num_updates=1 if properties else 0,
+                    num_closes=1 if close_case else 0,
+                ))
+            else:
+                result = update_case(case.domain, case.case_id, case_properties=properties, close=close_case,
+                                     xmlns=AUTO_UPDATE_XMLNS, max_wait=15, device_id=rule.id,
+                                     form_name=rule.name)
+                rule.log_submission(result[0].form_id)
 
             if properties:
                 num_updates += 1
@@ -1130,25 +1438,53 @@ class CaseDeduplicationActionDefinition(BaseUpdateCaseDefinition):
 
         return all_match or any_match
 
+    # Set by bulk_backfill
+    _duplicate_case_finder = None
+    _case_duplicate_writer = None
+
+    @contextmanager
+    def bulk_backfill(self, duplicate_case_finder, case_duplicate_writer):
+        """
+        While backfilling the rule, use the duplicates prefetched by a
+        BulkDuplicateCaseFinder and write CaseDuplicates with a
+        BulkCaseDuplicateWriter
+        """
+        self._duplicate_case_finder = duplicate_case_finder
+        self._case_duplicate_writer = case_duplicate_writer
+        try:
+            yield
+        finally:
+            self._duplicate_case_finder = None
+            self._case_duplicate_writer = None
+
     def when_case_matches(self, case, rule):
         domain = case.domain
-        new_duplicate_case_ids = set(find_duplicate_case_ids(
-            domain,
-            case,
-            self.case_properties,
-            self.include_closed,
-            self.match_type,
-            case_filter_criteria=rule.memoized_criteria,
-        ))
+        new_duplicate_case_ids = None
+        if self._duplicate_case_finder is not None:
+            new_duplicate_case_ids = self._duplicate_case_finder.pop(case)
+        if new_duplicate_case_ids is None:
+            new_duplicate_case_ids = find_duplicate_case_ids(
+                domain,
+                case,
+                self.case_properties,
+                self.include_closed,
+                self.match_type,
+                case_filter_criteria=rule.memoized_criteria,
+            )
+        new_duplicate_case_ids = set(new_duplicate_case_ids)
         # If the case being searched isn't in the case search index
         # (e.g. if this is a case create, and the pillows are racing each other.)
         # Add it to the list
         new_duplicate_case_ids.add(case.case_id)
 
-        with transaction.atomic():
-            if self._handle_existing_duplicates(case.case_id, new_duplicate_case_ids):
+        if self._case_duplicate_writer is not None:
+            if not self._case_duplicate_writer.add(case.case_id, new_duplicate_case_ids):
                 return CaseRuleActionResult(num_updates=0)
-            CaseDuplicate.bulk_create_duplicate_relationships(self, case, new_duplicate_case_ids)
+        else:
+            with transaction.atomic():
+                if self._handle_existing_duplicates(case.case_id, new_duplicate_case_ids):
+                    return CaseRuleActionResult(num_updates=0)
+                CaseDuplicate.bulk_create_duplicate_relationships(self, case, new_duplicate_case_ids)
         if self.properties_to_update:
             num_updates = self._update_cases(domain, rule, new_duplicate_case_ids)
         else:
@@ -1317,6 +1653,54 @@ class CaseDuplicate(models.Model):
         cls.potential_duplicates.through.objects.bulk_create(through_models)
 
 
+class BulkCaseDuplicateWriter(object):
+    """
+    Collects the duplicate relationships found while backfilling a
+    deduplication rule and writes them in bulk.
+
+    A backfill starts with no CaseDuplicates for the action, so relationships
+    are only ever added: each case is linked to each of its duplicates, as
+    ``CaseDuplicate.bulk_create_duplicate_relationships`` does for one case.
+    """
+
+    def __init__(self, action):
+        self.action = action
+        self._linked_case_ids = defaultdict(set)
+        self._pending = []
+
+    def add(self, case_id, duplicate_case_ids):
+        """Returns True if any of the relationships are new"""
+        new_case_ids = set(duplicate_case_ids) - {case_id} - self._linked_case_ids[case_id]
+        for duplicate_case_id in new_case_ids:
+            self._linked_case_ids[case_id].add(duplicate_case_id)
+            self._linked_case_ids[duplicate_case_id].add(case_id)
+            self._pending.append((case_id, duplicate_case_id))
+        return bool(new_case_ids)
+
+    def flush(self):
+        pending = self._pending
+        self._pending = []
+        for pairs in chunked(pending, 1000, list):
+            self._write(pairs)
+
+    def _write(self, pairs):
+        case_ids = {case_id for pair in pairs for case_id in pair}
+        CaseDuplicate.objects.bulk_create([
+            CaseDuplicate(case_id=case_id, action=self.action) for case_id in case_ids
+        ], ignore_conflicts=True)
+        ids_by_case_id = dict(
+            CaseDuplicate.objects
+            .filter(action=self.action, case_id__in=case_ids)
+            .values_list('case_id', 'id')
+        )
+        through_model = CaseDuplicate.potential_duplicates.through
+        through_model.objects.bulk_create([
+            through_model(from_caseduplicate_id=ids_by_case_id[from_id], to_caseduplicate_id=ids_by_case_id[to_id])
+            for case_id, duplicate_case_id in pairs
+            for from_id, to_id in ((case_id, duplicate_case_id), (duplicate_case_id, case_id))
+        ], ignore_conflicts=True)
+
+
 class VisitSchedulerIntegrationHelper(object):
 
     class VisitSchedulerIntegrationException(Exception):
@@ -1449,6 +1833,8 @@ class CreateScheduleInstanceActionDefinition(CaseRuleActionDefinition):
     # Only applicable when the schedule is a TimedSchedule
     scheduler_module_info = jsonfield.JSONField(default=dict)
 
+    supports_schedule_instance_batch = True
+
     class SchedulerModuleInfo(JsonObject):
         # Set to True to enable setting the start date of any schedule instances
         # based on the visit scheduler info details below
@@ -1520,12 +1906,13 @@ class CreateScheduleInstanceActionDefinition(CaseRuleActionDefinition):
 
         return None
 
-    def when_case_matches(self, case, rule):
+    def when_case_matches(self, case, rule, schedule_instance_batch=None):
         schedule = self.schedule
         if isinstance(schedule, AlertSchedule):
-            refresh_case_alert_schedule_instances(case, schedule, self, rule)
+            refresh_case_alert_schedule_instances(case, schedule, self, rule,
+                                                  schedule_instance_batch=schedule_instance_batch)
         elif isinstance(schedule, TimedSchedule):
-            kwargs = {}
+            kwargs = {'schedule_instance_batch': schedule_instance_batch}
             scheduler_module_info = self.get_scheduler_module_info()
 
             # Figure out what to use as the start date of the schedule instance.
@@ -1539,7 +1926,7 @@ class CreateScheduleInstanceActionDefinition(CaseRuleActionDefinition):
                 if not start_date:
                     # The case property doesn't reference a date, so delete any
                     # schedule instances pertaining to this rule and case and return
-                    self.delete_schedule_instances(case)
+                    self.delete_schedule_instances(case, schedule_instance_batch)
                     return CaseRuleActionResult()
 
                 kwargs['start_date'] = start_date
@@ -1550,14 +1937,14 @@ class CreateScheduleInstanceActionDefinition(CaseRuleActionDefinition):
                     case_phase_matches, schedule_instance_start_date = VisitSchedulerIntegrationHelper(case,
                         scheduler_module_info).get_result()
                 except VisitSchedulerIntegrationHelper.VisitSchedulerIntegrationException:
-                    self.delete_schedule_instances(case)
+                    self.delete_schedule_instances(case, schedule_instance_batch)
                     self.notify_scheduler_integration_exception(case, scheduler_module_info)
                     return CaseRuleActionResult()
 
                 if not case_phase_matches:
                     # The case is not in the matching schedule phase, so delete
                     # schedule instances pertaining to this rule and case and return
-                    self.delete_schedule_instances(case)
+                    self.delete_schedule_instances(case, schedule_instance_batch)
                     return CaseRuleActionResult()
                 else:
                     kwargs['start_date'] = schedule_instance_start_date
@@ -1566,11 +1953,20 @@ class CreateScheduleInstanceActionDefinition(CaseRuleActionDefinition):
 
         return CaseRuleActionResult()
 
-    def when_case_does_not_match(self, case, rule):
-        self.delete_schedule_instances(case)
+    def when_case_does_not_match(self, case, rule, schedule_instance_batch=None):
+        self.delete_schedule_instances(case, schedule_instance_batch)
         return CaseRuleActionResult()
 
-    def delete_schedule_instances(self, case):
+    def delete_schedule_instances(self, case, schedule_instance_batch=None):
+        if schedule_instance_batch is not None:
+            if self.alert_schedule_id:
+                schedule_instance_batch.delete_instances(
+                    CaseAlertScheduleInstance, case.case_id, self.alert_schedule_id)
+            if self.timed_schedule_id:
+                schedule_instance_batch.delete_instances(
+                    CaseTimedScheduleInstance, case.case_id, self.timed_schedule_id)
+            return
+
         if self.alert_schedule_id:
             get_case_alert_schedule_instances_for_schedule_id(case.case_id, self.alert_schedule_id).delete()
 
@@ -1698,6 +2094,7 @@ class DomainCaseRuleRun(models.Model):
     workflow = models.CharField(max_length=126, choices=AutomaticUpdateRule.WORKFLOW_CHOICES, null=True)
 
     cases_checked = models.IntegerField(default=0)
+    cases_filtered_in_sql = models.IntegerField(default=0)
     num_updates = models.IntegerField(default=0)
     num_closes = models.IntegerField(default=0)
     num_related_updates = models.IntegerField(default=0)
@@ -1713,7 +2110,7 @@ class DomainCaseRuleRun(models.Model):
         )
 
     @classmethod
-    def done(cls, run_id, cases_checked, result, db=None, halted=False):
+    def done(cls, run_id, cases_checked, result, db=None, halted=False, cases_filtered_in_sql=0):
         if not isinstance(result, CaseRuleActionResult):
             raise TypeError("Expected an instance of CaseRuleActionResult")
 
@@ -1721,6 +2118,7 @@ class DomainCaseRuleRun(models.Model):
             run = cls.objects.get(pk=run_id)
 
             run.cases_checked += cases_checked
+            run.cases_filtered_in_sql += cases_filtered_in_sql
             run.num_updates += result.num_updates
             run.num_closes += result.num_closes
             run.num_related_updates += result.num_related_updates
@@ -27,7 +27,13 @@ from corehq.motech.repeaters.dbaccessors import (
 from corehq.apps.case_importer.do_import import SubmitCaseBlockHandler, RowAndCase
 from corehq.motech.repeaters.models import SQLRepeatRecord
 from corehq.sql_db.util import get_db_aliases_for_partitioned_query
-from corehq.toggles import CASE_DEDUPE, DISABLE_CASE_UPDATE_RULE_SCHEDULED_TASK
+from corehq.toggles import (
+    CASE_DEDUPE,
+    CASE_DEDUPE_BULK_BACKFILL,
+    CASE_UPDATE_RULES_BATCH_SUBMISSIONS,
+    CASE_UPDATE_RULES_SQL_FILTER,
+    DISABLE_CASE_UPDATE_RULE_SCHEDULED_TASK,
+)
 from corehq.util.celery_utils import no_result_task
 from corehq.util.decorators import serial_task
 from corehq.util.log import send_HTML_email
@@ -82,7 +88,7 @@ def reset_and_backfill_deduplicate_rule_task(domain, rule_id):
     AutomaticUpdateRule.clear_caches(rule.domain, AutomaticUpdateRule.WORKFLOW_DEDUPLICATE)
 
     reset_deduplicate_rule(rule)
-    backfill_deduplicate_rule(domain, rule)
+    backfill_deduplicate_rule(domain, rule, bulk=CASE_DEDUPE_BULK_BACKFILL.enabled(domain))
 
 
 @task(queue='background_queue')
@@ -171,8 +177,17 @@ def run_case_update_rules_for_domain_and_db(domain, now, run_id, case_type, db=N
     rules = list(all_rules.filter(case_type=case_type))
 
     boundary_date = AutomaticUpdateRule.get_boundary_date(rules, now)
-    iterator = AutomaticUpdateRule.iter_cases(domain, case_type, boundary_date, db=db)
-    run = iter_cases_and_run_rules(domain, iterator, rules, now, run_id, case_type, db)
+    case_filter = None
+    unfiltered_case_count = None
+    if CASE_UPDATE_RULES_SQL_FILTER.enabled(domain):
+        case_filter = AutomaticUpdateRule.get_case_filter(rules, now)
+    if case_filter is not None:
+        unfiltered_case_count = AutomaticUpdateRule.count_cases(domain, case_type, boundary_date, db)
+    iterator = AutomaticUpdateRule.iter_cases(domain, case_type, boundary_date, db=db, case_filter=case_filter)
+    run = iter_cases_and_run_rules(
+        domain, iterator, rules, now, run_id, case_type, db, unfiltered_case_count=unfiltered_case_count,
+        batch_case_updates=CASE_UPDATE_RULES_BATCH_SUBMISSIONS.enabled(domain),
+    )
 
     if run.status == DomainCaseRuleRun.STATUS_FINISHED:
         for rule in rules:
@@ -1,4 +1,4 @@
-from contextlib import contextmanager
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
 from unittest.mock import patch
 
@@ -12,6 +12,7 @@ from corehq.apps.data_interfaces.models import (
     CaseRuleActionResult,
     CaseRuleSubmission,
     CaseRuleUndoer,
+    CaseUpdateBatch,
     ClosedParentDefinition,
     CreateScheduleInstanceActionDefinition,
     CustomActionDefinition,
@@ -24,6 +25,7 @@ from corehq.apps.data_interfaces.models import (
 )
 from corehq.apps.data_interfaces.tasks import run_case_update_rules_for_domain
 from corehq.apps.domain.models import Domain
+from corehq.apps.hqcase.utils import bulk_update_cases as real_bulk_update_cases
 from corehq.form_processor.models import CommCareCase, XFormInstance
 from corehq.form_processor.signals import sql_case_post_save
 from corehq.tests.locks import reentrant_redis_locks
@@ -655,6 +657,98 @@ def set_case_property_directly(case, property_name, value):
     case.case_json[property_name] = value
 
 
+class CaseRuleSQLFilterTest(BaseCaseRuleTest):
+    """Checks that the SQL filter lets through exactly the cases that match"""
+
+    def _assert_sql_filter(self, rule, now, values, matching_values, unfiltered_values=()):
+        """
+        Cases with a value in ``matching_values`` match the rule. Cases with a
+        value in ``unfiltered_values`` don't match, but are only excluded by the
+        rule's criteria in Python. Everything else should be filtered out in SQL.
+        """
+        with ExitStack() as stack:
+            case_ids_by_value = {}
+            for value in values:
+                update = {'result': value} if value is not None else {}
+                case = stack.enter_context(_with_case(self.domain, 'person', datetime(2020, 1, 1), update=update))
+                case_ids_by_value[value] = case.case_id
+
+            case_filter = AutomaticUpdateRule.get_case_filter([rule], now)
+            self.assertIsNotNone(case_filter)
+            filtered_cases = list(AutomaticUpdateRule.iter_cases(self.domain, 'person', case_filter=case_filter))
+            self.assertEqual(
+                {case.case_id for case in filtered_cases},
+                {case_ids_by_value[value] for value in list(matching_values) + list(unfiltered_values)}
+            )
+            self.assertEqual(
+                {case.case_id for case in filtered_cases if rule.criteria_match(case, now)},
+                {case_ids_by_value[value] for value in matching_values}
+            )
+            self.assertEqual(
+                AutomaticUpdateRule.count_cases(self.domain, 'person') - len(filtered_cases),
+                len(values) - len(matching_values) - len(unfiltered_values)
+            )
+
+    def _rule_with_criteria(self, match_type, property_value=None, property_name='result'):
+        rule = _create_empty_rule(self.domain)
+        rule.add_criteria(
+            MatchPropertyDefinition,
+            property_name=property_name,
+            property_value=property_value,
+            match_type=match_type,
+        )
+        return rule
+
+    def test_equal(self):
+        rule = self._rule_with_criteria(MatchPropertyDefinition.MATCH_EQUAL, 'negative')
+        self._assert_sql_filter(rule, datetime.utcnow(), [None, 'x', 'negative'], ['negative'])
+
+    def test_not_equal(self):
+        rule = self._rule_with_criteria(MatchPropertyDefinition.MATCH_NOT_EQUAL, 'negative')
+        self._assert_sql_filter(rule, datetime.utcnow(), [None, 'x', 'negative'], [None, 'x'])
+
+    def test_has_value(self):
+        rule = self._rule_with_criteria(MatchPropertyDefinition.MATCH_HAS_VALUE)
+        self._assert_sql_filter(rule, datetime.utcnow(), [None, '', ' ', 'x'], ['x'])
+
+    def test_has_no_value(self):
+        rule = self._rule_with_criteria(MatchPropertyDefinition.MATCH_HAS_NO_VALUE)
+        self._assert_sql_filter(rule, datetime.utcnow(), [None, '', ' ', 'x'], [None, '', ' '])
+
+    def test_days_before(self):
+        rule = self._rule_with_criteria(MatchPropertyDefinition.MATCH_DAYS_BEFORE, '10')
+        self._assert_sql_filter(
+            rule,
+            datetime(2020, 6, 30),
+            [None, 'x', '2020-06-01', '2020-06-10T12:00:00', '2020-06-25'],
+            matching_values=['2020-06-25'],
+            unfiltered_values=['x'],
+        )
+
+    def test_days_after(self):
+        rule = self._rule_with_criteria(MatchPropertyDefinition.MATCH_DAYS_AFTER, '10')
+        self._assert_sql_filter(
+            rule,
+            datetime(2020, 6, 30),
+            [None, 'x', '2020-06-01', '2020-06-10T12:00:00', '2020-06-25'],
+            matching_values=['2020-06-01', '2020-06-10T12:00:00'],
+            unfiltered_values=['x'],
+        )
+
+    def test_any_with_python_only_criteria(self):
+        rule = self._rule_with_criteria(MatchPropertyDefinition.MATCH_EQUAL, 'negative')
+        rule.criteria_operator = 'ANY'
+        rule.save()
+        rule.add_criteria(CustomMatchDefinition, name='CUSTOM_CRITERIA_TEST')
+        self.assertIsNone(AutomaticUpdateRule.get_case_filter([rule], datetime.utcnow()))
+
+    def test_parent_property(self):
+        rule = self._rule_with_criteria(
+            MatchPropertyDefinition.MATCH_EQUAL, 'negative', property_name='parent/result'
+        )
+        self.assertIsNone(AutomaticUpdateRule.get_case_filter([rule], datetime.utcnow()))
+
+
 class CaseRuleActionsTest(BaseCaseRuleTest):
 
     def assertActionResult(self, rule, submission_count, result=None, expected_result=None):
@@ -698,6 +792,70 @@ class CaseRuleActionsTest(BaseCaseRuleTest):
             self.assertEqual(case.get_case_property('result2'), 'def')
             self.assertFalse(case.closed)
 
+    def test_batched_update_and_close(self):
+        rule = _create_empty_rule(self.domain)
+        _, definition = rule.add_action(UpdateCaseDefinition, close_case=True)
+        definition.set_properties_to_update([
+            UpdateCaseDefinition.PropertyDefinition(
+                name='result1',
+                value_type=UpdateCaseDefinition.VALUE_TYPE_EXACT,
+                value='abc',
+            ),
+        ])
+        definition.save()
+
+        with _with_case(self.domain, 'person', datetime.utcnow()) as case1, \
+                _with_case(self.domain, 'person', datetime.utcnow()) as case2:
+            batch = CaseUpdateBatch(self.domain)
+            result = CaseRuleActionResult()
+            result.add_result(rule.run_actions_when_case_matches(case1, case_update_batch=batch))
+            result.add_result(rule.run_actions_when_case_matches(case2, case_update_batch=batch))
+            self.assertEqual(len(batch), 2)
+            self.assertActionResult(rule, 0, result, CaseRuleActionResult(num_updates=2, num_closes=2))
+            self.assertFalse(CommCareCase.objects.get_case(case1.case_id, self.domain).closed)
+
+            self.assertEqual(batch.flush(), CaseRuleActionResult())
+            self.assertEqual(len(batch), 0)
+            self.assertActionResult(rule, 1)
+            for case in CommCareCase.objects.get_cases([case1.case_id, case2.case_id], self.domain):
+                self.assertEqual(case.get_case_property('result1'), 'abc')
+                self.assertTrue(case.closed)
+                self.assertEqual(case.xform_ids[-1], CaseRuleSubmission.objects.get().form_id)
+
+    def test_batched_update_failure(self):
+        rule = _create_empty_rule(self.domain)
+        _, definition = rule.add_action(UpdateCaseDefinition, close_case=False)
+        definition.set_properties_to_update([
+            UpdateCaseDefinition.PropertyDefinition(
+                name='result1',
+                value_type=UpdateCaseDefinition.VALUE_TYPE_EXACT,
+                value='abc',
+            ),
+        ])
+        definition.save()
+
+        def bulk_update_cases(domain, case_changes, *args, **kwargs):
+            if any(case_id == bad_case.case_id for case_id, _, _ in case_changes):
+                raise Exception("bad case")
+            return real_bulk_update_cases(domain, case_changes, *args, **kwargs)
+
+        with _with_case(self.domain, 'person', datetime.utcnow()) as case, \
+                _with_case(self.domain, 'person', datetime.utcnow()) as bad_case, \
+                patch('corehq.apps.data_interfaces.models.bulk_update_cases', new=bulk_update_cases), \
+                patch('corehq.apps.data_interfaces.models.notify_exception'):
+            batch = CaseUpdateBatch(self.domain)
+            result = CaseRuleActionResult()
+            result.add_result(rule.run_actions_when_case_matches(case, case_update_batch=batch))
+            result.add_result(rule.run_actions_when_case_matches(bad_case, case_update_batch=batch))
+            result.add_result(batch.flush())
+
+            self.assertActionResult(rule, 1, result, CaseRuleActionResult(num_updates=1, num_errors=1))
+            self.assertEqual(batch.failed_case_ids, [bad_case.case_id])
+            case = CommCareCase.objects.get_case(case.case_id, self.domain)
+            self.assertEqual(case.get_case_property('result1'), 'abc')
+            bad_case = CommCareCase.objects.get_case(bad_case.case_id, self.domain)
+            self.assertIsNone(bad_case.get_case_property('result1'))
+
     def test_update_case_name(self):
         """
         Updating case property "case_name" updates ``case.name``
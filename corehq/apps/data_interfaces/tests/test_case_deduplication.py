@@ -1140,3 +1140,26 @@ class DeduplicationBackfillTest(TestCase):
 
         backfill_deduplicate_rule(self.domain, self.rule)
         self.assertEqual(CaseDuplicate.objects.filter(action=self.action).count(), 2)
+
+    def test_bulk_include_closed_finds_open_and_closed_cases(self):
+        self._set_up_rule(include_closed=True)
+
+        backfill_deduplicate_rule(self.domain, self.rule, bulk=True)
+        self.assertEqual(CaseDuplicate.objects.filter(action=self.action).count(), 3)
+        for case_duplicate in CaseDuplicate.objects.filter(action=self.action):
+            self.assertEqual(case_duplicate.potential_duplicates.count(), 2)
+
+    def test_bulk_finds_open_cases_only(self):
+        self._set_up_rule(include_closed=False)
+
+        backfill_deduplicate_rule(self.domain, self.rule, bulk=True)
+        self.assertEqual(CaseDuplicate.objects.filter(action=self.action).count(), 2)
+
+    def test_bulk_without_blocking_index(self):
+        self._set_up_rule(include_closed=True)
+
+        with patch("corehq.apps.data_interfaces.deduplication.can_use_blocking_index", return_value=False):
+            backfill_deduplicate_rule(self.domain, self.rule, bulk=True, batch_size=2)
+        self.assertEqual(CaseDuplicate.objects.filter(action=self.action).count(), 3)
+        for case_duplicate in CaseDuplicate.objects.filter(action=self.action):
+            self.assertEqual(case_duplicate.potential_duplicates.count(), 2)
@@ -7,6 +7,7 @@ from django.test import TestCase
 from unittest.mock import call, patch
 
 from casexml.apps.case.tests.util import create_case
+from dimagi.utils.couch import CriticalSection
 from corehq.apps.app_manager.models import (
     AdvancedForm,
     AdvancedModule,
@@ -19,6 +20,7 @@ from corehq.apps.data_interfaces.models import (
     AutomaticUpdateRule,
     CreateScheduleInstanceActionDefinition,
     MatchPropertyDefinition,
+    UpdateCaseDefinition,
     VisitSchedulerIntegrationHelper,
 )
 from corehq.apps.data_interfaces.tests.util import create_empty_rule
@@ -55,12 +57,15 @@ from corehq.messaging.scheduling.tests.util import (
     delete_timed_schedules,
 )
 from corehq.messaging.tasks import (
+    get_sync_key,
     run_messaging_rule,
     run_messaging_rule_for_shard,
+    sync_case_chunk_for_messaging_rule,
     sync_case_for_messaging,
     sync_case_for_messaging_rule,
 )
 from corehq.sql_db.util import paginate_query_across_partitioned_databases
+from corehq.util.test_utils import flag_enabled
 
 
 def get_visit_scheduler_module_and_form_for_test():
@@ -761,6 +766,85 @@ class CaseRuleSchedulingIntegrationTest(TestCase):
         instances = get_case_timed_schedule_instances_for_schedule(case.case_id, schedule)
         self.assertEqual(instances.count(), 0)
 
+    @flag_enabled('BULK_SYNC_MESSAGING_RULE_CHUNKS')
+    @patch('corehq.messaging.scheduling.util.utcnow')
+    def test_sync_case_chunk_for_messaging_rule_in_bulk(self, utcnow_patch):
+        schedule = AlertSchedule.create_simple_alert(
+            self.domain,
+            SMSContent(message={'en': 'Hello'})
+        )
+
+        rule = create_empty_rule(self.domain, AutomaticUpdateRule.WORKFLOW_SCHEDULING)
+        rule.add_criteria(
+            MatchPropertyDefinition,
+            property_name='start_sending',
+            property_value='Y',
+            match_type=MatchPropertyDefinition.MATCH_EQUAL,
+        )
+        rule.add_action(
+            CreateScheduleInstanceActionDefinition,
+            alert_schedule_id=schedule.schedule_id,
+            recipients=(('CommCareUser', self.user.get_id),)
+        )
+        AutomaticUpdateRule.clear_caches(self.domain, AutomaticUpdateRule.WORKFLOW_SCHEDULING)
+
+        utcnow_patch.return_value = datetime(2017, 5, 1, 7, 0)
+        with create_case(self.domain, 'person', update={'start_sending': 'Y'}) as matching_case, \
+                create_case(self.domain, 'person') as other_case:
+            case_ids = [matching_case.case_id, other_case.case_id, 'missing-case-id']
+
+            # Running the chunk twice creates the instance once, and saves it the second time
+            for minute in range(1, 3):
+                utcnow_patch.return_value = datetime(2017, 5, 1, 7, minute)
+                sync_case_chunk_for_messaging_rule(self.domain, case_ids, rule.pk)
+
+                instances = get_case_alert_schedule_instances_for_schedule(matching_case.case_id, schedule)
+                self.assertEqual(instances.count(), 1)
+                self.assertEqual(instances[0].rule_id, rule.pk)
+                self.assertEqual(instances[0].recipient_id, self.user.get_id)
+                self.assertEqual(instances[0].next_event_due, datetime(2017, 5, 1, 7, 1))
+                self.assertTrue(instances[0].active)
+
+                instances = get_case_alert_schedule_instances_for_schedule(other_case.case_id, schedule)
+                self.assertEqual(instances.count(), 0)
+
+            update_case(self.domain, matching_case.case_id, case_properties={'start_sending': 'N'})
+            sync_case_chunk_for_messaging_rule(self.domain, case_ids, rule.pk)
+            instances = get_case_alert_schedule_instances_for_schedule(matching_case.case_id, schedule)
+            self.assertEqual(instances.count(), 0)
+
+    @flag_enabled('BULK_SYNC_MESSAGING_RULE_CHUNKS')
+    @patch('corehq.messaging.tasks._sync_case_chunk_for_messaging_rule')
+    @patch('corehq.messaging.tasks.sync_case_for_messaging_rule.delay')
+    def test_sync_case_chunk_for_messaging_rule_skips_locked_cases(self, sync_patch, chunk_patch):
+        with CriticalSection([get_sync_key('locked-case-id')]):
+            sync_case_chunk_for_messaging_rule(self.domain, ['case-id', 'locked-case-id'], 1)
+
+        chunk_patch.assert_called_once_with(self.domain, ['case-id'], 1, None)
+        sync_patch.assert_called_once_with(self.domain, 'locked-case-id', 1)
+
+    @flag_enabled('CASE_UPDATE_RULES_BATCH_SUBMISSIONS')
+    @patch('corehq.messaging.tasks.sync_case_for_messaging_rule.delay')
+    def test_sync_case_chunk_for_messaging_rule_requeues_failed_updates(self, sync_patch):
+        rule = create_empty_rule(self.domain, AutomaticUpdateRule.WORKFLOW_SCHEDULING)
+        _, definition = rule.add_action(UpdateCaseDefinition, close_case=False)
+        definition.set_properties_to_update([
+            UpdateCaseDefinition.PropertyDefinition(
+                name='synced',
+                value_type=UpdateCaseDefinition.VALUE_TYPE_EXACT,
+                value='Y',
+            ),
+        ])
+        definition.save()
+        AutomaticUpdateRule.clear_caches(self.domain, AutomaticUpdateRule.WORKFLOW_SCHEDULING)
+
+        with create_case(self.domain, 'person') as case, \
+                patch('corehq.apps.data_interfaces.models.bulk_update_cases', side_effect=Exception), \
+                patch('corehq.apps.data_interfaces.models.notify_exception'):
+            sync_case_chunk_for_messaging_rule(self.domain, [case.case_id], rule.pk)
+
+        sync_patch.assert_called_once_with(self.domain, case.case_id, rule.pk)
+
     @patch('corehq.messaging.scheduling.util.utcnow')
     def test_timed_schedule_case_property_timed_event(self, utcnow_patch):
         schedule = TimedSchedule.create_simple_daily_schedule(
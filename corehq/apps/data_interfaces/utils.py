@@ -214,9 +214,18 @@ def _get_sql_repeat_record(domain, record_id):
         return None
 
 
-def iter_cases_and_run_rules(domain, case_iterator, rules, now, run_id, case_type, db=None, progress_helper=None):
+def iter_cases_and_run_rules(domain, case_iterator, rules, now, run_id, case_type, db=None, progress_helper=None,
+                             unfiltered_case_count=None, batch_case_updates=False):
+    """
+    :param unfiltered_case_count: if ``case_iterator`` is filtered in SQL, the
+    number of cases it would have loaded without the filter. The difference
+    with the number of cases checked is recorded as ``cases_filtered_in_sql``.
+    :param batch_case_updates: if True, the case updates made by the rules are
+    submitted in forms of several case blocks each (see CaseUpdateBatch)
+    """
     from corehq.apps.data_interfaces.models import (
         CaseRuleActionResult,
+        CaseUpdateBatch,
         DomainCaseRuleRun,
     )
     HALT_AFTER = 23 * 60 * 60
@@ -225,6 +234,7 @@ def iter_cases_and_run_rules(domain, case_iterator, rules, now, run_id, case_typ
     max_allowed_updates = domain_obj.auto_case_update_limit or settings.MAX_RULE_UPDATES_IN_ONE_RUN
     start_run = datetime.utcnow()
     case_update_result = CaseRuleActionResult()
+    case_update_batch = CaseUpdateBatch(domain) if batch_case_updates else None
 
     cases_checked = 0
     last_migration_check_time = None
@@ -241,15 +251,27 @@ def iter_cases_and_run_rules(domain, case_iterator, rules, now, run_id, case_typ
         ):
             notify_error("Halting rule run for domain %s and case type %s." % (domain, case_type))
 
-            return DomainCaseRuleRun.done(
-                run_id, cases_checked, case_update_result, db=db, halted=True
-            )
+            if case_update_batch is not None:
+                case_update_result.add_result(case_update_batch.flush())
+            # the cases that were not loaded yet are not known to be filtered out
+            return DomainCaseRuleRun.done(run_id, cases_checked, case_update_result, db=db, halted=True)
 
-        case_update_result.add_result(run_rules_for_case(case, rules, now))
+        case_update_result.add_result(run_rules_for_case(case, rules, now, case_update_batch))
+        if case_update_batch is not None and case_update_batch.is_full:
+            case_update_result.add_result(case_update_batch.flush())
         if progress_helper is not None:
             progress_helper.increment_current_case_count()
         cases_checked += 1
-    return DomainCaseRuleRun.done(run_id, cases_checked, case_update_result, db=db)
+
+    if case_update_batch is not None:
+        case_update_result.add_result(case_update_batch.flush())
+    cases_filtered_in_sql = 0
+    if unfiltered_case_count is not None:
+        # cases may be created while the rules run, so this is approximate
+        cases_filtered_in_sql = max(unfiltered_case_count - cases_checked, 0)
+    return DomainCaseRuleRun.done(
+        run_id, cases_checked, case_update_result, db=db, cases_filtered_in_sql=cases_filtered_in_sql
+    )
 
 
 def _check_data_migration_in_progress(domain, last_migration_check_time):
@@ -260,7 +282,7 @@ def _check_data_migration_in_progress(domain, last_migration_check_time):
     return False, last_migration_check_time
 
 
-def run_rules_for_case(case, rules, now):
+def run_rules_for_case(case, rules, now, case_update_batch=None):
     from corehq.apps.data_interfaces.models import CaseRuleActionResult
     aggregated_result = CaseRuleActionResult()
     last_result = None
@@ -270,10 +292,13 @@ def run_rules_for_case(case, rules, now):
                 last_result.num_updates > 0 or last_result.num_related_updates > 0
                 or last_result.num_related_closes > 0
             ):
+                if case_update_batch is not None:
+                    # the next rule needs to see the updates made by the last one
+                    aggregated_result.add_result(case_update_batch.flush())
                 case = CommCareCase.objects.get_case(case.case_id, case.domain)
 
         try:
-            last_result = rule.run_rule(case, now)
+            last_result = rule.run_rule(case, now, case_update_batch=case_update_batch)
         except Exception:
             last_result = CaseRuleActionResult(num_errors=1)
             notify_exception(None, "Error applying case update rule", {
@@ -21,6 +21,7 @@ from corehq.util.es.elasticsearch import (
     bulk,
 )
 from corehq.util.global_request import get_request_domain
+from corehq.util.json import CommCareJSONEncoder
 from corehq.util.metrics import (
     limit_domains,
     metrics_counter,
@@ -39,6 +40,9 @@ from .utils import ElasticJSONSerializer, index_runtime_name
 
 log = logging.getLogger(__name__)
 
+# Produces the same JSON as ElasticJSONSerializer, without the whitespace.
+_bulk_json_encoder = CommCareJSONEncoder(separators=(",", ":"))
+
 
 class BaseAdapter:
     """Base adapter that includes methods common to all adapters."""
@@ -643,6 +647,45 @@ class ElasticDocumentAdapter(BaseAdapter):
         ):
             return self._es.search(self.index_name, self.type, query, **kw)
 
+    def msearch(self, queries):
+        """Perform several queries (searches) in a single ``_msearch`` request
+        and return their results.
+
+        :param queries: iterable of ``dict`` search queries to execute
+        :returns: ``list`` of ``dict`` results, in the same order as ``queries``
+        """
+        body = []
+        for query in queries:
+            body.append({})
+            body.append(query)
+        if not body:
+            return []
+        try:
+            results = self._msearch(body)["responses"]
+            for result in results:
+                if "error" in result:
+                    error = result["error"]
+                    if isinstance(error, dict):
+                        error = error.get("reason", "multi-search error")
+                    raise ESError(error)
+                self._fix_hits_in_result(result)
+                self._report_and_fail_on_shard_failures(result)
+        except ElasticsearchException as exc:
+            raise ESError(exc)
+        return results
+
+    def _msearch(self, body):
+        """Perform a "low-level" multi-search and return the raw result."""
+        with metrics_histogram_timer(
+                'commcare.elasticsearch.msearch.timing',
+                timing_buckets=(1, 10),
+                tags={
+                    'index': self.canonical_name,
+                    'domain': limit_domains(get_request_domain()),
+                },
+        ):
+            return self._es.msearch(body, self.index_name, self.type)
+
     def scroll(self, query, scroll=SCROLL_KEEPALIVE, size=None):
         """Perfrom a scrolling search, yielding each doc until the entire context
         is exhausted.
@@ -881,6 +924,73 @@ class ElasticDocumentAdapter(BaseAdapter):
         action_gen = (BulkActionItem.delete_id(doc_id) for doc_id in doc_ids)
         return self.bulk(action_gen, **bulk_kw)
 
+    def bulk_ndjson(self, actions, refresh=False, raise_errors=True):
+        """Process bulk actions in a single request, serializing them directly
+        into a newline-delimited JSON payload.
+
+        This is faster than ``bulk()`` for batches of large documents (like the
+        chunks of a pillow) because each action is serialized once, instead of
+        being rendered into a dict that the ``bulk()`` helper function copies
+        and then serializes. Unlike ``bulk()``, the actions are not split into
+        chunks of 500, so this should not be used for an unbounded number of
+        actions.
+
+        :param actions: iterable of ``BulkActionItem`` instances
+        :param refresh: ``bool`` refresh the effected shards to make this
+                        operation visible to search
+        :param raise_errors: whether or not exceptions should be raised if bulk
+            actions fail. The default (``True``) matches that of ``bulk()``.
+        :returns: ``(success_count, errors)`` tuple, the same as ``bulk()``.
+            ``errors`` is a list of ``{op_type: item}`` dicts of the actions
+            that failed.
+        """
+        payload, action_metas = self._render_bulk_payload(actions)
+        if not action_metas:
+            return 0, []
+        try:
+            response = self._es.bulk(payload, refresh=self._refresh_value(refresh))
+        except TransportError as exc:
+            if raise_errors:
+                raise
+            # report every action as failed, the same as the bulk() helper
+            errors = [
+                {op_type: dict(meta, error=str(exc), status=exc.status_code, exception=exc)}
+                for op_type, meta in action_metas
+            ]
+            return 0, errors
+        errors = []
+        for item in response["items"]:
+            (op_type, result), = item.items()
+            if not 200 <= result.get("status", 500) < 300:
+                errors.append({op_type: result})
+        if raise_errors and errors:
+            # raise the same as elasticsearch-py does
+            raise BulkIndexError(f"{len(errors)} document(s) failed to index.", errors)
+        return len(action_metas) - len(errors), errors
+
+    def _render_bulk_payload(self, actions):
+        """Render bulk actions into the body of an Elasticsearch bulk request.
+
+        The body is a ``str`` rather than ``bytes`` because the Elasticsearch
+        client checks that it ends with a newline using a ``str``.
+
+        :param actions: iterable of ``BulkActionItem`` instances
+        :returns: ``(payload, action_metas)`` tuple, where ``action_metas`` is
+            a list of ``(op_type, meta)`` tuples of the rendered actions.
+        """
+        encode = _bulk_json_encoder.encode
+        lines = []
+        action_metas = []
+        for action in actions:
+            op_type, doc_id, source = self._render_bulk_action_parts(action)
+            meta = {"_index": self.index_name, "_type": self.type, "_id": doc_id}
+            lines.append(encode({op_type: meta}))
+            if source is not None:
+                lines.append(encode(source))
+            action_metas.append((op_type, meta))
+        lines.append("")
+        return "\n".join(lines), action_metas
+
     def _render_bulk_action(self, action, *, forbid_tombstones=True):
         """Return a "raw" action object in the format required by the
         Elasticsearch ``bulk()`` helper function.
@@ -890,26 +1000,42 @@ class ElasticDocumentAdapter(BaseAdapter):
             the ``_verify_doc_source()`` method.
         :returns: ``dict``
         """
+        op_type, doc_id, source = self._render_bulk_action_parts(
+            action, forbid_tombstones=forbid_tombstones)
         for_elastic = {
             "_index": self.index_name,
             "_type": self.type,
+            "_op_type": op_type,
         }
+        if source is not None:
+            for_elastic["_source"] = source
+        for_elastic["_id"] = doc_id
+        return for_elastic
+
+    def _render_bulk_action_parts(self, action, *, forbid_tombstones=True):
+        """Return the verified ``(op_type, doc_id, source)`` of a bulk action.
+        ``source`` is ``None`` for ``delete`` actions.
+
+        :param action: a ``BulkActionItem`` instance
+        :param forbid_tombstones: Optional (default ``True``) passed verbatim to
+            the ``_verify_doc_source()`` method.
+        :returns: ``tuple``
+        """
+        source = None
         if action.is_delete:
-            for_elastic["_op_type"] = "delete"
+            op_type = "delete"
             if action.doc is None:
                 doc_id = action.doc_id
             else:
                 doc_id = self.from_python(action.doc)[0]
         elif action.is_index:
-            for_elastic["_op_type"] = "index"
+            op_type = "index"
             doc_id, source = self.from_python(action.doc)
             self._verify_doc_source(source, forbid_tombstones=forbid_tombstones)
-            for_elastic["_source"] = source
         else:
             raise ValueError(f"unsupported action type: {action!r}")
         self._verify_doc_id(doc_id)
-        for_elastic["_id"] = doc_id
-        return for_elastic
+        return op_type, doc_id, source
 
     @staticmethod
     def _verify_doc_id(doc_id):
@@ -1134,6 +1260,9 @@ class ElasticMultiplexAdapter(BaseAdapter):
     def search(self, *args, **kw):
         return self.primary.search(*args, **kw)
 
+    def msearch(self, *args, **kw):
+        return self.primary.msearch(*args, **kw)
+
     # Elastic index write methods (multiplexed between both adapters)
     def bulk(self, actions, refresh=False, raise_errors=True):
         """Apply bulk actions on the primary and secondary.
@@ -1250,6 +1379,12 @@ class ElasticMultiplexAdapter(BaseAdapter):
         for seq, action in sorted(flatten(by_id)):
             yield action
 
+    def bulk_ndjson(self, actions, refresh=False, raise_errors=True):
+        """Apply bulk actions on the primary and secondary with ``bulk()``,
+        which multiplexes the actions.
+        """
+        return self.bulk(actions, refresh=refresh, raise_errors=raise_errors)
+
     def bulk_index(self, docs, **bulk_kw):
         return ElasticDocumentAdapter.bulk_index(self, docs, **bulk_kw)
 
@@ -526,6 +526,21 @@ class ScanResult(object):
         yield from self._iterator
 
 
+def run_multi_search(queries):
+    """Run several queries against the same index in a single ``_msearch`` request.
+
+    :param queries: list of ``ESQuery`` objects
+    :returns: list of ``ESQuerySet`` objects, in the same order as ``queries``
+    """
+    if not queries:
+        return []
+    adapter = queries[0].adapter
+    if any(query.adapter.index_name != adapter.index_name for query in queries):
+        raise ValueError("All queries in a multi-search must be for the same index")
+    results = adapter.msearch([query.raw_query for query in queries])
+    return [ESQuerySet(result, query.clone()) for result, query in zip(results, queries)]
+
+
 class ESQuerySet(object):
     """
     The object returned from ``ESQuery.run``
@@ -0,0 +1,64 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from corehq.apps.es.client import BulkActionItem
+from corehq.apps.es.tests.utils import TestDoc, test_adapter
+from corehq.util.es.elasticsearch import elasticsearch
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the time taken to render and serialize the body of a bulk request "
+        "with the bulk() helper function and with ElasticDocumentAdapter.bulk_ndjson(). "
+        "No requests are sent to Elasticsearch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--actions', type=int, default=100, help='Number of actions per request')
+        parser.add_argument('--properties', type=int, default=500, help='Number of properties per doc')
+        parser.add_argument('--requests', type=int, default=100)
+
+    def handle(self, actions, properties, requests, **options):
+        docs = [_make_doc(properties) for i in range(actions)]
+        bulk_actions = [BulkActionItem.index(doc) for doc in docs]
+        payload, _ = test_adapter._render_bulk_payload(bulk_actions)
+        print(f"{requests} requests of {actions} actions, {len(payload.encode('utf-8')):,} bytes per request")
+
+        for name, render in [
+            ('bulk() helper', _render_with_bulk_helper),
+            ('bulk_ndjson', _render_ndjson),
+        ]:
+            start = time.perf_counter()
+            for i in range(requests):
+                render(bulk_actions)
+            duration = time.perf_counter() - start
+            print(f"{name}: {duration / requests * 1000:.2f}ms per request")
+
+
+def _render_with_bulk_helper(bulk_actions):
+    # what the bulk() helper does with the actions rendered by bulk()
+    serializer = test_adapter._es.transport.serializer
+    lines = []
+    for action in bulk_actions:
+        meta, data = elasticsearch.helpers.expand_action(test_adapter._render_bulk_action(action))
+        lines.append(serializer.dumps(meta))
+        if data is not None:
+            lines.append(serializer.dumps(data))
+    return "\n".join(lines) + "\n"
+
+
+def _render_ndjson(bulk_actions):
+    return test_adapter._render_bulk_payload(bulk_actions)[0]
+
+
+def _make_doc(properties):
+    value = {
+        'form': {
+            f'question_{i}': {'#text': uuid.uuid4().hex, '@type': 'text'}
+            for i in range(properties)
+        },
+        'received_on': '2023-01-01T00:00:00.000000Z',
+    }
+    return TestDoc(uuid.uuid4().hex, value)
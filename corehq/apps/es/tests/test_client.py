@@ -1001,6 +1001,17 @@ class TestElasticDocumentAdapter(AdapterWithIndexTestCase, ESTestHelpers):
                 self.adapter.search({})
             self.assertEqual(test.exception.args, exc_args)
 
+    def test_msearch(self):
+        docs = self._index_many_new_docs(2)
+        queries = [{"query": {"term": {"value": doc["value"]}}} for doc in docs]
+        results = self.adapter.msearch(queries)
+        self.assertEqual(len(results), 2)
+        for doc, result in zip(docs, results):
+            self.assertEqual([doc["_id"]], [hit["_id"] for hit in result["hits"]["hits"]])
+
+    def test_msearch_no_queries(self):
+        self.assertEqual(self.adapter.msearch([]), [])
+
     def test__search(self):
         docs = self._index_many_new_docs(2)
         result = self.adapter._search({})
@@ -1424,6 +1435,42 @@ class TestElasticDocumentAdapter(AdapterWithIndexTestCase, ESTestHelpers):
             self.adapter.bulk_delete(["1", ""], refresh=True)
         self.assertEqual({}, self._search_hits_dict({}))
 
+    def test_bulk_ndjson(self):
+        def tform_to_dict(docs):
+            return docs_to_dict(self.adapter.to_json(doc) for doc in docs)
+        docs = [self._make_doc() for x in range(2)]
+        result = self.adapter.bulk_ndjson([BulkActionItem.index(doc) for doc in docs], refresh=True)
+        self.assertEqual((2, []), result)
+        self.assertEqual(tform_to_dict(docs), self._search_hits_dict({}))
+        result = self.adapter.bulk_ndjson([BulkActionItem.delete(doc) for doc in docs], refresh=True)
+        self.assertEqual((2, []), result)
+        self.assertEqual({}, self._search_hits_dict({}))
+
+    def test_bulk_ndjson_without_actions(self):
+        self.assertEqual((0, []), self.adapter.bulk_ndjson([]))
+
+    def test_bulk_ndjson_returns_errors_when_raise_errors_is_false(self):
+        doc = self._make_doc()
+        missing_id = uuid.uuid4().hex
+        actions = [BulkActionItem.index(doc), BulkActionItem.delete_id(missing_id)]
+        success_count, errors = self.adapter.bulk_ndjson(actions, refresh=True, raise_errors=False)
+        self.assertEqual(1, success_count)
+        self.assertEqual([missing_id], [error["delete"]["_id"] for error in errors])
+        self.assertEqual(404, errors[0]["delete"]["status"])
+        self.assertEqual(docs_to_dict([self.adapter.to_json(doc)]), self._search_hits_dict({}))
+
+    def test_bulk_ndjson_raises_errors(self):
+        with self.assertRaises(BulkIndexError) as test:
+            self.adapter.bulk_ndjson([BulkActionItem.delete_id(uuid.uuid4().hex)])
+        self.assertEqual(1, len(test.exception.errors))
+
+    def test_bulk_ndjson_fails_with_invalid_id(self):
+        docs = [self._make_doc() for x in range(2)]
+        docs[0].id = None
+        with self.assertRaises(ValueError):
+            self.adapter.bulk_ndjson([BulkActionItem.index(doc) for doc in docs], refresh=True)
+        self.assertEqual({}, self._search_hits_dict({}))
+
     def test__report_and_fail_on_shard_failures(self):
         result = self.adapter._search({})
         # in case this test search actually had a shard failure...
@@ -1547,6 +1594,28 @@ class TestElasticDocumentAdapterWithoutRequests(SimpleTestCase):
         with self.assertRaises(ValueError):
             self.adapter._render_bulk_action(BulkActionItem.index(bad))
 
+    def test__render_bulk_payload(self):
+        doc = TestDoc("1", "test")
+        actions = [BulkActionItem.index(doc), BulkActionItem.delete_id("2")]
+        payload, action_metas = self.adapter._render_bulk_payload(actions)
+        index_meta = {"_index": self.adapter.index_name, "_type": self.adapter.type, "_id": "1"}
+        delete_meta = {"_index": self.adapter.index_name, "_type": self.adapter.type, "_id": "2"}
+        self.assertTrue(payload.endswith("\n"))
+        self.assertEqual(
+            [json.loads(line) for line in payload.splitlines()],
+            [{"index": index_meta}, {"value": "test", "entropy": 3}, {"delete": delete_meta}],
+        )
+        self.assertEqual(action_metas, [("index", index_meta), ("delete", delete_meta)])
+
+    def test__render_bulk_payload_matches__render_bulk_action(self):
+        doc = TestDoc("1", "test")
+        action = BulkActionItem.index(doc)
+        payload, _ = self.adapter._render_bulk_payload([action])
+        rendered = self.adapter._render_bulk_action(action)
+        meta, source = [json.loads(line) for line in payload.splitlines()]
+        self.assertEqual(source, rendered.pop("_source"))
+        self.assertEqual(meta, {rendered.pop("_op_type"): rendered})
+
     def test__verify_doc_id(self):
         self.adapter._verify_doc_id("abc")  # should not raise
 
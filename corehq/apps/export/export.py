@@ -27,6 +27,11 @@ from corehq.util.metrics.load_counters import load_counter
 from corehq.util.files import TransientTempfile, safe_filename
 from soil.progress import TaskProgressManager
 
+# The number of rows buffered per table before they are passed to the
+# couchexport writer. Writing rows in blocks lets the writers use e.g.
+# csv.writer.writerows instead of formatting one row at a time.
+EXPORT_WRITE_BATCH_SIZE = 1000
+
 
 class ExportFile(object):
     # This is essentially coppied from couchexport.files.ExportFiles
@@ -43,7 +48,46 @@ class ExportFile(object):
         self.file.close()
 
 
-class _ExportWriter(object):
+class _RowBufferMixin(object):
+    """
+    Buffers rows per table and hands them to ``_write_rows`` in blocks of
+    EXPORT_WRITE_BATCH_SIZE. Any rows that are still buffered are written
+    by ``flush``, which ``open`` calls before closing the writer.
+    """
+
+    def write(self, table, row):
+        """
+        Write the given row to the given table of the export.
+        :param table: A TableConfiguration
+        :param row: An ExportRow
+        """
+        self.write_rows(table, [row])
+
+    def write_rows(self, table, rows):
+        """
+        Write the given rows to the given table of the export.
+        :param table: A TableConfiguration
+        :param rows: A list of ExportRows
+        """
+        pending = self._pending_rows.setdefault(table, [])
+        pending.extend(rows)
+        if len(pending) >= EXPORT_WRITE_BATCH_SIZE:
+            self._flush_table(table)
+
+    def flush(self):
+        for table in list(self._pending_rows):
+            self._flush_table(table)
+
+    def _flush_table(self, table):
+        rows = self._pending_rows.pop(table, None)
+        if rows:
+            self._write_rows(table, rows)
+
+    def _write_rows(self, table, rows):
+        raise NotImplementedError
+
+
+class _ExportWriter(_RowBufferMixin):
     """
     An object that provides a friendlier interface to couchexport.ExportWriters.
     """
@@ -53,6 +97,7 @@ class _ExportWriter(object):
         self.writer = writer
         self.format = writer.format
         self.path = temp_path
+        self._pending_rows = {}
 
     @contextlib.contextmanager
     def open(self, export_instances):
@@ -94,30 +139,29 @@ class _ExportWriter(object):
             self.writer.open(headers, file, table_titles=table_titles, archive_basepath=name)
             try:
                 yield
+                self.flush()
             finally:
                 self.writer.close()
 
-    def write(self, table, row):
-        """
-        Write the given row to the given table of the export.
-        _Writer must be opened first.
-        :param table: A TableConfiguration
-        :param row: An ExportRow
-        """
-        return self.writer.write([
-            (table, [FormattedRow(
-                data=row.data,
-                hyperlink_column_indices=row.hyperlink_column_indices,
-                skip_excel_formatting=row.skip_excel_formatting
-                if hasattr(row, 'skip_excel_formatting') else ()
-            )])
+    def _write_rows(self, table, rows):
+        self.writer.write([
+            (table, [
+                FormattedRow(
+                    data=row.data,
+                    hyperlink_column_indices=row.hyperlink_column_indices,
+                    skip_excel_formatting=row.skip_excel_formatting
+                    if hasattr(row, 'skip_excel_formatting') else ()
+                )
+                for row in rows
+            ])
         ])
 
     def get_preview(self):
+        self.flush()
         return self.writer.get_preview()
 
 
-class _PaginatedExportWriter(object):
+class _PaginatedExportWriter(_RowBufferMixin):
 
     def __init__(self, writer, temp_path):
         self.format = writer.format
@@ -127,6 +171,7 @@ class _PaginatedExportWriter(object):
         # An instance of a couchexport.ExportWriter
         self.writer = writer
         self.file_handle = None
+        self._pending_rows = {}
 
     @contextlib.contextmanager
     def open(self, export_instances):
@@ -148,6 +193,7 @@ class _PaginatedExportWriter(object):
             )
             try:
                 yield
+                self.flush()
             finally:
                 self.writer.close()
 
@@ -245,24 +291,28 @@ class _PaginatedExportWriter(object):
             )
         return paginated_table_titles
 
-    def write(self, table, row):
+    def _write_rows(self, table, rows):
         """
-        Write the given row to the given table of the export.
-        Will automatically open a new table and write to that if it
-        has exceeded the number of rows written in the first table.
-        :param table: A TableConfiguration
-        :param row: An ExportRow
+        Will automatically open a new table and write to that once the
+        current table has MAX_NORMAL_EXPORT_SIZE rows.
         """
-        if self.rows_written[table] >= MAX_NORMAL_EXPORT_SIZE * (self.pages[table] + 1):
-            self.pages[table] += 1
-            self.writer.add_table(
-                self._paged_table_index(table),
-                self._get_paginated_headers()[self._paged_table_index(table)][0],
-                table_title=self._get_paginated_table_titles()[self._paged_table_index(table)],
-            )
+        while rows:
+            page_end = MAX_NORMAL_EXPORT_SIZE * (self.pages[table] + 1)
+            if self.rows_written[table] >= page_end:
+                self.pages[table] += 1
+                self.writer.add_table(
+                    self._paged_table_index(table),
+                    self._get_paginated_headers()[self._paged_table_index(table)][0],
+                    table_title=self._get_paginated_table_titles()[self._paged_table_index(table)],
+                )
+                continue
 
-        self.writer.write([(self._paged_table_index(table), [FormattedRow(data=row.data)])])
-        self.rows_written[table] += 1
+            page_rows = rows[:page_end - self.rows_written[table]]
+            rows = rows[len(page_rows):]
+            self.writer.write([
+                (self._paged_table_index(table), [FormattedRow(data=row.data) for row in page_rows])
+            ])
+            self.rows_written[table] += len(page_rows)
 
 
 def get_export_writer(export_instances, temp_path, allow_pagination=True):
@@ -365,23 +415,30 @@ def write_export_instance(writer, export_instance, documents,
         total_rows = 0
         track_load = load_counter(export_instance.type, "export", export_instance.domain)
 
+        # work out everything that doesn't depend on the document once per table
+        table_plans = []
+        for table in export_instance.selected_tables:
+            # This is for bulk exports on all case types.
+            # Only docs of the types in the path go into the table.
+            case_types = None
+            if ALL_CASE_TYPE_TABLE in table.path:
+                case_types = {path.name for path in table.path}
+            row_plan = table.get_row_plan(
+                split_columns=export_instance.split_multiselects,
+                transform_dates=export_instance.transform_dates,
+                include_hyperlinks=include_hyperlinks,
+            )
+            table_plans.append((table, case_types, row_plan))
+
         for row_number, doc in enumerate(documents):
             total_bytes += sys.getsizeof(doc)
-            for table in export_instance.selected_tables:
-                # This is for bulk exports on all case types.
+            for table, case_types, row_plan in table_plans:
                 # Skip over the tables that this doc shouldn't go into.
-                path_names = [path.name for path in table.path]
-                if ALL_CASE_TYPE_TABLE in table.path and doc['type'] not in path_names:
+                if case_types is not None and doc['type'] not in case_types:
                     continue
 
                 try:
-                    rows = table.get_rows(
-                        doc,
-                        row_number,
-                        split_columns=export_instance.split_multiselects,
-                        transform_dates=export_instance.transform_dates,
-                        include_hyperlinks=include_hyperlinks,
-                    )
+                    rows = row_plan.get_rows(doc, row_number)
                 except Exception as e:
                     notify_exception(None, "Error exporting doc", details={
                         'domain': export_instance.domain,
@@ -392,11 +449,7 @@ def write_export_instance(writer, export_instance, documents,
                     e.sentry_capture = False
                     raise
 
-                for row in rows:
-                    # It might be bad to write one row at a time from a performance perspective.
-                    # Regardless, we should handle the batching of rows in the _Writer class, not here.
-                    writer.write(table, row)
-
+                writer.write_rows(table, rows)
                 total_rows += len(rows)
 
             track_load()
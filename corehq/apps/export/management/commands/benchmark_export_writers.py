@@ -0,0 +1,44 @@
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from couchexport.export import FormattedRow, get_writer
+from couchexport.models import Format
+
+from corehq.apps.export.export import EXPORT_WRITE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Time writing a large export one row at a time and in blocks of rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--columns', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=EXPORT_WRITE_BATCH_SIZE)
+        parser.add_argument('--format', dest='formats', action='append',
+                            choices=[Format.CSV, Format.XLS_2007],
+                            help='Defaults to both csv and xlsx')
+
+    def handle(self, rows, columns, batch_size, formats, **options):
+        headers = ['column_{}'.format(i) for i in range(columns)]
+        data = [
+            ['row {} value {}'.format(row, column) if column % 2 else row * column
+             for column in range(columns)]
+            for row in range(rows)
+        ]
+        for format in formats or [Format.CSV, Format.XLS_2007]:
+            for label, batch in [('one row at a time', 1), ('batches of {}'.format(batch_size), batch_size)]:
+                seconds = _time_export(format, headers, data, batch)
+                print("{} {}: {:,.0f} rows/sec".format(format, label, rows / seconds))
+
+
+def _time_export(format, headers, data, batch_size):
+    writer = get_writer(format)
+    with tempfile.TemporaryFile() as file:
+        start = time.perf_counter()
+        writer.open([('table', [headers])], file, table_titles={'table': 'Table'})
+        for i in range(0, len(data), batch_size):
+            writer.write([('table', [FormattedRow(row) for row in data[i:i + batch_size]])])
+        writer.close()
+        return time.perf_counter() - start
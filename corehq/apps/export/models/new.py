@@ -105,7 +105,10 @@ from corehq.apps.reports.models import HQUserType
 from corehq.apps.userreports.app_manager.data_source_meta import (
     get_form_indicator_data_type,
 )
-from corehq.apps.userreports.expressions.getters import NestedDictGetter
+from corehq.apps.userreports.expressions.getters import (
+    NestedDictGetter,
+    safe_recursive_lookup,
+)
 from corehq.blobs import CODES, get_blob_db
 from corehq.blobs.exceptions import NotFound
 from corehq.blobs.mixin import BlobMixin
@@ -295,50 +298,70 @@ class ExportColumn(DocumentSchema):
         Transform the given value with the transform specified in self.item.transform.
         Also transform dates if the transform_dates flag is true.
         """
+        return self._get_transform_function(transform_dates)(value, doc)
 
-        # When XML elements have additional attributes in them, the text node is
-        # put inside of the #text key. For example:
-        #
-        # <element id="123">value</element>  -> {'#text': 'value', 'id':'123'}
-        #
-        # Whereas elements without additional attributes just take on the string value:
-        #
-        # <element>value</element>  -> 'value'
-        #
-        # This line ensures that we grab the actual value instead of the dictionary
-        if isinstance(value, dict):
-            if '#text' in value:
-                value = value.get('#text')
-            else:
-                return EMPTY_VALUE
+    def _get_transform_function(self, transform_dates):
+        """
+        Returns a function ``(value, doc) -> value`` that does the same as ``_transform``,
+        with the transform functions looked up once up front.
+        """
+        item_transform = TRANSFORM_FUNCTIONS[self.item.transform] if self.item.transform else None
+        deid_transform = DEID_TRANSFORM_FUNCTIONS[self.deid_transform] if self.deid_transform else None
+
+        def transform(value, doc):
+            # When XML elements have additional attributes in them, the text node is
+            # put inside of the #text key. For example:
+            #
+            # <element id="123">value</element>  -> {'#text': 'value', 'id':'123'}
+            #
+            # Whereas elements without additional attributes just take on the string value:
+            #
+            # <element>value</element>  -> 'value'
+            #
+            # This line ensures that we grab the actual value instead of the dictionary
+            if isinstance(value, dict):
+                if '#text' in value:
+                    value = value.get('#text')
+                else:
+                    return EMPTY_VALUE
 
-        if transform_dates:
-            value = couch_to_excel_datetime(value, doc)
-        if self.item.transform:
-            value = TRANSFORM_FUNCTIONS[self.item.transform](value, doc)
-        if self.deid_transform:
-            try:
-                value = DEID_TRANSFORM_FUNCTIONS[self.deid_transform](value, doc)
-            except ValueError:
-                # Unable to convert the string to a date
-                pass
-        if value is None:
-            value = MISSING_VALUE
+            if transform_dates:
+                value = couch_to_excel_datetime(value, doc)
+            if item_transform:
+                value = item_transform(value, doc)
+            if deid_transform:
+                try:
+                    value = deid_transform(value, doc)
+                except ValueError:
+                    # Unable to convert the string to a date
+                    pass
+            if value is None:
+                value = MISSING_VALUE
+
+            if isinstance(value, list):
+                value = ' '.join(_serialize_list_item(elem) for elem in value)
+            return value
 
-        if isinstance(value, list):
-            def _serialize(str_or_dict):
-                """
-                Serialize old data for scalar questions that were previously a repeat
-
-                This is a total edge case. See https://manage.dimagi.com/default.asp?280549.
-                """
-                if isinstance(str_or_dict, dict):
-                    return ','.join('{}={}'.format(k, v) for k, v in str_or_dict.items())
-                else:
-                    return str_or_dict
+        return transform
 
-            value = ' '.join(_serialize(elem) for elem in value)
-        return value
+    def get_value_function(self, base_path, transform_dates=False):
+        """
+        Returns a function ``(doc) -> value`` equivalent to calling ``get_value`` with
+        the given ``base_path`` and ``transform_dates``, or None if that isn't possible
+        (e.g. this column overrides ``get_value``).
+        """
+        if type(self).get_value is not ExportColumn.get_value:
+            return None
+        if base_path != self.item.path[:len(base_path)]:
+            # let get_value raise the error if it's ever called
+            return None
+        path = [x.name for x in self.item.path[len(base_path):]]
+        transform = self._get_transform_function(transform_dates)
+
+        def get_value(doc):
+            return transform(safe_recursive_lookup(doc, path), doc)
+
+        return get_value
 
     @staticmethod
     def create_default_from_export_item(
@@ -462,6 +485,18 @@ class ExportColumn(DocumentSchema):
             return super(ExportColumn, cls).wrap(data)
 
 
+def _serialize_list_item(str_or_dict):
+    """
+    Serialize old data for scalar questions that were previously a repeat
+
+    This is a total edge case. See https://manage.dimagi.com/default.asp?280549.
+    """
+    if isinstance(str_or_dict, dict):
+        return ','.join('{}={}'.format(k, v) for k, v in str_or_dict.items())
+    else:
+        return str_or_dict
+
+
 class DocRow(namedtuple("DocRow", ["doc", "row"])):
     """
     DocRow represents a document and its row index.
@@ -516,74 +551,21 @@ class TableConfiguration(DocumentSchema, ReadablePathMixin):
                                    which column indices to hyperlink
         :return: List of ExportRows
         """
-        document_id = document.get('_id')
-
-        sub_documents = self._get_sub_documents(document, row_number, document_id=document_id)
-
-        domain = document.get('domain')
-
-        assert domain is not None, 'Form or Case must be associated with domain'
-        assert document_id is not None, 'Form or Case must have an id'
-
-        rows = []
-        for doc_row in sub_documents:
-            doc, row_index = doc_row.doc, doc_row.row
-
-            row_data = {} if as_json else []
-            col_index = 0
-            skip_excel_formatting = []
-            for col in self.selected_columns:
-                # When doing a bulk case export, each column will have a reference to the ALL_CASE_TYPE_EXPORT
-                # case type in its path. This needs to be temporarily removed when getting the value.
-                base_path = self.path
-                if ALL_CASE_TYPE_TABLE in base_path:
-                    base_path = []
-
-                val = col.get_value(
-                    domain,
-                    document_id,
-                    doc,
-                    base_path,
-                    row_index=row_index,
-                    split_column=split_columns,
-                    transform_dates=transform_dates,
-                )
-                if as_json:
-                    for index, header in enumerate(col.get_headers(split_column=split_columns)):
-                        if isinstance(val, list):
-                            row_data[header] = "{}".format(val[index])
-                        else:
-                            row_data[header] = "{}".format(val)
-                elif isinstance(val, list):
-                    row_data.extend(val)
-
-                    # we never want to auto-format RowNumberColumn
-                    # (always treat as text)
-                    next_col_index = col_index + len(val)
-                    if isinstance(col, RowNumberColumn):
-                        skip_excel_formatting.extend(
-                            list(range(col_index, next_col_index))
-                        )
-                    col_index = next_col_index
-                else:
-                    row_data.append(val)
+        row_plan = self.get_row_plan(
+            split_columns=split_columns,
+            transform_dates=transform_dates,
+            as_json=as_json,
+            include_hyperlinks=include_hyperlinks,
+        )
+        return row_plan.get_rows(document, row_number)
 
-                    # we never want to auto-format RowNumberColumn
-                    # (always treat as text)
-                    if isinstance(col, RowNumberColumn):
-                        skip_excel_formatting.append(col_index)
-                    col_index += 1
-            if as_json:
-                rows.append(row_data)
-            else:
-                hyperlink_indices = self.get_hyperlink_column_indices(
-                    split_columns) if include_hyperlinks else []
-                rows.append(ExportRow(
-                    data=row_data,
-                    hyperlink_column_indices=hyperlink_indices,
-                    skip_excel_formatting=skip_excel_formatting
-                ))
-        return rows
+    def get_row_plan(self, split_columns=False, transform_dates=False, as_json=False, include_hyperlinks=True):
+        """
+        Return a TableRowPlan for getting the rows of many documents with the same options.
+        Everything that doesn't depend on the document is worked out once, when the plan
+        is created, so the plan should not be reused after the table's columns change.
+        """
+        return TableRowPlan(self, split_columns, transform_dates, as_json, include_hyperlinks)
 
     @staticmethod
     def _create_index(_path, _transform):
@@ -702,6 +684,102 @@ class TableConfiguration(DocumentSchema, ReadablePathMixin):
         return TableConfiguration._get_sub_documents_helper(document_id, path[1:], new_docs)
 
 
+class TableRowPlan(object):
+    """
+    Gets the rows of a TableConfiguration for a document. See TableConfiguration.get_row_plan
+    """
+
+    def __init__(self, table, split_columns, transform_dates, as_json, include_hyperlinks):
+        self.table = table
+        self.split_columns = split_columns
+        self.transform_dates = transform_dates
+        self.as_json = as_json
+
+        # When doing a bulk case export, each column will have a reference to the ALL_CASE_TYPE_EXPORT
+        # case type in its path. This needs to be temporarily removed when getting the value.
+        base_path = [] if ALL_CASE_TYPE_TABLE in table.path else table.path
+        self.columns = [
+            _PlannedColumn(
+                column=column,
+                get_value=column.get_value_function(base_path, transform_dates),
+                base_path=base_path,
+                # we never want to auto-format RowNumberColumn
+                # (always treat as text)
+                skip_excel_formatting=isinstance(column, RowNumberColumn),
+                headers=column.get_headers(split_column=split_columns) if as_json else None,
+            )
+            for column in table.selected_columns
+        ]
+        if as_json or not include_hyperlinks:
+            self.hyperlink_column_indices = []
+        else:
+            self.hyperlink_column_indices = table.get_hyperlink_column_indices(split_columns)
+
+    def get_rows(self, document, row_number):
+        document_id = document.get('_id')
+
+        sub_documents = self.table._get_sub_documents(document, row_number, document_id=document_id)
+
+        domain = document.get('domain')
+
+        assert domain is not None, 'Form or Case must be associated with domain'
+        assert document_id is not None, 'Form or Case must have an id'
+
+        rows = []
+        for doc_row in sub_documents:
+            doc, row_index = doc_row.doc, doc_row.row
+
+            row_data = {} if self.as_json else []
+            col_index = 0
+            skip_excel_formatting = []
+            for planned in self.columns:
+                if planned.get_value is not None:
+                    val = planned.get_value(doc)
+                else:
+                    val = planned.column.get_value(
+                        domain,
+                        document_id,
+                        doc,
+                        planned.base_path,
+                        row_index=row_index,
+                        split_column=self.split_columns,
+                        transform_dates=self.transform_dates,
+                    )
+                if self.as_json:
+                    for index, header in enumerate(planned.headers):
+                        if isinstance(val, list):
+                            row_data[header] = "{}".format(val[index])
+                        else:
+                            row_data[header] = "{}".format(val)
+                elif isinstance(val, list):
+                    row_data.extend(val)
+
+                    next_col_index = col_index + len(val)
+                    if planned.skip_excel_formatting:
+                        skip_excel_formatting.extend(
+                            list(range(col_index, next_col_index))
+                        )
+                    col_index = next_col_index
+                else:
+                    row_data.append(val)
+
+                    if planned.skip_excel_formatting:
+                        skip_excel_formatting.append(col_index)
+                    col_index += 1
+            if self.as_json:
+                rows.append(row_data)
+            else:
+                rows.append(ExportRow(
+                    data=row_data,
+                    hyperlink_column_indices=self.hyperlink_column_indices,
+                    skip_excel_formatting=skip_excel_formatting
+                ))
+        return rows
+
+
+_PlannedColumn = namedtuple('_PlannedColumn', 'column get_value base_path skip_excel_formatting headers')
+
+
 class DatePeriod(DocumentSchema):
     period_type = StringProperty(required=True)
     days = IntegerProperty()
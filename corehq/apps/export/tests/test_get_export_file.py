@@ -174,6 +174,45 @@ class WriterTest(SimpleTestCase):
         })
         self.assertTrue(export_save.called)
 
+    @patch('corehq.apps.export.models.FormExportInstance.save')
+    @patch('corehq.apps.export.export.MAX_NORMAL_EXPORT_SIZE', 2)
+    @patch('corehq.apps.export.export.EXPORT_WRITE_BATCH_SIZE', 3)
+    @flag_enabled('PAGINATED_EXPORTS')
+    def test_paginated_table_batches_span_pages(self, export_save):
+        export_instance = FormExportInstance(
+            export_format=Format.JSON,
+            tables=[
+                TableConfiguration(
+                    label="My table",
+                    selected=True,
+                    columns=[
+                        ExportColumn(
+                            label="Q3",
+                            item=ScalarItem(
+                                path=[PathNode(name='form'), PathNode(name='q3')],
+                            ),
+                            selected=True
+                        ),
+                    ]
+                )
+            ]
+        )
+
+        assert_instance_gives_results(self.docs * 3, export_instance, {
+            'My table_000': {
+                'headers': ['Q3'],
+                'rows': [['baz'], ['bop']],
+            },
+            'My table_001': {
+                'headers': ['Q3'],
+                'rows': [['baz'], ['bop']],
+            },
+            'My table_002': {
+                'headers': ['Q3'],
+                'rows': [['baz'], ['bop']],
+            }
+        })
+
     @patch('corehq.apps.export.models.FormExportInstance.save')
     def test_split_questions(self, export_save):
         """Ensure columns are split when `split_multiselects` is set to True"""
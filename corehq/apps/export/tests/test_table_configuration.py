@@ -6,9 +6,12 @@ from corehq.apps.export.models import (
     ExportColumn,
     ExportItem,
     ExportRow,
+    MultipleChoiceItem,
+    Option,
     PathNode,
     RowNumberColumn,
     ScalarItem,
+    SplitExportColumn,
     TableConfiguration,
 )
 
@@ -355,3 +358,85 @@ class TableConfigurationGetRowsTest(SimpleTestCase):
         self.assertEqual(
             [row.data for row in table_configuration.get_rows(submission, 0)], []
         )
+
+
+class TableRowPlanTest(SimpleTestCase):
+
+    def setUp(self):
+        self.table_configuration = TableConfiguration(
+            path=[PathNode(name="form"), PathNode(name="repeat1", is_repeat=True)],
+            columns=[
+                RowNumberColumn(label='number', selected=True),
+                ExportColumn(
+                    label='q1',
+                    item=ScalarItem(
+                        path=[
+                            PathNode(name="form"),
+                            PathNode(name="repeat1", is_repeat=True),
+                            PathNode(name="q1"),
+                        ],
+                    ),
+                    selected=True,
+                ),
+                SplitExportColumn(
+                    label='choice',
+                    item=MultipleChoiceItem(
+                        path=[PathNode(name="form"), PathNode(name="repeat1", is_repeat=True), PathNode(name="c")],
+                        options=[Option(value='a'), Option(value='b')],
+                    ),
+                    selected=True,
+                ),
+            ]
+        )
+        self.documents = [
+            {
+                'domain': 'my-domain',
+                '_id': '1234',
+                'form': {
+                    'repeat1': [
+                        {'q1': 'foo', 'c': 'a c'},
+                        {'q1': {'#text': 'bar', '@id': '1'}, 'c': 'b'},
+                        {'q1': {'@id': '2'}},
+                    ]
+                }
+            },
+            {
+                'domain': 'my-domain',
+                '_id': '5678',
+                'form': {'repeat1': {'q1': ['x', {'y': 'z'}]}},
+            },
+        ]
+
+    def test_get_rows(self):
+        row_plan = self.table_configuration.get_row_plan(split_columns=True)
+        rows = [row_plan.get_rows(doc, row_number) for row_number, doc in enumerate(self.documents)]
+        self.assertEqual(
+            [[(row.data, row.skip_excel_formatting) for row in doc_rows] for doc_rows in rows],
+            [
+                [
+                    (['0.0', 0, 0, 'foo', 1, '', 'c'], [0, 1, 2]),
+                    (['0.1', 0, 1, 'bar', '', 1, ''], [0, 1, 2]),
+                    (['0.2', 0, 2, '', '---', '---', '---'], [0, 1, 2]),
+                ],
+                [
+                    (['1.0', 1, 0, 'x y=z', '---', '---', '---'], [0, 1, 2]),
+                ],
+            ]
+        )
+
+    def test_as_json(self):
+        row_plan = self.table_configuration.get_row_plan(as_json=True)
+        self.assertEqual(
+            row_plan.get_rows(self.documents[1], 0),
+            [{'number': '0.0', 'q1': 'x y=z', 'choice': '---'}],
+        )
+
+    def test_value_function_matches_get_value(self):
+        column = self.table_configuration.columns[1]
+        base_path = self.table_configuration.path
+        get_value = column.get_value_function(base_path)
+        for doc in [{'q1': 'foo'}, {'q1': {'#text': 'bar'}}, {'q1': {}}, {}, {'q1': ['a', 'b']}, 'not a dict']:
+            self.assertEqual(get_value(doc), column.get_value('my-domain', '1234', doc, base_path))
+
+    def test_no_value_function_for_custom_columns(self):
+        self.assertIsNone(self.table_configuration.columns[0].get_value_function([]))
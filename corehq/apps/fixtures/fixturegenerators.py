@@ -3,6 +3,8 @@ from functools import partial
 from operator import attrgetter
 from xml.etree import cElementTree as ElementTree
 
+from django.core.cache import cache
+
 from casexml.apps.phone.fixtures import FixtureProvider
 from casexml.apps.phone.utils import (
     GLOBAL_USER_ID,
@@ -12,13 +14,23 @@ from corehq.apps.fixtures.exceptions import FixtureTypeCheckError
 from corehq.apps.fixtures.models import FIXTURE_BUCKET, LookupTable, LookupTableRow
 from corehq.apps.products.fixtures import product_fixture_generator_json
 from corehq.apps.programs.fixtures import program_fixture_generator_json
+from corehq.toggles import CACHE_LOOKUP_TABLE_OWNER_ROWS
 from corehq.util.metrics import metrics_histogram
 from corehq.util.xml_utils import serialize
-from .utils import clean_fixture_field_name, get_index_schema_node
+from .utils import (
+    FIXTURE_CACHE_TIMEOUT,
+    clean_fixture_field_name,
+    get_fixture_cache_version,
+    get_index_schema_node,
+)
 
 LOOKUP_TABLE_FIXTURE = 'lookup_table_fixture'
 REPORT_FIXTURE = 'report_fixture'
 
+# Replaced with the XML of a fixture's items. Like GLOBAL_USER_ID, this
+# UUID was generated once and must not appear in lookup table data.
+ITEMS_PLACEHOLDER = 'fixture-items-3F0D1C52-5B7A-4E0B-9C41-8A2E6B1D7F93'
+
 
 def item_lists_by_domain(domain, namespace_ids=False):
     ret = list()
@@ -152,6 +164,9 @@ class ItemListsProvider(FixtureProvider):
         return self._get_fixtures(global_types, get_items_by_type, GLOBAL_USER_ID)
 
     def get_user_items_and_count(self, user_types, restore_user):
+        if CACHE_LOOKUP_TABLE_OWNER_ROWS.enabled(restore_user.domain):
+            return self._get_cached_user_items_and_count(user_types, restore_user)
+
         user_items_count = 0
         items_by_type = defaultdict(list)
         for item in restore_user.get_fixture_data_items():
@@ -165,6 +180,70 @@ class ItemListsProvider(FixtureProvider):
 
         return self._get_fixtures(user_types, get_items_by_type, restore_user.user_id), user_items_count
 
+    def _get_cached_user_items_and_count(self, user_types, restore_user):
+        """Like ``get_user_items_and_count``, but builds each fixture from the
+        cached XML of the rows owned by each of the user's owners (see
+        ``_iter_owner_rows``). Fixtures are returned as bytes."""
+        rows_by_table_id = defaultdict(dict)
+        for owner_rows in self._iter_owner_rows(restore_user.domain, restore_user.get_fixture_data_owners()):
+            for table_id, sort_key, row_id, xml in owner_rows:
+                if table_id in user_types:
+                    # a row can be owned by more than one of the user's owners
+                    rows_by_table_id[table_id][row_id] = (sort_key, row_id, xml)
+
+        fixtures = []
+        user_items_count = 0
+        for data_type in sorted(user_types.values(), key=attrgetter('tag')):
+            if data_type.is_indexed:
+                fixtures.append(self._get_schema_element(data_type))
+            # same order as LookupTableRow.objects.iter_by_user
+            rows = sorted(rows_by_table_id[data_type.id].values())
+            user_items_count += len(rows)
+            fixtures.append(self._get_fixture_bytes(data_type, restore_user.user_id, [xml for _, _, xml in rows]))
+        return fixtures, user_items_count
+
+    def _iter_owner_rows(self, domain, owners):
+        """Yields ``[(table_id, sort_key, row_id, xml_bytes), ...]`` for the
+        rows of user tables owned by each ``(owner_type, owner_id)``
+
+        Rows are cached per owner until the domain's lookup tables change
+        (see ``clear_fixture_cache``), so users sharing a group or location
+        don't serialize the same rows again.
+        """
+        version = get_fixture_cache_version(domain)
+        keys = {
+            owner: 'fixture-owner-rows/{}/{}/{}/{}'.format(domain, version, *owner)
+            for owner in owners
+        }
+        cached_rows = cache.get_many(list(keys.values()))
+        data_types = None
+        for owner, key in keys.items():
+            rows = cached_rows.get(key)
+            if rows is None:
+                if data_types is None:
+                    data_types = {
+                        data_type.id: data_type
+                        for data_type in LookupTable.objects.by_domain(domain)
+                        if not data_type.is_global
+                    }
+                rows = [
+                    (row.table_id, row.sort_key, row.id,
+                     ElementTree.tostring(self.to_xml(row, data_types[row.table_id]), encoding='utf-8'))
+                    for row in LookupTableRow.objects.iter_by_owner(domain, *owner)
+                    if row.table_id in data_types
+                ]
+                cache.set(key, rows, FIXTURE_CACHE_TIMEOUT)
+            yield rows
+
+    def _get_fixture_bytes(self, data_type, user_id, items_xml):
+        fixture_element = self._get_fixture_element(data_type, user_id, [])
+        if not items_xml:
+            return ElementTree.tostring(fixture_element, encoding='utf-8')
+        fixture_element[0].text = ITEMS_PLACEHOLDER
+        start, end = ElementTree.tostring(fixture_element, encoding='utf-8').split(
+            ITEMS_PLACEHOLDER.encode('utf-8'))
+        return b''.join([start] + items_xml + [end])
+
     def _get_fixtures(self, data_types, get_items_by_type, user_id):
         fixtures = []
         for data_type in sorted(data_types.values(), key=attrgetter('tag')):
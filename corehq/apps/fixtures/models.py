@@ -119,25 +119,47 @@ class LookupTableRowManager(models.Manager):
 
         Returned rows are sorted by table_id and sort_key.
         """
-        def make_conditions(owner_type, ids):
-            return [models.Q(owner_type=owner_type, owner_id=x) for x in ids]
-
-        group_ids = Group.by_user_id(user.user_id, wrap=False)
-        locaction_ids = user.sql_location.path if user.sql_location else []
         where = models.Q(
             id__in=models.Subquery(
                 LookupTableRowOwner.objects.filter(
-                    reduce(models.Q.__or__, chain(
-                        make_conditions(OwnerType.User, [user.user_id]),
-                        make_conditions(OwnerType.Group, group_ids),
-                        make_conditions(OwnerType.Location, locaction_ids),
-                    )),
+                    reduce(models.Q.__or__, [
+                        models.Q(owner_type=owner_type, owner_id=owner_id)
+                        for owner_type, owner_id in self.get_owners_for_user(user)
+                    ]),
                     domain=user.domain,
                 ).values("row_id")
             ),
         )
         return self._iter_sorted(user.domain, where, **kw)
 
+    def iter_by_owner(self, domain, owner_type, owner_id, **kw):
+        """Get rows owned by a single user, group or location
+
+        Returned rows are sorted by table_id and sort_key.
+        """
+        where = models.Q(
+            id__in=models.Subquery(
+                LookupTableRowOwner.objects.filter(
+                    domain=domain,
+                    owner_type=owner_type,
+                    owner_id=owner_id,
+                ).values("row_id")
+            ),
+        )
+        return self._iter_sorted(domain, where, **kw)
+
+    @staticmethod
+    def get_owners_for_user(user):
+        """Get ``(owner_type, owner_id)`` pairs for the user, their
+        location (and its ancestors) and their groups"""
+        group_ids = Group.by_user_id(user.user_id, wrap=False)
+        location_ids = user.sql_location.path if user.sql_location else []
+        return list(chain(
+            [(OwnerType.User, user.user_id)],
+            [(OwnerType.Group, group_id) for group_id in group_ids],
+            [(OwnerType.Location, location_id) for location_id in location_ids],
+        ))
+
     def _iter_sorted(self, domain, where, batch_size=1000):
         # Depends on ["domain", "table_id", "sort_key", "id"] index for
         # efficient pagination and sorting.
@@ -1,3 +1,4 @@
+from unittest.mock import patch
 from xml.etree import cElementTree as ElementTree
 
 from django.test import TestCase
@@ -16,8 +17,11 @@ from corehq.apps.fixtures.models import (
     OwnerType,
     TypeField,
 )
+from corehq.apps.fixtures.utils import clear_fixture_cache
+from corehq.apps.groups.models import Group
 from corehq.apps.users.models import CommCareUser
 from corehq.blobs import get_blob_db
+from corehq.util.test_utils import flag_enabled
 
 
 def call_fixture_generator(user):
@@ -251,6 +255,60 @@ class FixtureDataTest(TestCase):
         fixtures = call_fixture_generator(sammy)
         self.assertEqual({item.attrib['user_id'] for item in fixtures}, {sammy.user_id})
 
+    @flag_enabled('CACHE_LOOKUP_TABLE_OWNER_ROWS')
+    def test_cached_owner_rows(self):
+        self.addCleanup(clear_fixture_cache, self.domain)
+        restore_user = self.user.to_ota_restore_user(self.domain)
+        expected = ElementTree.tostring(call_fixture_generator(restore_user)[0], encoding='utf-8')
+
+        fixtures = call_fixture_generator_raw(fixturegenerators.item_lists, restore_user)
+        self.assertEqual([expected], fixtures)
+        # served from the cache
+        with patch.object(LookupTableRow.objects, 'iter_by_owner') as iter_by_owner:
+            fixtures = call_fixture_generator_raw(fixturegenerators.item_lists, restore_user)
+        iter_by_owner.assert_not_called()
+        self.assertEqual([expected], fixtures)
+
+    @flag_enabled('CACHE_LOOKUP_TABLE_OWNER_ROWS')
+    def test_cached_owner_rows_cleared(self):
+        self.addCleanup(clear_fixture_cache, self.domain)
+        restore_user = self.user.to_ota_restore_user(self.domain)
+        call_fixture_generator(restore_user)
+
+        self.data_item.fields["state_name"] = [Field(value="Goa_state")]
+        self.data_item.save()
+        clear_fixture_cache(self.domain)
+
+        fixture, = call_fixture_generator(restore_user)
+        self.assertEqual(fixture.find('district_list/district/state_name').text, "Goa_state")
+
+    @flag_enabled('CACHE_LOOKUP_TABLE_OWNER_ROWS')
+    def test_cached_owner_rows_shared_row(self):
+        self.addCleanup(clear_fixture_cache, self.domain)
+        group = Group(domain=self.domain, name="district group", users=[self.user.user_id])
+        group.save()
+        self.addCleanup(group.delete)
+        LookupTableRowOwner(
+            domain=self.domain,
+            owner_id=group.get_id,
+            owner_type=OwnerType.Group,
+            row_id=self.data_item.id,
+        ).save()
+        cookie = self.make_data_type("cookie", is_global=False)
+        cookie_item = self.make_data_item(cookie, "2.50")
+        LookupTableRowOwner(
+            domain=self.domain,
+            owner_id=group.get_id,
+            owner_type=OwnerType.Group,
+            row_id=cookie_item.id,
+        ).save()
+
+        fixtures = call_fixture_generator(self.user.to_ota_restore_user(self.domain))
+        self.assertEqual(
+            [(f.attrib['id'], len(f[0])) for f in fixtures],
+            [('item-list:cookie-index', 1), ('item-list:district', 1)],
+        )
+
     def make_data_type(self, name, is_global):
         data_type = LookupTable(
             domain=self.domain,
@@ -1,9 +1,13 @@
 import re
+from uuid import uuid4
 from xml.etree import cElementTree as ElementTree
 
+from django.core.cache import cache
+
 from corehq.blobs import get_blob_db
 
 BAD_SLUG_PATTERN = r"([/\\<>\s])"
+FIXTURE_CACHE_TIMEOUT = 24 * 60 * 60
 
 
 def clean_fixture_field_name(field_name):
@@ -57,3 +61,14 @@ def get_index_schema_node(fixture_id, attrs_to_index):
 def clear_fixture_cache(domain):
     from corehq.apps.fixtures.models import FIXTURE_BUCKET
     get_blob_db().delete(key=FIXTURE_BUCKET + '/' + domain)
+    cache.delete(_fixture_cache_version_key(domain))
+
+
+def get_fixture_cache_version(domain):
+    """Get a version string that changes whenever ``clear_fixture_cache``
+    is called for the domain, for keying cached lookup table data"""
+    return cache.get_or_set(_fixture_cache_version_key(domain), lambda: uuid4().hex, FIXTURE_CACHE_TIMEOUT)
+
+
+def _fixture_cache_version_key(domain):
+    return f'fixture-cache-version/{domain}'
@@ -172,7 +172,7 @@ def claim(request, domain):
     def phone_holds_all_cases(request):
         if get_synclog(request.last_sync_token):
             synclog = get_synclog(request.last_sync_token)
-            missing_case_ids_on_phone = set(case_ids) - synclog.case_ids_on_phone
+            missing_case_ids_on_phone = set(case_ids) - synclog.get_case_ids_on_phone()
             return not missing_case_ids_on_phone
 
     def cases_have_been_modified_since_last_synclog_date():
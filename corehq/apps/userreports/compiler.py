@@ -0,0 +1,373 @@
+"""
+Compiled evaluation of data source expressions, filters and indicators.
+
+A data source is normally evaluated by walking the tree of configured spec
+objects built by ``ExpressionFactory`` / ``FilterFactory`` / ``IndicatorFactory``,
+calling ``__call__`` on every node for every row. The functions in this module
+lower that tree into plain Python closures once per data source:
+
+- constants and spec properties (``datatype``, ``property_name``, etc.) are
+  read once at compile time instead of through jsonobject on every call
+- ``property_name`` / ``property_path`` lookups are inlined
+- named expressions are compiled once and shared by every indicator and filter
+  that references them. Named expressions made only of simple getters are
+  inlined and skip the ``EvaluationContext`` cache lookup entirely, since
+  re-evaluating them is cheaper than the cache round trip.
+
+Any node that the compiler does not know about is left as is, so a compiled
+tree always produces the same results as the original. The compiled mode
+is enabled per domain with the ``UCR_COMPILED_EXPRESSIONS`` toggle.
+"""
+from corehq.apps.userreports.expressions.getters import (
+    TransformedGetter,
+    transform_for_datatype,
+)
+from corehq.apps.userreports.expressions.specs import (
+    ConditionalExpressionSpec,
+    ConstantGetterSpec,
+    DictExpressionSpec,
+    IdentityExpressionSpec,
+    NamedExpressionSpec,
+    NestedExpressionSpec,
+    PropertyNameGetterSpec,
+    PropertyPathGetterSpec,
+    RootDocExpressionSpec,
+)
+from corehq.apps.userreports.filters import (
+    ANDFilter,
+    CustomFilter,
+    NamedFilter,
+    NOTFilter,
+    ORFilter,
+    SinglePropertyValueFilter,
+)
+from corehq.apps.userreports.indicators import (
+    BooleanIndicator,
+    ColumnValue,
+    CompoundIndicator,
+    RawIndicator,
+    SmallBooleanIndicator,
+)
+from corehq.apps.userreports.specs import EvaluationContext
+
+
+class CompiledDataSource(object):
+    """The compiled equivalent of a data source's ``get_items`` and ``indicators.get_values``"""
+
+    def __init__(self, config):
+        compiler = Compiler()
+        self._filter = compiler.compile_filter(config._get_main_filter())
+        self._base_item_expression = (
+            compiler.compile_expression(config.parsed_expression)
+            if config.base_item_expression else None
+        )
+        self.get_values = compiler.compile_indicator(config.indicators)
+
+    def get_items(self, document, eval_context=None):
+        if eval_context is None:
+            eval_context = EvaluationContext(document)
+
+        if not self._filter(document, eval_context):
+            return []
+        if self._base_item_expression is None:
+            return [document]
+        result = self._base_item_expression(document, eval_context)
+        if result is None:
+            return []
+        elif isinstance(result, list):
+            return result
+        else:
+            return [result]
+
+
+class Compiler(object):
+    """Compiles configured expression, filter and indicator objects into closures
+
+    Compiled closures are memoized by the identity of the object they were
+    compiled from, so an object that is shared between several parts of the
+    tree (e.g. a named expression or named filter) is only compiled once.
+    """
+
+    def __init__(self):
+        self._compiled = {}
+
+    def compile_expression(self, expression):
+        return self._compile(expression, _EXPRESSION_COMPILERS)
+
+    def compile_filter(self, filter_):
+        return self._compile(filter_, _FILTER_COMPILERS)
+
+    def compile_indicator(self, indicator):
+        """Returns a function with the same signature and return value as ``indicator.get_values``"""
+        getters = list(self._iter_column_getters(indicator))
+
+        def get_values(item, evaluation_context=None):
+            values = []
+            for column, getter in getters:
+                if column is None:
+                    values.extend(getter(item, evaluation_context))
+                else:
+                    values.append(ColumnValue(column, getter(item, evaluation_context)))
+            return values
+
+        return get_values
+
+    def _compile(self, obj, compilers):
+        key = id(obj)
+        if key not in self._compiled:
+            compiler = compilers.get(type(obj))
+            # keep a reference to obj so that its id can't be reused
+            self._compiled[key] = (obj, compiler(self, obj) if compiler else obj)
+        return self._compiled[key][1]
+
+    def _iter_column_getters(self, indicator):
+        """Yields ``(column, getter)`` pairs for each column of the indicator
+
+        ``column`` is None for indicators that can't be compiled, in which
+        case ``getter`` is the indicator's own ``get_values``.
+        """
+        indicator_type = type(indicator)
+        if indicator_type is CompoundIndicator:
+            for sub_indicator in indicator.indicators:
+                yield from self._iter_column_getters(sub_indicator)
+        elif indicator_type is RawIndicator:
+            yield indicator.column, self.compile_expression(indicator.getter)
+        elif indicator_type in (BooleanIndicator, SmallBooleanIndicator):
+            yield indicator.column, _boolean_getter(self.compile_filter(indicator.filter))
+        else:
+            yield None, indicator.get_values
+
+    def is_simple(self, expression):
+        """Whether the expression only reads from the item / constants and so
+        is cheaper to re-evaluate than to cache"""
+        expression_type = type(expression)
+        if expression_type in (ConstantGetterSpec, IdentityExpressionSpec, PropertyPathGetterSpec):
+            return True
+        if expression_type is PropertyNameGetterSpec:
+            return self.is_simple(expression._property_name_expression)
+        if expression_type is NestedExpressionSpec:
+            return (self.is_simple(expression._argument_expression)
+                    and self.is_simple(expression._value_expression))
+        if expression_type is RootDocExpressionSpec:
+            return self.is_simple(expression._expression_fn)
+        if expression_type is DictExpressionSpec:
+            return all(self.is_simple(exp) for exp in expression._compiled_properties.values())
+        return False
+
+
+def _boolean_getter(filter_fn):
+    def getter(item, evaluation_context=None):
+        return 1 if filter_fn(item, evaluation_context) else 0
+    return getter
+
+
+def _is_constant(expression):
+    return type(expression) is ConstantGetterSpec
+
+
+def _compile_constant(compiler, expression):
+    constant = expression.constant
+
+    def constant_getter(item, evaluation_context=None):
+        return constant
+    return constant_getter
+
+
+def _compile_identity(compiler, expression):
+    def identity(item, evaluation_context=None):
+        return item
+    return identity
+
+
+def _compile_property_name(compiler, expression):
+    transform = transform_for_datatype(expression.datatype)
+    name_expression = expression._property_name_expression
+    if _is_constant(name_expression):
+        property_name = name_expression.constant
+
+        def property_name_getter(item, evaluation_context=None):
+            if isinstance(item, dict):
+                return transform(item.get(property_name))
+            return transform(None)
+        return property_name_getter
+
+    name_getter = compiler.compile_expression(name_expression)
+
+    def dynamic_property_name_getter(item, evaluation_context=None):
+        raw_value = None
+        if isinstance(item, dict):
+            raw_value = item.get(name_getter(item, evaluation_context))
+        return transform(raw_value)
+    return dynamic_property_name_getter
+
+
+def _compile_property_path(compiler, expression):
+    transform = transform_for_datatype(expression.datatype)
+    property_path = list(expression.property_path)
+
+    def property_path_getter(item, evaluation_context=None):
+        # inlined equivalent of safe_recursive_lookup
+        if not isinstance(item, dict) or not property_path:
+            return transform(None)
+        try:
+            for key in property_path:
+                item = item[key]
+        except (KeyError, TypeError):
+            return transform(None)
+        return transform(item)
+    return property_path_getter
+
+
+def _compile_nested(compiler, expression):
+    argument_getter = compiler.compile_expression(expression._argument_expression)
+    value_getter = compiler.compile_expression(expression._value_expression)
+
+    def nested(item, evaluation_context=None):
+        return value_getter(argument_getter(item, evaluation_context), evaluation_context)
+    return nested
+
+
+def _compile_conditional(compiler, expression):
+    test = compiler.compile_filter(expression._test_function)
+    true_getter = compiler.compile_expression(expression._true_expression)
+    false_getter = compiler.compile_expression(expression._false_expression)
+
+    def conditional(item, evaluation_context=None):
+        if test(item, evaluation_context):
+            return true_getter(item, evaluation_context)
+        return false_getter(item, evaluation_context)
+    return conditional
+
+
+def _compile_dict(compiler, expression):
+    getters = [
+        (property_name, compiler.compile_expression(exp))
+        for property_name, exp in expression._compiled_properties.items()
+    ]
+
+    def dict_getter(item, evaluation_context=None):
+        return {
+            property_name: getter(item, evaluation_context)
+            for property_name, getter in getters
+        }
+    return dict_getter
+
+
+def _compile_root_doc(compiler, expression):
+    getter = compiler.compile_expression(expression._expression_fn)
+
+    def root_doc(item, evaluation_context=None):
+        if evaluation_context is None:
+            return None
+        return getter(evaluation_context.root_doc, evaluation_context)
+    return root_doc
+
+
+def _compile_named(compiler, expression):
+    named_expression = expression._factory_context.named_expressions[expression.name]
+    getter = compiler.compile_expression(named_expression)
+    if compiler.is_simple(named_expression):
+        return getter
+
+    cache_key = expression._context_cache_key
+
+    def cached_named(item, evaluation_context=None):
+        if evaluation_context is None:
+            return getter(item, evaluation_context)
+        key = cache_key(item)
+        if evaluation_context.exists_in_cache(key):
+            return evaluation_context.get_cache_value(key)
+        result = getter(item, evaluation_context)
+        evaluation_context.set_iteration_cache_value(key, result)
+        return result
+    return cached_named
+
+
+def _compile_transformed_getter(compiler, getter):
+    inner = compiler.compile_expression(getter.getter)
+    transform = getter.transform
+    if not transform:
+        return inner
+
+    def transformed(item, evaluation_context=None):
+        return transform(inner(item, evaluation_context))
+    return transformed
+
+
+_EXPRESSION_COMPILERS = {
+    ConditionalExpressionSpec: _compile_conditional,
+    ConstantGetterSpec: _compile_constant,
+    DictExpressionSpec: _compile_dict,
+    IdentityExpressionSpec: _compile_identity,
+    NamedExpressionSpec: _compile_named,
+    NestedExpressionSpec: _compile_nested,
+    PropertyNameGetterSpec: _compile_property_name,
+    PropertyPathGetterSpec: _compile_property_path,
+    RootDocExpressionSpec: _compile_root_doc,
+    TransformedGetter: _compile_transformed_getter,
+}
+
+
+def _compile_and(compiler, filter_):
+    filters = [compiler.compile_filter(f) for f in filter_.filters]
+
+    def and_filter(item, evaluation_context=None):
+        for f in filters:
+            if not f(item, evaluation_context):
+                return False
+        return True
+    return and_filter
+
+
+def _compile_or(compiler, filter_):
+    filters = [compiler.compile_filter(f) for f in filter_.filters]
+
+    def or_filter(item, evaluation_context=None):
+        for f in filters:
+            if f(item, evaluation_context):
+                return True
+        return False
+    return or_filter
+
+
+def _compile_not(compiler, filter_):
+    inner = compiler.compile_filter(filter_._filter)
+
+    def not_filter(item, evaluation_context=None):
+        return not inner(item, evaluation_context)
+    return not_filter
+
+
+def _compile_custom(compiler, filter_):
+    return filter_._filter
+
+
+def _compile_named_filter(compiler, filter_):
+    return compiler.compile_filter(filter_.filter)
+
+
+def _compile_single_property_value(compiler, filter_):
+    operator = filter_.operator
+    getter = compiler.compile_expression(filter_.expression)
+    if _is_constant(filter_.reference_expression):
+        reference_value = filter_.reference_expression.constant
+
+        def constant_value_filter(item, evaluation_context=None):
+            return operator(getter(item, evaluation_context), reference_value)
+        return constant_value_filter
+
+    reference_getter = compiler.compile_expression(filter_.reference_expression)
+
+    def value_filter(item, evaluation_context=None):
+        return operator(getter(item, evaluation_context), reference_getter(item, evaluation_context))
+    return value_filter
+
+
+_FILTER_COMPILERS = {
+    ANDFilter: _compile_and,
+    CustomFilter: _compile_custom,
+    NamedFilter: _compile_named_filter,
+    NOTFilter: _compile_not,
+    ORFilter: _compile_or,
+    SinglePropertyValueFilter: _compile_single_property_value,
+}
@@ -1 +1 @@
-from .main import eval_statements, EvalExecutionContext
+from .main import compile_statement, eval_statements, EvalExecutionContext
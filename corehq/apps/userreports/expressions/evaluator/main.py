@@ -65,12 +65,22 @@ class CommCareEval(EvalWithCompoundTypes):
         )
 
 
-def eval_statements(statement, variable_context, execution_context=None):
+def compile_statement(statement):
+    """Parses a statement so that it can be evaluated repeatedly without being re-parsed
+
+    The result is passed to ``eval_statements`` as ``parsed_statement``. Safety
+    checks (disallowed functions, method calls etc.) still happen at evaluation time.
+    """
+    return CommCareEval.parse(statement)
+
+
+def eval_statements(statement, variable_context, execution_context=None, parsed_statement=None):
     """Evaluates math statements and returns the value
 
     args
         statement: a simple python-like math statement
         variable_context: a dict with variable names as key and assigned values as dict values
+        parsed_statement: the result of ``compile_statement(statement)``, if available
     """
     execution_context = execution_context or EvalExecutionContext.empty()
     var_types = set(type(eval_lazy(value)) for value in variable_context.values())
@@ -79,7 +89,7 @@ def eval_statements(statement, variable_context, execution_context=None):
 
     evaluator = CommCareEval(operators=SAFE_OPERATORS, names=variable_context, functions=FUNCTIONS)
     evaluator.set_context(execution_context)
-    return evaluator.eval(statement)
+    return evaluator.eval(statement, previously_parsed=parsed_statement)
 
 
 @dataclasses.dataclass(frozen=True)
@@ -36,7 +36,7 @@ from corehq.form_processor.interfaces.processor import FormProcessorInterface
 from corehq.form_processor.models import CommCareCase, XFormInstance
 from corehq.util.couch import get_db_by_doc_type
 
-from .evaluator import eval_statements, EvalExecutionContext
+from .evaluator import compile_statement, eval_statements, EvalExecutionContext
 
 
 class IdentityExpressionSpec(JsonObject):
@@ -597,17 +597,18 @@ class RelatedDocExpressionSpec(JsonObject):
         if doc_id:
             return self.get_value(doc_id, evaluation_context)
 
+    def get_doc_id(self, item, evaluation_context=None):
+        return self._doc_id_expression(item, evaluation_context)
+
     @staticmethod
     @ucr_context_cache(vary_on=('related_doc_type', 'doc_id',))
     def _get_document(related_doc_type, doc_id, evaluation_context):
-        document_store = get_document_store_for_doc_type(
-            evaluation_context.root_doc['domain'], related_doc_type,
-            load_source="related_doc_expression")
-        try:
-            doc = document_store.get_document(doc_id)
-        except DocumentNotFoundError:
-            return None
-        if evaluation_context.root_doc['domain'] != doc.get('domain'):
+        domain = evaluation_context.root_doc['domain']
+        if evaluation_context.related_doc_cache is not None:
+            doc = evaluation_context.related_doc_cache.get_document(domain, related_doc_type, doc_id)
+        else:
+            doc = _get_related_document(domain, related_doc_type, doc_id)
+        if doc is None or domain != doc.get('domain'):
             return None
         return doc
 
@@ -615,7 +616,9 @@ class RelatedDocExpressionSpec(JsonObject):
         assert evaluation_context.root_doc['domain']
         doc = self._get_document(self.related_doc_type, doc_id, evaluation_context)
         # explicitly use a new evaluation context since this is a new document
-        return self._value_expression(doc, EvaluationContext(doc, 0))
+        return self._value_expression(doc, EvaluationContext(
+            doc, 0, related_doc_cache=evaluation_context.related_doc_cache
+        ))
 
     def __str__(self):
         return "{}[{}]/{}".format(self.related_doc_type,
@@ -623,6 +626,55 @@ class RelatedDocExpressionSpec(JsonObject):
                                   str(self._value_expression))
 
 
+def _get_related_document(domain, doc_type, doc_id):
+    document_store = get_document_store_for_doc_type(domain, doc_type, load_source="related_doc_expression")
+    try:
+        return document_store.get_document(doc_id)
+    except DocumentNotFoundError:
+        return None
+
+
+class RelatedDocumentCache(object):
+    """
+    Documents looked up by ``related_doc`` expressions, shared between all the
+    documents of a batch so that the same related document is only fetched once
+    and so that the related documents of a batch can be fetched in bulk with
+    ``prefetch``.
+
+    Documents are cached without regard to their domain: callers must still
+    check that a document belongs to the domain it is being looked up for.
+    """
+
+    def __init__(self):
+        self._docs = {}
+
+    def prefetch(self, domain, doc_type, doc_ids):
+        doc_ids = [
+            doc_id for doc_id in set(doc_ids)
+            if isinstance(doc_id, str) and (doc_type, doc_id) not in self._docs
+        ]
+        if not doc_ids:
+            return
+        document_store = get_document_store_for_doc_type(
+            domain, doc_type, load_source="related_doc_expression")
+        for doc in document_store.iter_documents(doc_ids):
+            self._docs[(doc_type, doc['_id'])] = doc
+        # documents that weren't returned are not cached as missing so that
+        # they are looked up individually (and can raise as usual) if needed
+
+    def get_document(self, domain, doc_type, doc_id):
+        key = (doc_type, doc_id)
+        try:
+            return self._docs[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable doc_id
+            return _get_related_document(domain, doc_type, doc_id)
+        doc = self._docs[key] = _get_related_document(domain, doc_type, doc_id)
+        return doc
+
+
 class NestedExpressionSpec(JsonObject):
     """
     These can be used to nest expressions. This can be used, e.g. to pull a
@@ -805,13 +857,20 @@ class EvalExpressionSpec(JsonObject):
             slug: factory_context.expression_from_spec(expression)
             for slug, expression in self.context_variables.items()
         }
+        try:
+            self._parsed_statement = compile_statement(self.statement)
+        except (InvalidExpression, SyntaxError):
+            # statements that can't be parsed always evaluate to None
+            self._parsed_statement = None
 
     def __call__(self, item, evaluation_context=None):
+        if self._parsed_statement is None:
+            return None
         var_dict = self.get_variables(item, evaluation_context)
         try:
             untransformed_value = eval_statements(self.statement, var_dict, EvalExecutionContext(
                 evaluation_context, self._factory_context
-            ))
+            ), parsed_statement=self._parsed_statement)
             return transform_for_datatype(self.datatype)(untransformed_value)
         except (InvalidExpression, SyntaxError, TypeError, ZeroDivisionError):
             return None
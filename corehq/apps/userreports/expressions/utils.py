@@ -1,3 +1,5 @@
+import functools
+
 SUM = 'sum'
 COUNT = 'count'
 MIN = 'min'
@@ -71,3 +73,31 @@ def _last_item(items):
 
 def _join(items):
     return ''.join(str(i) if i is not None else '' for i in items)
+
+
+def iter_configured_objects(root):
+    """
+    Walks a configured UCR expression / filter / indicator tree and yields
+    every object in it, including ``root``.
+
+    Only objects defined in ``corehq.apps.userreports`` (and the lists, dicts
+    and partials that hold them) are descended into.
+    """
+    seen = set()
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        yield obj
+
+        if isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, functools.partial):
+            stack.append(obj.func)
+            stack.extend(obj.args)
+        elif type(obj).__module__.startswith('corehq.apps.userreports') and hasattr(obj, '__dict__'):
+            stack.extend(vars(obj).values())
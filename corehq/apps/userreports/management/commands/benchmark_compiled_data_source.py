@@ -0,0 +1,44 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from corehq.apps.change_feed.data_sources import (
+    get_document_store_for_doc_type,
+)
+from corehq.apps.userreports.models import get_datasource_config
+from corehq.apps.userreports.specs import EvaluationContext
+
+
+class Command(BaseCommand):
+    help = "Compare a data source's throughput with and without compiled expressions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('domain')
+        parser.add_argument('data_source_id')
+        parser.add_argument('doc_ids', nargs='+')
+        parser.add_argument('--iterations', type=int, default=1000,
+                            help='Number of times to process each document')
+
+    def handle(self, domain, data_source_id, doc_ids, iterations, **options):
+        config, _ = get_datasource_config(data_source_id, domain)
+        doc_store = get_document_store_for_doc_type(
+            domain, config.referenced_doc_type, load_source="benchmark_compiled_data_source")
+        docs = list(doc_store.iter_documents(doc_ids))
+        if not docs:
+            print("No documents found")
+            return
+
+        engines = [
+            ('original', config.get_items, config.indicators.get_values),
+            ('compiled', config.compiled.get_items, config.compiled.get_values),
+        ]
+        for label, get_items, get_values in engines:
+            def _process_docs():
+                for doc in docs:
+                    eval_context = EvaluationContext(doc)
+                    for item in get_items(doc, eval_context):
+                        get_values(item, eval_context)
+                        eval_context.increment_iteration()
+
+            seconds = timeit.timeit(_process_docs, number=iterations)
+            print("{}: {:,.0f} docs/sec".format(label, len(docs) * iterations / seconds))
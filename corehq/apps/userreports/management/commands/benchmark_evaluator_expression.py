@@ -0,0 +1,35 @@
+import json
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from corehq.apps.userreports.expressions.evaluator import (
+    compile_statement,
+    eval_statements,
+)
+
+
+class Command(BaseCommand):
+    help = "Compare evaluator expression throughput with and without a pre-parsed statement"
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', help='e.g. "a + b if a > b else b - a"')
+        parser.add_argument(
+            'context',
+            help='A JSON object of variables available to the statement, e.g. \'{"a": 1, "b": 2}\'',
+            type=json.loads,
+        )
+        parser.add_argument('--rows', type=int, default=100000)
+
+    def handle(self, statement, context, rows, **options):
+        parsed_statement = compile_statement(statement)
+
+        def _parse_each_row():
+            eval_statements(statement, context)
+
+        def _compiled():
+            eval_statements(statement, context, parsed_statement=parsed_statement)
+
+        for label, func in [('parse each row', _parse_each_row), ('compiled', _compiled)]:
+            seconds = timeit.timeit(func, number=rows)
+            print("{}: {:,.0f} rows/sec".format(label, rows / seconds))
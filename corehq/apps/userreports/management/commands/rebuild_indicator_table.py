@@ -1,6 +1,8 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 from corehq.apps.userreports import tasks
+from corehq.apps.userreports.rebuild import PartitionedRebuildStatus
+from corehq.apps.userreports.util import get_ucr_datasource_config_by_id
 
 
 class Command(BaseCommand):
@@ -10,11 +12,38 @@ class Command(BaseCommand):
         parser.add_argument('indicator_config_id')
         parser.add_argument('--in-place', action='store_true', dest='in_place', default=False,
                             help='Rebuild table in place (preserve existing data)')
-        parser.add_argument('--initiated-by', action='store', required=True, dest='initiated',
+        parser.add_argument('--partitioned', action='store_true', default=False,
+                            help='Rebuild the table with one celery task per partitioned database')
+        parser.add_argument('--resume-partitions', nargs='*', dest='resume_partitions',
+                            help='Restart partitions of a partitioned rebuild. '
+                                 'Restarts the partitions that failed if none are given.')
+        parser.add_argument('--progress', action='store_true', default=False,
+                            help='Show the progress of a partitioned rebuild')
+        parser.add_argument('--initiated-by', action='store', dest='initiated',
                             help='Who initiated the rebuild (for sending email notifications)')
 
     def handle(self, indicator_config_id, **options):
-        if options['in_place']:
+        if options['progress']:
+            self._print_progress(indicator_config_id)
+            return
+
+        if not options['initiated']:
+            raise CommandError("--initiated-by is required")
+
+        if options['resume_partitions'] is not None:
+            partitions = tasks.resume_partitioned_rebuild(
+                indicator_config_id,
+                partitions=options['resume_partitions'] or None,
+                initiated_by=options['initiated'],
+            )
+            print("Restarted partitions: {}".format(', '.join(partitions) or 'none'))
+        elif options['partitioned']:
+            tasks.rebuild_indicators_partitioned(
+                indicator_config_id,
+                initiated_by=options['initiated'],
+                source='rebuild_indicator_table'
+            )
+        elif options['in_place']:
             tasks.rebuild_indicators_in_place(
                 indicator_config_id, options['initiated'], source='rebuild_indicator_table'
             )
@@ -24,3 +53,19 @@ class Command(BaseCommand):
                 initiated_by=options['initiated'],
                 source='rebuild_indicator_table'
             )
+
+    def _print_progress(self, indicator_config_id):
+        config = get_ucr_datasource_config_by_id(indicator_config_id)
+        progress = PartitionedRebuildStatus(config).get_progress()
+        if not progress:
+            print("No partitioned rebuild in progress")
+            return
+        for partition in progress:
+            print("{}: {} ({:,} docs processed)".format(
+                partition.partition, partition.state, partition.docs_processed
+            ))
+        print("{} of {} partitions complete, {:,} docs processed".format(
+            sum(1 for p in progress if p.state == PartitionedRebuildStatus.COMPLETE),
+            len(progress),
+            sum(p.docs_processed for p in progress),
+        ))
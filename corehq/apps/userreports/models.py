@@ -3,7 +3,7 @@ import json
 import os
 import re
 from ast import literal_eval
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 from copy import copy, deepcopy
 from datetime import datetime, timedelta
 from uuid import UUID
@@ -56,6 +56,7 @@ from corehq.apps.userreports.app_manager.data_source_meta import (
     REPORT_BUILDER_DATA_SOURCE_TYPE_VALUES,
 )
 from corehq.apps.userreports.columns import get_expanded_column_config
+from corehq.apps.userreports.compiler import CompiledDataSource
 from corehq.apps.userreports.const import (
     ALL_EXPRESSION_TYPES,
     DATA_SOURCE_TYPE_AGGREGATE,
@@ -85,6 +86,8 @@ from corehq.apps.userreports.exceptions import (
     ValidationError,
 )
 from corehq.apps.userreports.expressions.factory import ExpressionFactory
+from corehq.apps.userreports.expressions.specs import RelatedDocExpressionSpec
+from corehq.apps.userreports.expressions.utils import iter_configured_objects
 from corehq.apps.userreports.extension_points import (
     static_ucr_data_source_paths,
     static_ucr_report_paths,
@@ -232,6 +235,7 @@ class DataSourceBuildInformation(DocumentSchema):
                 'corehq.apps.userreports.tasks.rebuild_indicators',
                 'corehq.apps.userreports.tasks.rebuild_indicators_in_place',
                 'corehq.apps.userreports.tasks.resume_building_indicators',
+                'corehq.apps.userreports.tasks.build_indicators_for_partition',
             )
             initiated_at = none_max(self.initiated, self.initiated_in_place)
             start = format_datetime(initiated_at - timedelta(seconds=60))
@@ -595,14 +599,58 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
                     )
                 return []
 
+        if self.uses_compiled_expressions:
+            get_items, get_values = self.compiled.get_items, self.compiled.get_values
+        else:
+            get_items, get_values = self.get_items, self.indicators.get_values
+
         rows = []
-        for item in self.get_items(doc, eval_context):
-            values = self.indicators.get_values(item, eval_context)
+        for item in get_items(doc, eval_context):
+            values = get_values(item, eval_context)
             rows.append(values)
             eval_context.increment_iteration()
 
         return rows
 
+    @property
+    @memoized
+    def related_doc_expressions(self):
+        """All ``related_doc`` expressions used by this data source's filters and indicators"""
+        return [
+            obj for obj in iter_configured_objects([self._get_main_filter(), self.indicators])
+            if isinstance(obj, RelatedDocExpressionSpec)
+        ]
+
+    def get_related_doc_ids(self, doc, eval_context=None):
+        """Returns the IDs of documents that ``related_doc`` expressions will look up for ``doc``
+        as a dict of ``{doc_type: {doc_ids}}``.
+
+        This is a best effort intended for prefetching: ``related_doc`` expressions are
+        evaluated against the root document, which is not necessarily the item they
+        are evaluated against when processing the document.
+        """
+        if eval_context is None:
+            eval_context = EvaluationContext(doc)
+        doc_ids_by_type = defaultdict(set)
+        for expression in self.related_doc_expressions:
+            try:
+                doc_id = expression.get_doc_id(doc, eval_context)
+            except Exception:
+                continue
+            if doc_id and isinstance(doc_id, str):
+                doc_ids_by_type[expression.related_doc_type].add(doc_id)
+        return doc_ids_by_type
+
+    @property
+    @memoized
+    def uses_compiled_expressions(self):
+        return toggles.UCR_COMPILED_EXPRESSIONS.enabled(self.domain)
+
+    @property
+    @memoized
+    def compiled(self):
+        return CompiledDataSource(self)
+
     def get_report_count(self):
         """
         Return the number of ReportConfigurations that reference this data source.
@@ -2,9 +2,11 @@ import hashlib
 import signal
 from abc import ABC, abstractmethod
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 
 from django.conf import settings
+from django.db import close_old_connections
 
 from corehq.apps.change_feed.consumer.feed import (
     KafkaChangeFeed,
@@ -21,11 +23,13 @@ from corehq.apps.userreports.data_source_providers import (
 from corehq.apps.userreports.exceptions import (
     UserReportsWarning,
 )
+from corehq.apps.userreports.expressions.specs import RelatedDocumentCache
 from corehq.apps.userreports.models import AsyncIndicator
 from corehq.apps.userreports.pillow_utils import rebuild_sql_tables
 from corehq.apps.userreports.specs import EvaluationContext
 from corehq.apps.userreports.util import get_indicator_adapter
 from corehq.pillows.base import is_couch_change_for_sql_domain
+from corehq.sql_db.connections import connection_manager
 from corehq.util.metrics import metrics_counter, metrics_histogram_timer
 from corehq.util.timer import TimingContext
 from pillowtop.checkpoints.manager import KafkaPillowCheckpoint
@@ -394,10 +398,16 @@ class ConfigurableReportPillowProcessor(BulkPillowProcessor):
 
     Writes to:
       - UCR database
+
+    :param domain_concurrency: if greater than 1, the per-domain work of each
+        chunk is run on a pool of this many threads. Each worker thread uses its
+        own (thread-local) SQLAlchemy session.
     """
 
-    def __init__(self, table_manager):
+    def __init__(self, table_manager, domain_concurrency=0):
         self.table_manager = table_manager
+        self.domain_concurrency = domain_concurrency
+        self._domain_executor = None
 
     domain_timing_context = Counter()
 
@@ -428,14 +438,63 @@ class ConfigurableReportPillowProcessor(BulkPillowProcessor):
 
         retry_changes = set()
         change_exceptions = []
-        for domain, changes_chunk in changes_by_domain.items():
+        if self.domain_concurrency > 1 and len(changes_by_domain) > 1:
             with WarmShutdown():
-                failed, exceptions = self._process_chunk_for_domain(domain, changes_chunk)
+                results = self._process_domains_concurrently(changes_by_domain)
+        else:
+            results = self._process_domains_serially(changes_by_domain)
+        for failed, exceptions in results:
             retry_changes.update(failed)
             change_exceptions.extend(exceptions)
 
         return retry_changes, change_exceptions
 
+    def _process_domains_serially(self, changes_by_domain):
+        results = []
+        for domain, changes_chunk in changes_by_domain.items():
+            with WarmShutdown():
+                results.append(self._timed_process_chunk_for_domain(domain, changes_chunk))
+        return results
+
+    def _process_domains_concurrently(self, changes_by_domain):
+        """Process each domain's changes on the worker pool
+
+        Waits for every domain to finish before returning so that the
+        checkpoint is never advanced past a domain that is still being
+        processed. If any domain raised, the first error is re-raised so
+        that the pillow falls back to processing the changes serially.
+        """
+        if self._domain_executor is None:
+            self._domain_executor = ThreadPoolExecutor(
+                max_workers=self.domain_concurrency,
+                thread_name_prefix='ucr-domain',
+            )
+        futures = [
+            self._domain_executor.submit(self._process_chunk_for_domain_in_worker, domain, changes_chunk)
+            for domain, changes_chunk in changes_by_domain.items()
+        ]
+        wait(futures)
+        # preserve domain order so results are merged deterministically
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        if self._domain_executor is not None:
+            self._domain_executor.shutdown(wait=True)
+            self._domain_executor = None
+
+    def _process_chunk_for_domain_in_worker(self, domain, changes_chunk):
+        try:
+            return self._timed_process_chunk_for_domain(domain, changes_chunk)
+        finally:
+            # discard this thread's session so that it does not hold on to
+            # a transaction or connection between chunks
+            connection_manager.close_scoped_sessions()
+            close_old_connections()
+
+    def _timed_process_chunk_for_domain(self, domain, changes_chunk):
+        with self._metrics_timer('single_domain_chunk'):
+            return self._process_chunk_for_domain(domain, changes_chunk)
+
     def _process_chunk_for_domain(self, domain, changes_chunk):
         adapters = self.table_manager.get_adapters(domain)
         changes_by_id = {change.id: change for change in changes_chunk}
@@ -448,10 +507,11 @@ class ConfigurableReportPillowProcessor(BulkPillowProcessor):
         change_exceptions = []
 
         with self._metrics_timer('single_batch_transform'):
+            related_doc_cache = self._prefetch_related_docs(domain, adapters, docs)
             for doc in docs:
                 change = changes_by_id[doc['_id']]
                 doc_subtype = change.metadata.document_subtype
-                eval_context = EvaluationContext(doc)
+                eval_context = EvaluationContext(doc, related_doc_cache=related_doc_cache)
                 with self._metrics_timer('single_doc_transform'):
                     for adapter in adapters:
                         with self._per_config_metrics_timer('transform', adapter.config._id):
@@ -503,6 +563,25 @@ class ConfigurableReportPillowProcessor(BulkPillowProcessor):
 
         return retry_changes, change_exceptions
 
+    def _prefetch_related_docs(self, domain, adapters, docs):
+        """Bulk fetch the documents that ``related_doc`` expressions will look up for
+        this chunk so that they don't need to be fetched one at a time"""
+        related_doc_cache = RelatedDocumentCache()
+        configs = [adapter.config for adapter in adapters if adapter.config.related_doc_expressions]
+        if not configs:
+            return related_doc_cache
+
+        with self._metrics_timer('related_doc_prefetch'):
+            doc_ids_by_type = defaultdict(set)
+            for doc in docs:
+                eval_context = EvaluationContext(doc, related_doc_cache=related_doc_cache)
+                for config in configs:
+                    for doc_type, doc_ids in config.get_related_doc_ids(doc, eval_context).items():
+                        doc_ids_by_type[doc_type].update(doc_ids)
+            for doc_type, doc_ids in doc_ids_by_type.items():
+                related_doc_cache.prefetch(domain, doc_type, doc_ids)
+        return related_doc_cache
+
     def _metrics_timer(self, step, config_id=None):
         tags = {
             'action': step,
@@ -660,7 +739,8 @@ def get_data_registry_ucr_processor(run_migrations, ucr_configs):
 def get_kafka_ucr_pillow(pillow_id='kafka-ucr-main', ucr_division=None,
                          include_ucrs=None, exclude_ucrs=None, topics=None,
                          num_processes=1, process_num=0, dedicated_migration_process=False,
-                         processor_chunk_size=DEFAULT_PROCESSOR_CHUNK_SIZE, **kwargs):
+                         processor_chunk_size=DEFAULT_PROCESSOR_CHUNK_SIZE,
+                         domain_concurrency=0, **kwargs):
     """UCR pillow that reads from all Kafka topics and writes data into the UCR database tables.
 
         Processors:
@@ -677,7 +757,7 @@ def get_kafka_ucr_pillow(pillow_id='kafka-ucr-main', ucr_division=None,
         run_migrations=(process_num == 0)  # only first process runs migrations
     )
     return ConfigurableReportKafkaPillow(
-        processor=ConfigurableReportPillowProcessor(table_manager),
+        processor=ConfigurableReportPillowProcessor(table_manager, domain_concurrency=domain_concurrency),
         pillow_name=pillow_id,
         topics=topics,
         num_processes=num_processes,
@@ -690,7 +770,8 @@ def get_kafka_ucr_pillow(pillow_id='kafka-ucr-main', ucr_division=None,
 def get_kafka_ucr_static_pillow(pillow_id='kafka-ucr-static', ucr_division=None,
                                 include_ucrs=None, exclude_ucrs=None, topics=None,
                                 num_processes=1, process_num=0, dedicated_migration_process=False,
-                                processor_chunk_size=DEFAULT_PROCESSOR_CHUNK_SIZE, **kwargs):
+                                processor_chunk_size=DEFAULT_PROCESSOR_CHUNK_SIZE,
+                                domain_concurrency=0, **kwargs):
     """UCR pillow that reads from all Kafka topics and writes data into the UCR database tables.
 
     Only processes `static` UCR datasources (configuration lives in the codebase instead of the database).
@@ -710,7 +791,7 @@ def get_kafka_ucr_static_pillow(pillow_id='kafka-ucr-static', ucr_division=None,
         run_migrations=(process_num == 0)  # only first process runs migrations
     )
     return ConfigurableReportKafkaPillow(
-        processor=ConfigurableReportPillowProcessor(table_manager),
+        processor=ConfigurableReportPillowProcessor(table_manager, domain_concurrency=domain_concurrency),
         pillow_name=pillow_id,
         topics=topics,
         num_processes=num_processes,
@@ -1,5 +1,5 @@
 import logging
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 
 import attr
 from alembic.autogenerate import compare_metadata
@@ -40,9 +40,7 @@ class DataSourceResumeHelper(object):
         ]
 
     def add_completed_iteration(self, domain, case_type_or_xmlns):
-        if case_type_or_xmlns is None:
-            case_type_or_xmlns = 'None'
-        self._client.rpush(self._key, f"{domain}:{case_type_or_xmlns}".encode('utf8'))
+        self._client.rpush(self._key, _iteration_key(domain, case_type_or_xmlns).encode('utf8'))
 
     def clear_resume_info(self):
         self._client.delete(self._key)
@@ -51,6 +49,110 @@ class DataSourceResumeHelper(object):
         return self._client.exists(self._key)
 
 
+class DataSourcePartitionResumeHelper(DataSourceResumeHelper):
+    """
+    Resume info for one partition of a partitioned rebuild
+
+    As well as the completed iterations, this keeps a checkpoint of the last
+    primary key processed in each iteration so that a restarted partition
+    picks up where it left off instead of at the start of the iteration.
+    """
+
+    def __init__(self, config, partition):
+        super().__init__(config)
+        self.partition = partition
+        self._key = '{}:{}'.format(self._key, partition)
+        self._checkpoint_key = '{}:checkpoint'.format(self._key)
+
+    def get_checkpoint(self, domain, case_type_or_xmlns):
+        last_pk = self._client.hget(self._checkpoint_key, _iteration_key(domain, case_type_or_xmlns))
+        return int(last_pk) if last_pk is not None else None
+
+    def set_checkpoint(self, domain, case_type_or_xmlns, last_pk, docs_processed):
+        pipeline = self._client.pipeline()
+        pipeline.hset(self._checkpoint_key, _iteration_key(domain, case_type_or_xmlns), last_pk)
+        pipeline.hincrby(self._checkpoint_key, 'docs_processed', docs_processed)
+        pipeline.execute()
+
+    def get_docs_processed(self):
+        return int(self._client.hget(self._checkpoint_key, 'docs_processed') or 0)
+
+    def clear_resume_info(self):
+        self._client.delete(self._key, self._checkpoint_key)
+
+    def has_resume_info(self):
+        return bool(self._client.exists(self._key, self._checkpoint_key))
+
+
+PartitionProgress = namedtuple('PartitionProgress', 'partition state docs_processed')
+
+
+class PartitionedRebuildStatus(object):
+    """
+    The state of each partition of a partitioned rebuild
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETE = 'complete'
+    FAILED = 'failed'
+
+    def __init__(self, config):
+        self.config = config
+        self._client = get_redis_client().client.get_client()
+        self._key = '{}:partitions'.format(get_redis_key_for_config(config))
+
+    def start(self, partitions):
+        for partition in partitions:
+            DataSourcePartitionResumeHelper(self.config, partition).clear_resume_info()
+        pipeline = self._client.pipeline()
+        pipeline.delete(self._key)
+        pipeline.hset(self._key, mapping={partition: self.PENDING for partition in partitions})
+        pipeline.execute()
+
+    def set_state(self, partition, state):
+        self._client.hset(self._key, partition, state)
+
+    def get_states(self):
+        return {
+            partition.decode('utf8'): state.decode('utf8')
+            for partition, state in self._client.hgetall(self._key).items()
+        }
+
+    def get_partitions(self, state):
+        return sorted(partition for partition, state_ in self.get_states().items() if state_ == state)
+
+    def get_progress(self):
+        return [
+            PartitionProgress(
+                partition,
+                state,
+                DataSourcePartitionResumeHelper(self.config, partition).get_docs_processed(),
+            )
+            for partition, state in sorted(self.get_states().items())
+        ]
+
+    def is_complete(self):
+        states = self.get_states()
+        return bool(states) and all(state == self.COMPLETE for state in states.values())
+
+    def finish(self):
+        """
+        Clear the status and resume info of all partitions
+
+        :return: True for the one caller that clears the status, so that
+            only one partition finishes the rebuild
+        """
+        for partition in self.get_states():
+            DataSourcePartitionResumeHelper(self.config, partition).clear_resume_info()
+        return bool(self._client.delete(self._key))
+
+
+def _iteration_key(domain, case_type_or_xmlns):
+    if case_type_or_xmlns is None:
+        case_type_or_xmlns = 'None'
+    return f"{domain}:{case_type_or_xmlns}"
+
+
 @attr.s
 class MigrateRebuildTables(object):
     migrate = attr.ib()
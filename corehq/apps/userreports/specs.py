@@ -71,14 +71,18 @@ class EvaluationContext(object):
     """
     An evaluation context. Necessary for repeats to pass both the row of the repeat as well
     as the root document and the iteration number.
+
+    ``related_doc_cache`` is an optional ``RelatedDocumentCache`` that is shared between
+    the evaluation contexts of all documents processed together (e.g. a pillow chunk).
     """
 
-    def __init__(self, root_doc, iteration=0):
+    def __init__(self, root_doc, iteration=0, related_doc_cache=None):
         self.root_doc = root_doc
         self.iteration = iteration
         self.inserted_timestamp = datetime.utcnow()
         self.cache = {}
         self.iteration_cache = {}
+        self.related_doc_cache = related_doc_cache
 
     def exists_in_cache(self, key):
         return key in self.cache or key in self.iteration_cache
@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.db import DatabaseError, InternalError, transaction
-from django.db.models import Count, Min
+from django.db.models import Count, Min, Q
 from django.utils.translation import gettext as _
 
 from botocore.vendored.requests.exceptions import ReadTimeout
@@ -36,12 +36,17 @@ from corehq.apps.userreports.const import (
 )
 from corehq.apps.userreports.exceptions import (
     DataSourceConfigurationNotFoundError,
+    TableRebuildError,
 )
 from corehq.apps.userreports.models import (
     AsyncIndicator,
     id_is_static,
 )
-from corehq.apps.userreports.rebuild import DataSourceResumeHelper
+from corehq.apps.userreports.rebuild import (
+    DataSourcePartitionResumeHelper,
+    DataSourceResumeHelper,
+    PartitionedRebuildStatus,
+)
 from corehq.apps.userreports.specs import EvaluationContext
 from corehq.apps.userreports.util import (
     get_async_indicator_modify_lock_key,
@@ -49,6 +54,8 @@ from corehq.apps.userreports.util import (
     get_ucr_datasource_config_by_id,
 )
 from corehq.elastic import ESError
+from corehq.form_processor.models import CommCareCase, XFormInstance
+from corehq.sql_db.util import get_db_aliases_for_partitioned_query
 from corehq.util.context_managers import notify_someone
 from corehq.util.decorators import serial_task
 from corehq.util.es.elasticsearch import ConnectionTimeout
@@ -150,7 +157,6 @@ def resume_building_indicators(indicator_config_id, initiated_by=None):
 
 def _iteratively_build_table(config, resume_helper=None, in_place=False, limit=-1):
     resume_helper = resume_helper or DataSourceResumeHelper(config)
-    indicator_config_id = config._id
     case_type_or_xmlns_list = config.get_case_type_or_xmlns_filter()
     domains = config.data_domains
 
@@ -181,7 +187,11 @@ def _iteratively_build_table(config, resume_helper=None, in_place=False, limit=-
         resume_helper.add_completed_iteration(domain, case_type_or_xmlns)
 
     resume_helper.clear_resume_info()
-    if not id_is_static(indicator_config_id):
+    _mark_build_finished(config, in_place)
+
+
+def _mark_build_finished(config, in_place=False):
+    if not id_is_static(config._id):
         if in_place:
             config.meta.build.finished_in_place = True
         else:
@@ -200,6 +210,146 @@ def _iteratively_build_table(config, resume_helper=None, in_place=False, limit=-
             current_config.save()
 
 
+@serial_task('{indicator_config_id}', default_retry_delay=60 * 10, timeout=3 * 60 * 60, max_retries=20,
+             queue=UCR_CELERY_QUEUE, ignore_result=True, serializer='pickle')
+def rebuild_indicators_partitioned(indicator_config_id, initiated_by=None, source=None):
+    """
+    Rebuild a data source with one ``build_indicators_for_partition`` task
+    for each partitioned SQL database, so the documents of each database
+    are processed in parallel. Each partition has its own resume info and
+    a failed partition can be restarted on its own with
+    ``resume_partitioned_rebuild``. The partition that finishes last marks
+    the build as finished.
+    """
+    config = get_ucr_datasource_config_by_id(indicator_config_id)
+    partitions = get_partitions_for_rebuild(config)
+    adapter = get_indicator_adapter(config)
+    if not id_is_static(indicator_config_id):
+        config.meta.build.initiated = datetime.utcnow()
+        config.meta.build.finished = False
+        config.meta.build.rebuilt_asynchronously = False
+        config.save()
+
+    adapter.rebuild_table(initiated_by=initiated_by, source=source)
+    PartitionedRebuildStatus(config).start(partitions)
+    for partition in partitions:
+        build_indicators_for_partition.delay(indicator_config_id, partition, initiated_by)
+
+
+def resume_partitioned_rebuild(indicator_config_id, partitions=None, initiated_by=None):
+    """
+    Restart partitions of a partitioned rebuild from their last checkpoint
+
+    :param partitions: The partitions to restart. Defaults to the partitions
+        that failed. Don't restart a partition that is still running.
+    :return: The partitions that were restarted
+    """
+    config = get_ucr_datasource_config_by_id(indicator_config_id)
+    status = PartitionedRebuildStatus(config)
+    if partitions is None:
+        partitions = status.get_partitions(status.FAILED)
+    for partition in partitions:
+        status.set_state(partition, status.PENDING)
+        build_indicators_for_partition.delay(indicator_config_id, partition, initiated_by)
+    return partitions
+
+
+@task(serializer='pickle', queue=UCR_CELERY_QUEUE, ignore_result=True, acks_late=True)
+def build_indicators_for_partition(indicator_config_id, partition, initiated_by=None):
+    config = get_ucr_datasource_config_by_id(indicator_config_id)
+    status = PartitionedRebuildStatus(config)
+    status.set_state(partition, status.RUNNING)
+    try:
+        _iteratively_build_partition(config, partition)
+    except Exception:
+        status.set_state(partition, status.FAILED)
+        raise
+    status.set_state(partition, status.COMPLETE)
+
+    if status.is_complete() and status.finish():
+        success = _('Your UCR table {} has finished rebuilding in {}').format(config.table_id, config.domain)
+        with notify_someone(initiated_by, success_message=success):
+            _mark_build_finished(config)
+
+
+def get_partitions_for_rebuild(config):
+    if config.referenced_doc_type not in _PARTITIONED_DOC_TYPES:
+        raise TableRebuildError(
+            "Data sources of type {} can't be rebuilt by partition".format(config.referenced_doc_type)
+        )
+    return get_db_aliases_for_partitioned_query()
+
+
+def _iteratively_build_partition(config, partition):
+    resume_helper = DataSourcePartitionResumeHelper(config, partition)
+    completed_iterations = {tuple(iteration) for iteration in resume_helper.get_completed_iterations()}
+    loop_iterations = itertools.product(config.data_domains, config.get_case_type_or_xmlns_filter())
+
+    for domain, case_type_or_xmlns in loop_iterations:
+        if (domain, str(case_type_or_xmlns)) in completed_iterations:
+            continue
+
+        document_store = get_document_store_for_doc_type(
+            domain, config.referenced_doc_type,
+            case_type_or_xmlns=case_type_or_xmlns,
+            load_source="build_indicators",
+        )
+        last_pk = resume_helper.get_checkpoint(domain, case_type_or_xmlns)
+        doc_id_chunks = _iter_partition_doc_ids(
+            config.referenced_doc_type, partition, domain, case_type_or_xmlns, last_pk
+        )
+        for doc_ids, last_pk in doc_id_chunks:
+            _build_indicators(config, document_store, doc_ids)
+            resume_helper.set_checkpoint(domain, case_type_or_xmlns, last_pk, len(doc_ids))
+
+        resume_helper.add_completed_iteration(domain, case_type_or_xmlns)
+
+
+def _iter_partition_doc_ids(doc_type, partition, domain, case_type_or_xmlns, last_pk=None):
+    """
+    Yields ``(doc_ids, last_pk)`` for chunks of the documents in one
+    partitioned database, in primary key order and starting after ``last_pk``
+    """
+    model_class, id_field, get_filter = _PARTITIONED_DOC_TYPES[doc_type]
+    query = (
+        model_class.objects.using(partition)
+        .filter(get_filter(domain, case_type_or_xmlns))
+        .order_by('pk')
+        .values_list('pk', id_field)
+    )
+    while True:
+        if last_pk is not None:
+            rows = list(query.filter(pk__gt=last_pk)[:ID_CHUNK_SIZE])
+        else:
+            rows = list(query[:ID_CHUNK_SIZE])
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        yield [doc_id for pk, doc_id in rows], last_pk
+
+
+def _case_filter(domain, case_type):
+    # the same cases as CaseDocumentStore.iter_document_ids
+    q_expression = Q(domain=domain, deleted=False)
+    if case_type is not None:
+        q_expression &= Q(type=case_type)
+    return q_expression
+
+
+def _form_filter(domain, xmlns):
+    # the same forms as FormDocumentStore.iter_document_ids
+    q_expression = Q(domain=domain, state=XFormInstance.NORMAL)
+    if xmlns:
+        q_expression &= Q(xmlns=xmlns)
+    return q_expression
+
+
+_PARTITIONED_DOC_TYPES = {
+    'CommCareCase': (CommCareCase, 'case_id', _case_filter),
+    'XFormInstance': (XFormInstance, 'form_id', _form_filter),
+}
+
+
 @task(serializer='pickle', queue=UCR_CELERY_QUEUE, ignore_result=True)
 def delete_data_source_task(domain, config_id):
     from corehq.apps.userreports.views import delete_data_source_shared
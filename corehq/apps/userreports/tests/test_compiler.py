@@ -0,0 +1,168 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from corehq.apps.userreports.compiler import Compiler
+from corehq.apps.userreports.expressions.factory import ExpressionFactory
+from corehq.apps.userreports.models import DataSourceConfiguration
+from corehq.apps.userreports.specs import EvaluationContext, FactoryContext
+from corehq.apps.userreports.tests import test_expressions
+from corehq.apps.userreports.tests.utils import (
+    get_data_source_with_repeat,
+    get_sample_data_source,
+    get_sample_doc_and_indicators,
+)
+
+
+class ParityExpression(object):
+    """Evaluates both the original and compiled expression and checks that they agree"""
+
+    def __init__(self, expression):
+        self._expression = expression
+        self._compiled = Compiler().compile_expression(expression)
+
+    def __getattr__(self, name):
+        return getattr(self._expression, name)
+
+    def __call__(self, item, evaluation_context=None):
+        expected = self._expression(item, evaluation_context)
+        actual = self._compiled(item, evaluation_context)
+        assert actual == expected, "compiled: {!r} != original: {!r}".format(actual, expected)
+        return expected
+
+
+class ParityExpressionFactory(object):
+
+    @classmethod
+    def from_spec(cls, spec, factory_context=None):
+        return ParityExpression(ExpressionFactory.from_spec(spec, factory_context))
+
+
+class ParityMixin(object):
+    """Re-runs the tests of an expression test case against the compiled expressions as well"""
+
+    def setUp(self):
+        patcher = patch.object(test_expressions, 'ExpressionFactory', ParityExpressionFactory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+
+class IdentityExpressionParityTest(ParityMixin, test_expressions.IdentityExpressionTest):
+    pass
+
+
+class ConstantExpressionParityTest(ParityMixin, test_expressions.ConstantExpressionTest):
+    pass
+
+
+class PropertyExpressionParityTest(ParityMixin, test_expressions.PropertyExpressionTest):
+    pass
+
+
+class PropertyNameExpressionParityTest(ParityMixin, test_expressions.PropertyNameExpressionTest):
+    pass
+
+
+class ConditionalExpressionParityTest(ParityMixin, test_expressions.ConditionalExpressionTest):
+    pass
+
+
+class DictExpressionParityTest(ParityMixin, test_expressions.DictExpressionTest):
+    pass
+
+
+class NestedExpressionParityTest(ParityMixin, test_expressions.NestedExpressionTest):
+    pass
+
+
+class RootDocExpressionParityTest(ParityMixin, test_expressions.RootDocExpressionTest):
+    pass
+
+
+class CompilerTest(SimpleTestCase):
+
+    def test_property_path(self):
+        getter = Compiler().compile_expression(ExpressionFactory.from_spec({
+            'type': 'property_path',
+            'property_path': ['path', 'to', 'foo'],
+            'datatype': 'integer',
+        }))
+        self.assertEqual(getter({'path': {'to': {'foo': '1.0'}}}), 1)
+        for bad_value in [None, '', [], {}]:
+            self.assertEqual(getter({'path': {'to': bad_value}}), None)
+        self.assertEqual(getter('not a dict'), None)
+
+    def test_simple_named_expression_skips_cache(self):
+        named = ExpressionFactory.from_spec({'type': 'property_name', 'property_name': 'foo'})
+        expression = ExpressionFactory.from_spec(
+            {'type': 'named', 'name': 'foo'},
+            FactoryContext({'foo': named}, {}),
+        )
+        context = EvaluationContext({})
+        self.assertEqual(Compiler().compile_expression(expression)({'foo': 1}, context), 1)
+        self.assertEqual(context.iteration_cache, {})
+
+    def test_named_expression_compiled_once(self):
+        named = ExpressionFactory.from_spec({'type': 'property_name', 'property_name': 'foo'})
+        factory_context = FactoryContext({'foo': named}, {})
+        compiler = Compiler()
+        first, second = [
+            compiler.compile_expression(
+                ExpressionFactory.from_spec({'type': 'named', 'name': 'foo'}, factory_context)
+            )
+            for i in range(2)
+        ]
+        self.assertIs(first, second)
+
+    def test_unknown_expressions_are_not_compiled(self):
+        expression = ExpressionFactory.from_spec({
+            'type': 'split_string',
+            'string_expression': {'type': 'property_name', 'property_name': 'foo'},
+            'index_expression': 0,
+        })
+        self.assertIs(Compiler().compile_expression(expression), expression)
+
+
+@patch('corehq.apps.userreports.specs.datetime')
+class CompiledDataSourceParityTest(SimpleTestCase):
+
+    def _assert_parity(self, config, docs):
+        for doc in docs:
+            context = EvaluationContext(doc)
+            expected = _get_all_values(config, doc, context, compiled=False)
+            context.reset_iteration()
+            actual = _get_all_values(config, doc, context, compiled=True)
+            self.assertEqual(actual, expected)
+
+    def test_sample_data_source(self, datetime_mock):
+        sample_doc, _ = get_sample_doc_and_indicators()
+        docs = [
+            sample_doc,
+            dict(sample_doc, category='feature', tags='roadmap public', is_starred='no'),
+            dict(sample_doc, type='not-ticket'),
+            dict(sample_doc, domain='not-user-reports'),
+        ]
+        self._assert_parity(get_sample_data_source(), docs)
+
+    def test_data_source_with_repeat(self, datetime_mock):
+        config = get_data_source_with_repeat()
+        doc = {
+            '_id': 'form-id',
+            'doc_type': 'XFormInstance',
+            'domain': config.domain,
+            'created': '2015-01-01T11:00:00Z',
+            'form': {
+                'time_logs': [
+                    {'start_time': '2015-01-01T12:00:00Z', 'end_time': '2015-01-01T13:00:00Z', 'person': 'a'},
+                    {'start_time': '2015-01-02T12:00:00Z', 'end_time': '2015-01-02T14:00:00Z', 'person': 'b'},
+                ]
+            },
+        }
+        self._assert_parity(config, [doc])
+
+
+def _get_all_values(config, doc, context, compiled):
+    with patch.object(DataSourceConfiguration, 'uses_compiled_expressions', compiled):
+        rows = config.get_all_values(doc, context)
+    return [[(value.column.id, value.value) for value in row] for row in rows]
@@ -17,6 +17,7 @@ from corehq.apps.userreports.models import (
     UCRExpression,
 )
 from corehq.apps.userreports.tests.utils import (
+    get_data_source_with_related_doc_type,
     get_sample_data_source,
     get_sample_doc_and_indicators,
 )
@@ -181,6 +182,20 @@ class DataSourceConfigurationTest(SimpleTestCase):
         with self.assertRaises(BadSpecError):
             bad_config.validate()
 
+    def test_no_related_doc_ids(self):
+        sample_doc, _ = get_sample_doc_and_indicators()
+        self.assertEqual(self.config.related_doc_expressions, [])
+        self.assertEqual(self.config.get_related_doc_ids(sample_doc), {})
+
+    def test_related_doc_ids(self):
+        config = get_data_source_with_related_doc_type()
+        doc = {
+            '_id': 'child-id',
+            'domain': config.domain,
+            'indices': [{'referenced_id': 'parent-id'}],
+        }
+        self.assertEqual(config.get_related_doc_ids(doc), {'CommCareCase': {'parent-id'}})
+
 
 class DataSourceFilterInterpolationTest(SimpleTestCase):
     def _setup_config(self, doc_type, filter_):
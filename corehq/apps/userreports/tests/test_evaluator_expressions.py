@@ -1,11 +1,12 @@
 from datetime import date
 from decimal import Decimal
+from unittest.mock import patch
 
 from django.test import SimpleTestCase
 from simpleeval import InvalidExpression, AssignmentAttempted
 
 from corehq.apps.userreports.exceptions import BadSpecError
-from corehq.apps.userreports.expressions.evaluator import eval_statements
+from corehq.apps.userreports.expressions.evaluator import compile_statement, eval_statements
 from corehq.apps.userreports.expressions.factory import ExpressionFactory
 from corehq.apps.userreports.expressions.getters import transform_datetime
 from corehq.apps.userreports.specs import EvaluationContext, FactoryContext
@@ -226,3 +227,31 @@ class TestEvaluatorContext(SimpleTestCase):
         expr = ExpressionFactory.from_spec(spec)
         result = expr({"a": 1}, EvaluationContext({"a": {"b": "from root"}}))
         self.assertEqual(result, "from root")
+
+
+class TestCompiledStatement(SimpleTestCase):
+
+    def test_statement_parsed_once(self):
+        expression = ExpressionFactory.from_spec({
+            "type": "evaluator",
+            "statement": "a + b",
+            "context_variables": {"a": 1, "b": {"type": "property_name", "property_name": "b"}}
+        })
+        with patch('corehq.apps.userreports.expressions.evaluator.main.CommCareEval.parse') as parse:
+            self.assertEqual(expression({"b": 2}), 3)
+            self.assertEqual(expression({"b": 5}), 6)
+        parse.assert_not_called()
+
+    def test_unparsable_statement(self):
+        expression = ExpressionFactory.from_spec({
+            "type": "evaluator",
+            "statement": "a +",
+            "context_variables": {"a": 1}
+        })
+        self.assertEqual(expression({}), None)
+
+    def test_safety_checks_on_compiled_statement(self):
+        for statement in ['"WORD".lower()', 'a**b', 'max(a, b)']:
+            parsed = compile_statement(statement)
+            with self.assertRaises(InvalidExpression):
+                eval_statements(statement, {"a": 2, "b": 3}, parsed_statement=parsed)
@@ -17,6 +17,7 @@ from corehq.apps.userreports.expressions.factory import ExpressionFactory
 from corehq.apps.userreports.expressions.specs import (
     PropertyNameGetterSpec,
     PropertyPathGetterSpec,
+    RelatedDocumentCache,
 )
 from corehq.apps.userreports.specs import EvaluationContext, FactoryContext
 from corehq.apps.users.models import CommCareUser, WebUser
@@ -1004,6 +1005,41 @@ class RelatedDocExpressionTest(SimpleTestCase):
         self.database.clear()
         self.assertEqual('foo', self.expression(my_doc, context))
 
+    def _prefetch(self, my_doc, related_doc):
+        self.database = {'my-id': my_doc, related_doc['_id']: related_doc}
+
+        def iter_cases(case_ids, domain):
+            return [Config(to_json=lambda: self.database[case_id]) for case_id in case_ids]
+
+        cache = RelatedDocumentCache()
+        with patch.object(CommCareCase.objects, "iter_cases", iter_cases):
+            cache.prefetch(my_doc['domain'], 'CommCareCase', [related_doc['_id']])
+        self.database.clear()
+        return cache
+
+    def test_prefetched_lookup(self):
+        my_doc = {'domain': 'test-domain', 'parent_id': 'prefetched-id'}
+        related_doc = {'_id': 'prefetched-id', 'domain': 'test-domain', 'related_property': 'foo'}
+        cache = self._prefetch(my_doc, related_doc)
+        context = EvaluationContext(my_doc, 0, related_doc_cache=cache)
+        self.assertEqual('foo', self.expression(my_doc, context))
+
+    def test_prefetched_cross_domain_lookup(self):
+        my_doc = {'domain': 'test-domain', 'parent_id': 'prefetched-id'}
+        related_doc = {'_id': 'prefetched-id', 'domain': 'wrong-domain', 'related_property': 'foo'}
+        cache = self._prefetch(my_doc, related_doc)
+        context = EvaluationContext(my_doc, 0, related_doc_cache=cache)
+        self.assertEqual(None, self.expression(my_doc, context))
+
+    def test_cache_shared_between_contexts(self):
+        self.test_simple_lookup()
+        my_doc = self.database.get('my-id')
+        cache = RelatedDocumentCache()
+        self.assertEqual('foo', self.expression(my_doc, EvaluationContext(my_doc, 0, related_doc_cache=cache)))
+
+        self.database.clear()
+        self.assertEqual('foo', self.expression(my_doc, EvaluationContext(my_doc, 0, related_doc_cache=cache)))
+
 
 class RelatedDocExpressionDbTest(TestCase):
     domain = 'related-doc-db-test-domain'
@@ -372,6 +372,73 @@ class ChunkedUCRProcessorTest(TestCase):
         bootstrap_if_needed.assert_called_once_with()
 
 
+@mock.patch('corehq.apps.userreports.pillow.is_couch_change_for_sql_domain', return_value=False)
+@mock.patch('corehq.apps.userreports.pillow.metrics_histogram_timer', mock.MagicMock())
+class ConcurrentDomainProcessingTest(SimpleTestCase):
+
+    def _get_processor(self, domains, domain_concurrency):
+        table_manager = mock.MagicMock(relevant_domains=set(domains))
+        return ConfigurableReportPillowProcessor(table_manager, domain_concurrency=domain_concurrency)
+
+    def _get_changes(self, domains):
+        return [
+            doc_to_change({'_id': uuid.uuid4().hex, 'doc_type': 'CommCareCase', 'domain': domain})
+            for domain in domains
+            for i in range(3)
+        ]
+
+    def _process(self, domain_concurrency, side_effect):
+        domains = ['domain-a', 'domain-b', 'domain-c']
+        processor = self._get_processor(domains, domain_concurrency)
+        changes = self._get_changes(domains)
+        with mock.patch.object(processor, '_process_chunk_for_domain', side_effect=side_effect) as process:
+            retry_changes, change_exceptions = processor.process_changes_chunk(changes)
+        processor.shutdown()
+        return changes, process, retry_changes, change_exceptions
+
+    def test_results_merged(self, _):
+        def _process_chunk_for_domain(domain, changes_chunk):
+            return {changes_chunk[0]}, [(changes_chunk[1], Exception(domain))]
+
+        for domain_concurrency in (0, 3):
+            changes, process, retry_changes, change_exceptions = self._process(
+                domain_concurrency, _process_chunk_for_domain
+            )
+            self.assertEqual(process.call_count, 3)
+            self.assertEqual(retry_changes, {changes[0], changes[3], changes[6]})
+            self.assertEqual(
+                [(change, str(exc)) for change, exc in change_exceptions],
+                [(changes[1], 'domain-a'), (changes[4], 'domain-b'), (changes[7], 'domain-c')]
+            )
+
+    def test_all_domains_finish_before_raising(self, _):
+        def _process_chunk_for_domain(domain, changes_chunk):
+            if domain == 'domain-a':
+                raise ValueError(domain)
+            return set(), []
+
+        domains = ['domain-a', 'domain-b', 'domain-c']
+        processor = self._get_processor(domains, domain_concurrency=3)
+        with mock.patch.object(processor, '_process_chunk_for_domain', side_effect=_process_chunk_for_domain) \
+                as process, self.assertRaises(ValueError):
+            processor.process_changes_chunk(self._get_changes(domains))
+        self.assertEqual(process.call_count, 3)
+        processor.shutdown()
+
+    def test_shutdown(self, _):
+        domains = ['domain-a', 'domain-b']
+        processor = self._get_processor(domains, domain_concurrency=2)
+        with mock.patch.object(processor, '_process_chunk_for_domain', return_value=(set(), [])):
+            processor.process_changes_chunk(self._get_changes(domains))
+        executor = processor._domain_executor
+        self.assertIsNotNone(executor)
+
+        processor.shutdown()
+        self.assertIsNone(processor._domain_executor)
+        with self.assertRaises(RuntimeError):
+            executor.submit(print)
+
+
 class IndicatorPillowTest(TestCase):
 
     @classmethod
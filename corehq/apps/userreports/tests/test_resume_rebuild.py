@@ -1,6 +1,11 @@
 from django.test import SimpleTestCase
 
-from corehq.apps.userreports.rebuild import DataSourceResumeHelper
+from corehq.apps.userreports.rebuild import (
+    DataSourcePartitionResumeHelper,
+    DataSourceResumeHelper,
+    PartitionedRebuildStatus,
+    PartitionProgress,
+)
 from corehq.apps.userreports.tests.utils import get_sample_data_source
 from corehq.tests.locks import real_redis_client
 
@@ -43,3 +48,88 @@ class DataSourceResumeBuildTest(SimpleTestCase):
     def test_has_resume_info_true(self):
         self._resume_helper.add_completed_iteration("domain1", 'type1')
         self.assertEqual(True, self._resume_helper.has_resume_info())
+
+
+class DataSourcePartitionResumeBuildTest(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(DataSourcePartitionResumeBuildTest, cls).setUpClass()
+        cls._data_source = get_sample_data_source()
+        with real_redis_client():
+            cls._resume_helper = DataSourcePartitionResumeHelper(cls._data_source, 'p1')
+            cls._other_resume_helper = DataSourcePartitionResumeHelper(cls._data_source, 'p2')
+
+    def setUp(self):
+        super(DataSourcePartitionResumeBuildTest, self).setUp()
+        self._resume_helper.clear_resume_info()
+        self._other_resume_helper.clear_resume_info()
+
+    def test_checkpoint(self):
+        self.assertIsNone(self._resume_helper.get_checkpoint("domain1", None))
+        self._resume_helper.set_checkpoint("domain1", None, 100, 10)
+        self._resume_helper.set_checkpoint("domain1", None, 200, 10)
+        self.assertEqual(200, self._resume_helper.get_checkpoint("domain1", None))
+        self.assertIsNone(self._resume_helper.get_checkpoint("domain1", 'type1'))
+        self.assertEqual(20, self._resume_helper.get_docs_processed())
+        self.assertEqual(True, self._resume_helper.has_resume_info())
+
+    def test_partitions_are_separate(self):
+        self._resume_helper.add_completed_iteration("domain1", 'type1')
+        self._resume_helper.set_checkpoint("domain1", 'type2', 100, 10)
+        self.assertEqual([], self._other_resume_helper.get_completed_iterations())
+        self.assertIsNone(self._other_resume_helper.get_checkpoint("domain1", 'type2'))
+        self.assertEqual(0, self._other_resume_helper.get_docs_processed())
+
+    def test_clear_resume_info(self):
+        self._resume_helper.add_completed_iteration("domain1", 'type1')
+        self._resume_helper.set_checkpoint("domain1", 'type2', 100, 10)
+        self._resume_helper.clear_resume_info()
+        self.assertEqual(False, self._resume_helper.has_resume_info())
+        self.assertEqual([], self._resume_helper.get_completed_iterations())
+        self.assertEqual(0, self._resume_helper.get_docs_processed())
+
+
+class PartitionedRebuildStatusTest(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(PartitionedRebuildStatusTest, cls).setUpClass()
+        cls._data_source = get_sample_data_source()
+        with real_redis_client():
+            cls._status = PartitionedRebuildStatus(cls._data_source)
+            cls._resume_helper = DataSourcePartitionResumeHelper(cls._data_source, 'p1')
+
+    def setUp(self):
+        super(PartitionedRebuildStatusTest, self).setUp()
+        self._status.start(['p1', 'p2'])
+
+    def tearDown(self):
+        self._status.finish()
+        super(PartitionedRebuildStatusTest, self).tearDown()
+
+    def test_progress(self):
+        self._status.set_state('p1', PartitionedRebuildStatus.RUNNING)
+        self._resume_helper.set_checkpoint("domain1", None, 100, 10)
+        self.assertEqual(self._status.get_progress(), [
+            PartitionProgress('p1', PartitionedRebuildStatus.RUNNING, 10),
+            PartitionProgress('p2', PartitionedRebuildStatus.PENDING, 0),
+        ])
+
+    def test_start_clears_resume_info(self):
+        self._resume_helper.set_checkpoint("domain1", None, 100, 10)
+        self._status.start(['p1', 'p2'])
+        self.assertEqual(False, self._resume_helper.has_resume_info())
+
+    def test_get_partitions(self):
+        self._status.set_state('p2', PartitionedRebuildStatus.FAILED)
+        self.assertEqual(['p2'], self._status.get_partitions(PartitionedRebuildStatus.FAILED))
+
+    def test_finish_once(self):
+        self._status.set_state('p1', PartitionedRebuildStatus.COMPLETE)
+        self.assertEqual(False, self._status.is_complete())
+        self._status.set_state('p2', PartitionedRebuildStatus.COMPLETE)
+        self.assertEqual(True, self._status.is_complete())
+        self.assertEqual(True, self._status.finish())
+        self.assertEqual(False, self._status.finish())
+        self.assertEqual([], self._status.get_progress())
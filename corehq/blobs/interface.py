@@ -1,9 +1,13 @@
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
 from . import CODES
+from .exceptions import NotFound
 from .metadata import MetaDB
 
 NOT_SET = object()
+# should not be more than the S3 client's connection pool size (10 by default)
+BULK_GET_MAX_WORKERS = 10
 
 
 class AbstractBlobDB(metaclass=ABCMeta):
@@ -69,6 +73,39 @@ class AbstractBlobDB(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    def bulk_get(self, metas, max_workers=BULK_GET_MAX_WORKERS):
+        """Read the content of multiple blobs concurrently
+
+        :param metas: The list of `BlobMeta` objects for blobs to read.
+        :param max_workers: Maximum number of blobs read at once.
+        :returns: A dict of blob key to blob content (bytes). Blobs that
+        were not found are omitted.
+        """
+        metas = list(metas)
+        if len(metas) < 2 or max_workers < 2:
+            results = [self._bulk_get_content(meta) for meta in metas]
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(metas))) as executor:
+                results = list(executor.map(self._bulk_get_content, metas))
+        return {
+            meta.key: content
+            for meta, content in zip(metas, results)
+            if content is not None
+        }
+
+    def _bulk_get_content(self, meta):
+        """Read the content of a blob for `bulk_get`
+
+        Called on worker threads.
+
+        :returns: Blob content (bytes) or `None` if not found.
+        """
+        try:
+            with self.get(meta=meta) as content:
+                return content.read()
+        except NotFound:
+            return None
+
     @staticmethod
     def _validate_get_args(key, type_code, meta):
         if key is not None or type_code is not None:
@@ -25,6 +25,14 @@ class MigratingBlobDB(object):
         except NotFound:
             return self.old_db.get(*args, **kw)
 
+    def bulk_get(self, metas, **kw):
+        metas = list(metas)
+        contents = self.new_db.bulk_get(metas, **kw)
+        missing = [meta for meta in metas if meta.key not in contents]
+        if missing:
+            contents.update(self.old_db.bulk_get(missing, **kw))
+        return contents
+
     def size(self, *args, **kw):
         try:
             return self.new_db.size(*args, **kw)
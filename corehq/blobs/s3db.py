@@ -1,4 +1,4 @@
-from contextlib import contextmanager
+from contextlib import closing, contextmanager
 from gzip import GzipFile
 
 import boto3
@@ -107,6 +107,21 @@ class S3BlobDB(AbstractBlobDB):
             content_length, compressed_length = reported_content_length, None
         return BlobStream(body, self, key, content_length, compressed_length)
 
+    @retry_on_slow_down
+    def _bulk_get_content(self, meta):
+        # boto3 resources are not thread safe, but clients are
+        check_safe_key(meta.key)
+        try:
+            with maybe_not_found(throw=NotFound(meta.key)), self.report_timing('bulk_get', meta.key):
+                resp = self.db.meta.client.get_object(Bucket=self.s3_bucket_name, Key=meta.key)
+        except NotFound:
+            return None
+        with closing(resp["Body"]) as body:
+            if meta.is_compressed:
+                with GzipFile(meta.key, mode='rb', fileobj=body) as content:
+                    return content.read()
+            return body.read()
+
     def size(self, key):
         check_safe_key(key)
         with maybe_not_found(throw=NotFound(key)), self.report_timing('size', key):
@@ -108,6 +108,20 @@ class _BlobDBTests(object):
 
         return metas
 
+    def test_bulk_get(self):
+        metas = [
+            self.db.put(BytesIO("content-{}".format(key).encode('utf-8')), meta=self.new_meta())
+            for key in ['test.7', 'test.8']
+        ]
+        missing = self.db.put(BytesIO(b"content"), meta=self.new_meta())
+        self.db.delete(key=missing.key)
+
+        contents = self.db.bulk_get(metas + [missing])
+        self.assertEqual(contents, {
+            metas[0].key: b"content-test.7",
+            metas[1].key: b"content-test.8",
+        })
+
     def test_delete_no_args(self):
         meta = self.db.put(BytesIO(b"content"), meta=self.new_meta())
         with self.assertRaises(TypeError):
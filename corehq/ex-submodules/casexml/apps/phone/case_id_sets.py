@@ -0,0 +1,182 @@
+"""
+Compact binary encoding for the sets of case ids stored on a sync log.
+
+Case ids are almost always UUIDs, either as 32 character hex strings or in the
+dashed 36 character form. Each of those is stored as 16 raw bytes in a sorted
+array, which is less than half the size of the JSON encoded string and can be
+searched with a binary search without turning the whole array back into
+Python strings. Any id that isn't a lowercase UUID in one of those two forms
+is stored as is.
+
+The encoded value is::
+
+    version (1 byte) | flags (1 byte) | body (zlib compressed if FLAG_COMPRESSED)
+
+    body = one or more sets, each of
+        hex count, dashed count, other ids length (3 x 4 byte unsigned int)
+        | hex ids (16 bytes each, sorted)
+        | dashed ids (16 bytes each, sorted)
+        | other ids (JSON list)
+"""
+import json
+import struct
+import uuid
+import zlib
+from collections.abc import Set
+
+VERSION = 1
+FLAG_COMPRESSED = 1
+
+_HEADER = struct.Struct('>BB')
+_SET_HEADER = struct.Struct('>III')
+_UUID_LENGTH = 16
+
+
+def encode_case_id_sets(case_id_sets, compress=True):
+    """
+    Encode a list of sets of case ids into bytes
+
+    If ``compress`` is true the body is compressed with zlib, but only
+    if doing so makes it smaller (random UUIDs don't compress well).
+    """
+    body = b''.join(_encode_case_ids(case_ids) for case_ids in case_id_sets)
+    flags = 0
+    if compress:
+        compressed = zlib.compress(body, 1)
+        if len(compressed) < len(body):
+            body = compressed
+            flags |= FLAG_COMPRESSED
+    return _HEADER.pack(VERSION, flags) + body
+
+
+def decode_case_id_sets(data):
+    """Decode bytes made by ``encode_case_id_sets`` into a list of ``CompactCaseIdSet``"""
+    data = bytes(data)
+    version, flags = _HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError("Unknown case id set version: {}".format(version))
+    body = data[_HEADER.size:]
+    if flags & FLAG_COMPRESSED:
+        body = zlib.decompress(body)
+
+    case_id_sets = []
+    offset = 0
+    while offset < len(body):
+        hex_count, dashed_count, other_length = _SET_HEADER.unpack_from(body, offset)
+        offset += _SET_HEADER.size
+        hex_ids = body[offset:offset + hex_count * _UUID_LENGTH]
+        offset += len(hex_ids)
+        dashed_ids = body[offset:offset + dashed_count * _UUID_LENGTH]
+        offset += len(dashed_ids)
+        other_ids = json.loads(body[offset:offset + other_length]) if other_length else []
+        offset += other_length
+        case_id_sets.append(CompactCaseIdSet(hex_ids, dashed_ids, other_ids))
+    return case_id_sets
+
+
+def _encode_case_ids(case_ids):
+    hex_ids = []
+    dashed_ids = []
+    other_ids = []
+    for case_id in case_ids:
+        raw = _hex_id_to_bytes(case_id)
+        if raw is not None:
+            hex_ids.append(raw)
+            continue
+        raw = _dashed_id_to_bytes(case_id)
+        if raw is not None:
+            dashed_ids.append(raw)
+            continue
+        other_ids.append(case_id)
+
+    other = json.dumps(sorted(other_ids)).encode('utf-8') if other_ids else b''
+    return b''.join([
+        _SET_HEADER.pack(len(hex_ids), len(dashed_ids), len(other)),
+        b''.join(sorted(hex_ids)),
+        b''.join(sorted(dashed_ids)),
+        other,
+    ])
+
+
+def _hex_id_to_bytes(case_id):
+    if len(case_id) != 32:
+        return None
+    try:
+        raw = bytes.fromhex(case_id)
+    except ValueError:
+        return None
+    # make sure that the id round trips, e.g. it isn't upper case
+    return raw if raw.hex() == case_id else None
+
+
+def _dashed_id_to_bytes(case_id):
+    if len(case_id) != 36:
+        return None
+    try:
+        raw = uuid.UUID(case_id).bytes
+    except ValueError:
+        return None
+    return raw if str(uuid.UUID(bytes=raw)) == case_id else None
+
+
+def _contains(uuid_array, raw):
+    lo = 0
+    hi = len(uuid_array) // _UUID_LENGTH
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start = mid * _UUID_LENGTH
+        value = uuid_array[start:start + _UUID_LENGTH]
+        if value == raw:
+            return True
+        elif value < raw:
+            lo = mid + 1
+        else:
+            hi = mid
+    return False
+
+
+class CompactCaseIdSet(Set):
+    """
+    Read only, set-like view of an encoded set of case ids
+
+    Membership tests and ``len`` work on the encoded bytes directly. Ids are
+    only turned back into strings when iterating, so e.g. ``live_ids - phone_ids``
+    (where ``phone_ids`` is a ``CompactCaseIdSet``) only does a binary search
+    for each live id.
+    """
+
+    def __init__(self, hex_ids, dashed_ids, other_ids):
+        self._hex_ids = hex_ids
+        self._dashed_ids = dashed_ids
+        self._other_ids = frozenset(other_ids)
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return set(iterable)
+
+    def __len__(self):
+        return (
+            (len(self._hex_ids) + len(self._dashed_ids)) // _UUID_LENGTH
+            + len(self._other_ids)
+        )
+
+    def __contains__(self, case_id):
+        if not isinstance(case_id, str):
+            return False
+        raw = _hex_id_to_bytes(case_id)
+        if raw is not None:
+            return _contains(self._hex_ids, raw)
+        raw = _dashed_id_to_bytes(case_id)
+        if raw is not None:
+            return _contains(self._dashed_ids, raw)
+        return case_id in self._other_ids
+
+    def __iter__(self):
+        for start in range(0, len(self._hex_ids), _UUID_LENGTH):
+            yield self._hex_ids[start:start + _UUID_LENGTH].hex()
+        for start in range(0, len(self._dashed_ids), _UUID_LENGTH):
+            yield str(uuid.UUID(bytes=self._dashed_ids[start:start + _UUID_LENGTH]))
+        yield from self._other_ids
+
+    def __repr__(self):
+        return '{}({} case ids)'.format(self.__class__.__name__, len(self))
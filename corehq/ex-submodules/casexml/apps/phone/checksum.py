@@ -1,6 +1,5 @@
 import hashlib
-import binascii
-from copy import copy
+import operator
 import six
 from six.moves import zip
 from functools import reduce
@@ -69,8 +68,39 @@ class Checksum(object):
     def hexdigest(self):
         if not self._list:
             return EMPTY_HASH
-        x = copy(self._list)
-        x = list(map(Checksum.hash, x))
-        x = reduce(Checksum.xor, x)
-        x = binascii.hexlify(bytes(x)).decode('utf-8')
-        return x
+        return format_digest(get_digest(self._list))
+
+
+def get_id_digest(id):
+    """
+    The md5 digest of an id as a 128-bit integer, so that digests can be
+    combined with a single ``^`` instead of byte by byte.
+    """
+    if isinstance(id, six.text_type):
+        id = id.encode('utf-8')
+    return int.from_bytes(hashlib.md5(id).digest(), 'big')
+
+
+def get_digest(ids):
+    """
+    The XOR of the digests of all ``ids`` as a 128-bit integer.
+
+    Since XOR is its own inverse, a digest can be kept up to date as ids are
+    added and removed with ``digest ^ get_id_digest(id)``.
+
+    >>> format_digest(get_digest(['abc123', '123abc']))
+    '409c5c597fa2c2a693b769f0d2ad432b'
+
+    >>> digest = get_digest(['abc123', '123abc', 'def456'])
+    >>> format_digest(digest ^ get_id_digest('def456'))
+    '409c5c597fa2c2a693b769f0d2ad432b'
+    """
+    return reduce(operator.xor, map(get_id_digest, ids), 0)
+
+
+def format_digest(digest):
+    """
+    Format a digest the same way as ``Checksum.hexdigest`` (i.e. zero padded
+    lowercase hex of the 16 digest bytes)
+    """
+    return '%032x' % digest
@@ -329,7 +329,7 @@ def get_live_case_ids_and_indices(domain, owned_ids, timing_context):
 def discard_already_synced_cases(live_ids, restore_state):
     debug = logging.getLogger(__name__).debug
     sync_log = restore_state.last_sync_log
-    phone_ids = sync_log.case_ids_on_phone
+    phone_ids = sync_log.get_case_ids_on_phone()
     debug("phone_ids: %r", phone_ids)
     if phone_ids:
         sync_ids = live_ids - phone_ids  # sync all live cases not on phone
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('phone', '0007_delete_ownershipcleanlinessflag'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclogsql',
+            name='compact_case_ids',
+            field=models.BinaryField(null=True),
+        ),
+    ]
@@ -14,8 +14,19 @@ import six
 from memoized import memoized
 
 from casexml.apps.case import const
+from casexml.apps.phone.case_id_sets import (
+    decode_case_id_sets,
+    encode_case_id_sets,
+)
 from casexml.apps.phone.change_publishers import publish_synclog_saved
-from casexml.apps.phone.checksum import CaseStateHash, Checksum
+from casexml.apps.phone.checksum import (
+    EMPTY_HASH,
+    CaseStateHash,
+    Checksum,
+    format_digest,
+    get_digest,
+    get_id_digest,
+)
 from casexml.apps.phone.exceptions import (
     IncompatibleSyncLogType,
     MissingSyncLog,
@@ -133,6 +144,10 @@ class OTARestoreUser(object):
     def get_fixture_data_items(self):
         raise NotImplementedError()
 
+    def get_fixture_data_owners(self):
+        """``(owner_type, owner_id)`` pairs of the owners of the user's lookup table rows"""
+        raise NotImplementedError()
+
     def get_commtrack_location_id(self):
         raise NotImplementedError()
 
@@ -172,6 +187,9 @@ class OTARestoreWebUser(OTARestoreUser):
     def get_fixture_data_items(self):
         return []
 
+    def get_fixture_data_owners(self):
+        return []
+
     def get_commtrack_location_id(self):
         return None
 
@@ -210,6 +228,11 @@ class OTARestoreCommCareUser(OTARestoreUser):
 
         return LookupTableRow.objects.iter_by_user(self._couch_user)
 
+    def get_fixture_data_owners(self):
+        from corehq.apps.fixtures.models import LookupTableRow
+
+        return LookupTableRow.objects.get_owners_for_user(self._couch_user)
+
     def get_commtrack_location_id(self):
         from corehq.apps.commtrack.util import get_commtrack_location_id
 
@@ -428,7 +451,12 @@ def synclog_to_sql_object(synclog_json_object):
     ]
     for from_field, to_field in field_mapping:
         setattr(synclog, to_field, getattr(synclog_json_object, from_field, None))
-    synclog.doc = synclog_json_object.to_json()
+    if toggles.COMPACT_SYNCLOG_CASE_IDS.enabled(synclog_json_object.domain):
+        synclog.doc, synclog.compact_case_ids = synclog_json_object.to_compact_json()
+    else:
+        synclog_json_object.load_compact_case_ids()
+        synclog.doc = synclog_json_object.to_json()
+        synclog.compact_case_ids = None
     return synclog
 
 
@@ -461,6 +489,9 @@ class SyncLogSQL(models.Model):
     case_count = models.IntegerField(null=True)
     request_user_id = models.CharField(max_length=255, null=True)
     auth_type = models.CharField(max_length=128, null=True)
+    # case_ids_on_phone and dependent_case_ids_on_phone, encoded with
+    # case_id_sets.encode_case_id_sets instead of being stored in doc
+    compact_case_ids = models.BinaryField(null=True)
 
     def save(self, *args, **kwargs):
         super(SyncLogSQL, self).save(*args, **kwargs)
@@ -595,6 +626,36 @@ def _reverse_index_map(index_map):
     return dict(reverse_indices)
 
 
+class CaseIdSetProperty(SetProperty):
+    """
+    A set of case ids on a SimplifiedSyncLog, which might not be decoded yet
+    if the sync log was loaded with compact case ids.
+
+    Any access to the property decodes the compact case ids into a regular
+    set, so code that only needs to check membership should use
+    SimplifiedSyncLog.get_case_ids_on_phone instead.
+
+    :param resets_digest: Set to True for the property whose ids are
+    digested in SimplifiedSyncLog.case_ids_digest, so that replacing the
+    set resets the digest.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.resets_digest = kwargs.pop('resets_digest', False)
+        super(CaseIdSetProperty, self).__init__(*args, **kwargs)
+
+    def __get__(self, instance, owner):
+        if instance is not None:
+            instance.load_compact_case_ids()
+        return super(CaseIdSetProperty, self).__get__(instance, owner)
+
+    def __set__(self, instance, value):
+        instance.load_compact_case_ids()
+        super(CaseIdSetProperty, self).__set__(instance, value)
+        if self.resets_digest:
+            instance.case_ids_digest = None
+
+
 class SimplifiedSyncLog(AbstractSyncLog):
     """
     New, simplified sync log class that is used by ownership cleanliness restore.
@@ -603,10 +664,10 @@ class SimplifiedSyncLog(AbstractSyncLog):
     lists from the SyncLog class.
     """
     log_format = StringProperty(default=LOG_FORMAT_SIMPLIFIED)
-    case_ids_on_phone = SetProperty(six.text_type)
+    case_ids_on_phone = CaseIdSetProperty(six.text_type, resets_digest=True)
     # this is a subset of case_ids_on_phone used to flag that a case is only around because it has dependencies
     # this allows us to purge it if possible from other actions
-    dependent_case_ids_on_phone = SetProperty(six.text_type)
+    dependent_case_ids_on_phone = CaseIdSetProperty(six.text_type)
     owner_ids_on_phone = SetProperty(six.text_type)
     index_tree = SchemaProperty(IndexTree)  # index tree of subcases / children
     extension_index_tree = SchemaProperty(IndexTree)  # index tree of extensions
@@ -614,8 +675,23 @@ class SimplifiedSyncLog(AbstractSyncLog):
     extensions_checked = BooleanProperty(default=False)
     device_id = StringProperty()
     auth_type = StringProperty()
+    # running XOR of the digests of case_ids_on_phone, kept up to date as cases are
+    # added and removed so that the state hash doesn't need to be rebuilt from scratch.
+    # None if unknown, e.g. for logs saved before this was added. Assigning
+    # case_ids_on_phone resets it, but code that mutates the set in place must go
+    # through _add_case_id / _remove_case_id.
+    case_ids_digest = StringProperty()
+    # the number of case ids that case_ids_digest covers. Workers running code from
+    # before the digest was added (during a rolling deploy or after a rollback) keep
+    # both as unknown (dynamic) properties, and change case_ids_on_phone without
+    # updating them. The digest is rebuilt if the count does not match the case ids.
+    case_ids_digest_count = IntegerProperty()
 
     _purged_cases = None
+    # the encoded value of SyncLogSQL.compact_case_ids, until it is decoded
+    # into case_ids_on_phone and dependent_case_ids_on_phone
+    _compact_case_ids = None
+    _compact_case_id_sets = None
 
     @property
     def purged_cases(self):
@@ -628,16 +704,84 @@ class SimplifiedSyncLog(AbstractSyncLog):
         return self.device_id and self.device_id.startswith("WebAppsLogin")
 
     def case_count(self):
-        return len(self.case_ids_on_phone)
+        return len(self.get_case_ids_on_phone())
 
     def phone_is_holding_case(self, case_id):
         """
         Whether the phone currently has a case, according to this sync log
         """
-        return case_id in self.case_ids_on_phone
+        return case_id in self.get_case_ids_on_phone()
 
     def get_footprint_of_cases_on_phone(self):
-        return list(self.case_ids_on_phone)
+        return list(self.get_case_ids_on_phone())
+
+    def get_case_ids_on_phone(self):
+        """
+        A read only set-like view of case_ids_on_phone that supports membership
+        tests and set operations without decoding compact case ids.
+        """
+        if self._compact_case_ids is not None:
+            case_ids_on_phone, _ = self._get_compact_case_id_sets()
+            return case_ids_on_phone
+        return self.case_ids_on_phone
+
+    def _get_compact_case_id_sets(self):
+        if self._compact_case_id_sets is None:
+            self._compact_case_id_sets = decode_case_id_sets(self._compact_case_ids)
+        return self._compact_case_id_sets
+
+    def load_compact_case_ids(self):
+        """Decode compact case ids, if there are any, into regular sets"""
+        if self._compact_case_ids is not None:
+            case_ids_on_phone, dependent_case_ids_on_phone = self._get_compact_case_id_sets()
+            self._compact_case_ids = self._compact_case_id_sets = None
+            self['case_ids_on_phone'] = set(case_ids_on_phone)
+            self['dependent_case_ids_on_phone'] = set(dependent_case_ids_on_phone)
+
+    def to_compact_json(self):
+        """
+        Returns the JSON of this sync log without the case id sets, and the case id
+        sets encoded with encode_case_id_sets
+        """
+        if self._compact_case_ids is not None:
+            # the case ids haven't been touched since they were loaded
+            compact_case_ids = self._compact_case_ids
+        else:
+            compact_case_ids = encode_case_id_sets([self.case_ids_on_phone, self.dependent_case_ids_on_phone])
+        doc = self.to_json()
+        doc.pop('case_ids_on_phone', None)
+        doc.pop('dependent_case_ids_on_phone', None)
+        return doc, compact_case_ids
+
+    def get_state_hash(self):
+        if not self.get_case_ids_on_phone():
+            return CaseStateHash(EMPTY_HASH)
+        return CaseStateHash(self._get_case_ids_digest())
+
+    def save(self):
+        self._get_case_ids_digest()
+        super(SimplifiedSyncLog, self).save()
+
+    def _get_case_ids_digest(self):
+        case_ids = self.get_case_ids_on_phone()
+        if self.case_ids_digest is None or self.case_ids_digest_count != len(case_ids):
+            self.case_ids_digest = format_digest(get_digest(case_ids))
+            self.case_ids_digest_count = len(case_ids)
+        return self.case_ids_digest
+
+    def _add_case_id(self, case_id):
+        if case_id not in self.case_ids_on_phone:
+            self.case_ids_on_phone.add(case_id)
+            self._toggle_case_id_digest(case_id, 1)
+
+    def _remove_case_id(self, case_id):
+        self.case_ids_on_phone.remove(case_id)
+        self._toggle_case_id_digest(case_id, -1)
+
+    def _toggle_case_id_digest(self, case_id, count_change):
+        if self.case_ids_digest is not None and self.case_ids_digest_count is not None:
+            self.case_ids_digest = format_digest(int(self.case_ids_digest, 16) ^ get_id_digest(case_id))
+            self.case_ids_digest_count += count_change
 
     @property
     def primary_case_ids(self):
@@ -777,7 +921,7 @@ class SimplifiedSyncLog(AbstractSyncLog):
         deleted_indices.update(self.extension_index_tree.indices.pop(to_remove, {}))
 
         try:
-            self.case_ids_on_phone.remove(to_remove)
+            self._remove_case_id(to_remove)
         except KeyError:
             should_fail_softly = not xform_id or _domain_has_legacy_toggle_set()
             if should_fail_softly:
@@ -798,7 +942,7 @@ class SimplifiedSyncLog(AbstractSyncLog):
             self.dependent_case_ids_on_phone.remove(to_remove)
 
     def _add_primary_case(self, case_id):
-        self.case_ids_on_phone.add(case_id)
+        self._add_case_id(case_id)
         if case_id in self.dependent_case_ids_on_phone:
             self.dependent_case_ids_on_phone.remove(case_id)
 
@@ -935,7 +1079,7 @@ class SimplifiedSyncLog(AbstractSyncLog):
             )
             if is_dependent:
                 _get_logger().debug('adding dependent case %s', case_id)
-                self.case_ids_on_phone.add(case_id)
+                self._add_case_id(case_id)
                 self.dependent_case_ids_on_phone.add(case_id)
 
                 for update in non_live_updates_by_case_id[case_id]:
@@ -947,7 +1091,7 @@ class SimplifiedSyncLog(AbstractSyncLog):
             for update in non_live_updates_by_case_id[case_id]:
                 if update.has_extension_indices_to_add():
                     # non-live cases with extension indices should be added and processed
-                    self.case_ids_on_phone.add(update.case_id)
+                    self._add_case_id(update.case_id)
                     for index in update.indices_to_add:
                         self._add_index(index, update)
                     made_changes = True
@@ -1052,4 +1196,6 @@ def properly_wrap_sync_log(doc, synclog_sql=None):
     synclog = SimplifiedSyncLog.wrap(doc)
     if synclog_sql:
         synclog._synclog_sql = synclog_sql
+        if synclog_sql.compact_case_ids is not None:
+            synclog._compact_case_ids = bytes(synclog_sql.compact_case_ids)
     return synclog
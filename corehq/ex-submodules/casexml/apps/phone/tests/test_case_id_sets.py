@@ -0,0 +1,87 @@
+import uuid
+
+from django.test import SimpleTestCase
+
+from casexml.apps.phone.case_id_sets import (
+    CompactCaseIdSet,
+    decode_case_id_sets,
+    encode_case_id_sets,
+)
+from casexml.apps.phone.models import (
+    SimplifiedSyncLog,
+    SyncLogSQL,
+    properly_wrap_sync_log,
+)
+
+
+class CaseIdSetsTest(SimpleTestCase):
+
+    def setUp(self):
+        self.case_ids = (
+            {uuid.uuid4().hex for i in range(50)}
+            | {str(uuid.uuid4()) for i in range(50)}
+            | {'not-a-uuid', uuid.uuid4().hex.upper(), 'ünicode'}
+        )
+
+    def test_round_trip(self):
+        for compress in [True, False]:
+            case_ids, empty = decode_case_id_sets(encode_case_id_sets([self.case_ids, set()], compress))
+            self.assertIsInstance(case_ids, CompactCaseIdSet)
+            self.assertEqual(len(case_ids), len(self.case_ids))
+            self.assertEqual(set(case_ids), self.case_ids)
+            self.assertEqual(set(empty), set())
+
+    def test_membership(self):
+        [case_ids] = decode_case_id_sets(encode_case_id_sets([self.case_ids]))
+        for case_id in self.case_ids:
+            self.assertIn(case_id, case_ids)
+        for case_id in [uuid.uuid4().hex, str(uuid.uuid4()), 'other', None]:
+            self.assertNotIn(case_id, case_ids)
+
+    def test_hex_and_dashed_ids_are_distinct(self):
+        case_id = uuid.uuid4()
+        [case_ids] = decode_case_id_sets(encode_case_id_sets([{case_id.hex}]))
+        self.assertIn(case_id.hex, case_ids)
+        self.assertNotIn(str(case_id), case_ids)
+        self.assertNotIn(case_id.hex.upper(), case_ids)
+
+    def test_difference(self):
+        [case_ids] = decode_case_id_sets(encode_case_id_sets([self.case_ids]))
+        new_id = uuid.uuid4().hex
+        live_ids = {new_id, 'not-a-uuid', next(iter(self.case_ids))}
+        self.assertEqual(live_ids - case_ids, live_ids - self.case_ids)
+
+
+class CompactSyncLogTest(SimpleTestCase):
+
+    def _compact_round_trip(self, sync_log):
+        doc, compact_case_ids = sync_log.to_compact_json()
+        self.assertNotIn('case_ids_on_phone', doc)
+        return properly_wrap_sync_log(doc, SyncLogSQL(compact_case_ids=compact_case_ids))
+
+    def test_round_trip(self):
+        sync_log = self._compact_round_trip(
+            SimplifiedSyncLog(case_ids_on_phone={'a', 'b'}, dependent_case_ids_on_phone={'b'})
+        )
+        self.assertEqual(sync_log.case_count(), 2)
+        self.assertTrue(sync_log.phone_is_holding_case('a'))
+        self.assertIsInstance(sync_log.get_case_ids_on_phone(), CompactCaseIdSet)
+
+        self.assertEqual(sync_log.case_ids_on_phone, {'a', 'b'})
+        self.assertEqual(sync_log.dependent_case_ids_on_phone, {'b'})
+        self.assertNotIsInstance(sync_log.get_case_ids_on_phone(), CompactCaseIdSet)
+
+    def test_assignment_replaces_compact_case_ids(self):
+        sync_log = self._compact_round_trip(
+            SimplifiedSyncLog(case_ids_on_phone={'a', 'b'}, dependent_case_ids_on_phone={'b'})
+        )
+        sync_log.case_ids_on_phone = {'c'}
+        self.assertEqual(sync_log.case_ids_on_phone, {'c'})
+        self.assertEqual(sync_log.dependent_case_ids_on_phone, {'b'})
+        self.assertEqual(set(self._compact_round_trip(sync_log).get_case_ids_on_phone()), {'c'})
+
+    def test_json_synclog(self):
+        sync_log = properly_wrap_sync_log(
+            SimplifiedSyncLog(case_ids_on_phone={'a'}).to_json(), SyncLogSQL()
+        )
+        self.assertEqual(sync_log.get_case_ids_on_phone(), {'a'})
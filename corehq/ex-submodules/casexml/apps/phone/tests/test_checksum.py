@@ -0,0 +1,88 @@
+import binascii
+import uuid
+from functools import reduce
+
+from django.test import SimpleTestCase
+
+from casexml.apps.phone.checksum import EMPTY_HASH, CaseStateHash, Checksum
+from casexml.apps.phone.models import IndexTree, SimplifiedSyncLog
+
+
+class ChecksumTest(SimpleTestCase):
+
+    def test_matches_bytewise_xor(self):
+        for count in [1, 2, 3, 100]:
+            ids = [uuid.uuid4().hex for i in range(count)]
+            expected = binascii.hexlify(bytes(reduce(Checksum.xor, map(Checksum.hash, ids)))).decode('utf-8')
+            self.assertEqual(Checksum(ids).hexdigest(), expected)
+
+    def test_digest_is_zero_padded(self):
+        # the same id twice cancels out, but still isn't the empty hash
+        self.assertEqual(Checksum(['abc123', 'abc123']).hexdigest(), '0' * 32)
+
+
+class SyncLogStateHashTest(SimpleTestCase):
+
+    def assertStateHash(self, sync_log):
+        self.assertEqual(
+            sync_log.get_state_hash(),
+            CaseStateHash(Checksum(list(sync_log.case_ids_on_phone)).hexdigest()),
+        )
+
+    def test_empty(self):
+        self.assertEqual(SimplifiedSyncLog().get_state_hash(), CaseStateHash(EMPTY_HASH))
+
+    def test_unknown_digest_is_computed(self):
+        sync_log = SimplifiedSyncLog(case_ids_on_phone={'a', 'b', 'c'})
+        self.assertIsNone(sync_log.case_ids_digest)
+        self.assertStateHash(sync_log)
+        self.assertIsNotNone(sync_log.case_ids_digest)
+
+    def test_digest_updated_as_cases_change(self):
+        parent_id, child_id, other_id = 'parent', 'child', 'other'
+        sync_log = SimplifiedSyncLog(
+            index_tree=IndexTree(indices={child_id: {'parent': parent_id}}),
+            case_ids_on_phone={parent_id, child_id},
+            dependent_case_ids_on_phone={parent_id},
+        )
+        self.assertStateHash(sync_log)
+
+        sync_log._add_primary_case(other_id)
+        self.assertStateHash(sync_log)
+        sync_log._add_primary_case(other_id)
+        self.assertStateHash(sync_log)
+
+        sync_log.purge(child_id)
+        self.assertEqual(sync_log.case_ids_on_phone, {other_id})
+        self.assertStateHash(sync_log)
+
+        sync_log.purge(other_id)
+        self.assertEqual(sync_log.get_state_hash(), CaseStateHash(EMPTY_HASH))
+
+    def test_assigning_case_ids_resets_digest(self):
+        sync_log = SimplifiedSyncLog(case_ids_on_phone={'a', 'b'})
+        self.assertStateHash(sync_log)
+        sync_log.case_ids_on_phone = {'c'}
+        self.assertIsNone(sync_log.case_ids_digest)
+        self.assertStateHash(sync_log)
+
+        sync_log.dependent_case_ids_on_phone = {'c'}
+        self.assertIsNotNone(sync_log.case_ids_digest)
+
+    def test_stale_digest_is_recomputed(self):
+        sync_log = SimplifiedSyncLog(case_ids_on_phone={'a', 'b'})
+        self.assertStateHash(sync_log)
+        # code from before the digest was added changes the cases without updating it
+        sync_log.case_ids_on_phone.add('c')
+        self.assertStateHash(sync_log)
+        sync_log.case_ids_on_phone.remove('a')
+        self.assertStateHash(sync_log)
+
+    def test_digest_without_count_is_recomputed(self):
+        sync_log = SimplifiedSyncLog.wrap({
+            'doc_type': 'SimplifiedSyncLog',
+            'case_ids_on_phone': ['a', 'b', 'c'],
+            'case_ids_digest': Checksum(['a', 'b']).hexdigest(),
+        })
+        self.assertStateHash(sync_log)
+        self.assertEqual(sync_log.case_ids_digest_count, 3)
@@ -83,6 +83,25 @@ class CsvFileWriterTests(SimpleTestCase):
         file_start = writer.get_file().read(6)
         self.assertEqual(file_start, BOM_UTF8 + b'100')
 
+    def test_csv_file_writer_rows(self):
+        rows = [['ham', b'sp\xc3\xa1m', 1], ['a "quoted", value', None, 'line\nbreak']]
+
+        def _get_content(write):
+            writer = CsvFileWriter()
+            writer.open('Spam')
+            write(writer)
+            writer.finish()
+            return writer.get_file().read()
+
+        def _write_one_at_a_time(writer):
+            for row in rows:
+                writer.write_row(row)
+
+        self.assertEqual(
+            _get_content(lambda writer: writer.write_rows(rows)),
+            _get_content(_write_one_at_a_time),
+        )
+
 
 class HtmlExportWriterTests(SimpleTestCase):
 
@@ -95,6 +95,10 @@ class ExportFileWriter(object):
     def write_row(self, row):
         raise NotImplementedError
 
+    def write_rows(self, rows):
+        for row in rows:
+            self.write_row(row)
+
     def _end_file(self):
         pass
 
@@ -116,12 +120,15 @@ class CsvFileWriter(ExportFileWriter):
         self._file.write(BOM_UTF8)
 
     def write_row(self, row):
+        self.write_rows([row])
+
+    def write_rows(self, rows):
         buffer = io.StringIO()
         csvwriter = csv.writer(buffer, csv.excel)
-        csvwriter.writerow([
-            col.decode('utf-8') if isinstance(col, bytes) else col
-            for col in row
-        ])
+        csvwriter.writerows(
+            [col.decode('utf-8') if isinstance(col, bytes) else col for col in row]
+            for row in rows
+        )
         self._file.write(buffer.getvalue().encode('utf-8'))
 
 
@@ -217,6 +224,7 @@ class ExportWriter(object):
         """
         assert self._isopen
         for table_index, table in document_table:
+            rows = []
             for i, row in enumerate(table):
                 if skip_first and i == 0:
                     continue
@@ -229,7 +237,8 @@ class ExportWriter(object):
                 if row_has_id:
                     row.id = (self._current_primary_id,) + tuple(row.id[1:])
 
-                self.write_row(table_index, row)
+                rows.append(row)
+            self.write_rows(table_index, rows)
 
         self._current_primary_id += 1
 
@@ -241,6 +250,13 @@ class ExportWriter(object):
         """
         return self._write_row(table_index, row)
 
+    def write_rows(self, table_index, rows):
+        """
+        Write several rows to the same table. Subclasses can implement
+        _write_rows to write them more efficiently than one at a time.
+        """
+        return self._write_rows(table_index, rows)
+
     def close(self):
         """
         Close any open file references, do any cleanup.
@@ -258,6 +274,10 @@ class ExportWriter(object):
     def _write_row(self, sheet_index, row):
         raise NotImplementedError
 
+    def _write_rows(self, sheet_index, rows):
+        for row in rows:
+            self._write_row(sheet_index, row)
+
     def _close(self):
         raise NotImplementedError
 
@@ -286,6 +306,9 @@ class OnDiskExportWriter(ExportWriter):
         self.table_names[table_index] = table_title
 
     def _write_row(self, sheet_index, row):
+        self._write_rows(sheet_index, [row])
+
+    def _write_rows(self, sheet_index, rows):
 
         def _transform(val):
             if val is None:
@@ -294,8 +317,7 @@ class OnDiskExportWriter(ExportWriter):
                 val = val.encode("utf8")
             return val
 
-        row = list(map(_transform, row))
-        self.tables[sheet_index].write_row(row)
+        self.tables[sheet_index].write_rows([list(map(_transform, row)) for row in rows])
 
     def _close(self):
         """
@@ -380,8 +402,16 @@ class Excel2007ExportWriter(ExportWriter):
         self.table_indices[table_index] = 0
 
     def _write_row(self, sheet_index, row):
-        from couchexport.export import FormattedRow
+        self._write_rows(sheet_index, [row])
+
+    def _write_rows(self, sheet_index, rows):
         sheet = self.tables[sheet_index]
+        append = sheet.append
+        for row in rows:
+            append(self._get_cells(sheet, row))
+
+    def _get_cells(self, sheet, row):
+        from couchexport.export import FormattedRow
 
         cells = []
         for col_ind, val in enumerate(row):
@@ -406,7 +436,7 @@ class Excel2007ExportWriter(ExportWriter):
                 cells[hyperlink_column_index].hyperlink = cells[hyperlink_column_index].value
                 cells[hyperlink_column_index].style = 'Hyperlink'
 
-        sheet.append(cells)
+        return cells
 
     def _close(self):
         """
@@ -462,6 +492,9 @@ class InMemoryExportWriter(ExportWriter):
         # have to deal with primary ids
         table.append(list(row))
 
+    def _write_rows(self, sheet_index, rows):
+        self.tables[sheet_index].extend(list(row) for row in rows)
+
     def _close(self):
         pass
 
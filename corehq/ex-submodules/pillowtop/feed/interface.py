@@ -67,6 +67,9 @@ class Change(object):
         self.metadata = metadata
         self.document_store = document_store
         self.error_raised = None
+        # offsets of the change feed when this change was read, if the feed may
+        # have been read further before the change is checkpointed
+        self.processed_offsets = None
         self._document_checked = False
         self._dict = {
             'id': self.id,
@@ -12,6 +12,8 @@ from pillowtop.utils import (
     get_pillow_by_name
 )
 
+from corehq.apps.change_feed.document_cache import enable_document_cache
+
 
 class Command(BaseCommand):
     help = "Run pillows pillows listed in settings."
@@ -78,6 +80,24 @@ class Command(BaseCommand):
             help="The batch size for this pillow. Some pillows process changes in bulk, "
             "setting this value to 1 will process each change as it comes in.",
         )
+        parser.add_argument(
+            '--processor-pipeline-depth',
+            action='store',
+            dest='processor_pipeline_depth',
+            default=0,
+            type=int,
+            help="The number of chunks to prepare for batch processors that support it while "
+            "earlier chunks are loaded. 0 (the default) processes one chunk at a time.",
+        )
+        parser.add_argument(
+            '--document-cache-size',
+            action='store',
+            dest='document_cache_size',
+            default=settings.PILLOW_DOCUMENT_CACHE_SIZE,
+            type=int,
+            help="The size in bytes of the cache of form and case documents shared by the "
+            "processors of this process. 0 disables the cache.",
+        )
         parser.add_argument(
             '--dedicated-migration-process',
             action='store_true',
@@ -102,10 +122,16 @@ class Command(BaseCommand):
         num_processes = options['num_processes']
         process_number = options['process_number']
         processor_chunk_size = options['processor_chunk_size']
+        processor_pipeline_depth = options['processor_pipeline_depth']
+        document_cache_size = options['document_cache_size']
         dedicated_migration_process = options['dedicated_migration_process']
         exclude_ucrs = options['exclude_ucrs']
         assert 0 <= process_number < num_processes
         assert processor_chunk_size
+        assert processor_pipeline_depth >= 0
+        assert document_cache_size >= 0
+        if document_cache_size:
+            enable_document_cache(document_cache_size)
         if list_all:
             print("\nPillows registered in system:")
             for config in get_all_pillow_configs():
@@ -134,6 +160,7 @@ class Command(BaseCommand):
             pillow = get_pillow_by_name(pillow_name, num_processes=num_processes, process_num=process_number,
             processor_chunk_size=processor_chunk_size, dedicated_migration_process=dedicated_migration_process,
             **other_options)
+            pillow.processor_pipeline_depth = processor_pipeline_depth
             start_pillow(pillow)
             sys.exit()
         elif list_checkpoints:
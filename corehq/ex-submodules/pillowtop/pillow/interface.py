@@ -1,9 +1,11 @@
 import time
 from abc import ABCMeta, abstractproperty, abstractmethod
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from django.conf import settings
+from django.db import close_old_connections
 from memoized import memoized
 
 import sys
@@ -55,6 +57,10 @@ class PillowBase(metaclass=ABCMeta):
     retry_errors = True
     # this will be the batch size for processors that support batch processing
     processor_chunk_size = 0
+    # set to the number of chunks that may be prepared (documents fetched and
+    # transformed) on a worker thread while earlier chunks are loaded, for batch
+    # processors that support pipelined processing. 0 disables pipelining.
+    processor_pipeline_depth = 0
 
     @abstractproperty
     def pillow_id(self):
@@ -112,8 +118,15 @@ class PillowBase(metaclass=ABCMeta):
                 processor.bootstrap_if_needed()
             time.sleep(10)
         else:
-            while True:
-                self.process_changes(since=self.get_last_checkpoint_sequence(), forever=True)
+            try:
+                while True:
+                    self.process_changes(since=self.get_last_checkpoint_sequence(), forever=True)
+            finally:
+                self.shutdown_processors()
+
+    def shutdown_processors(self):
+        for processor in self.processors:
+            processor.shutdown()
 
     def _update_checkpoint(self, change, context):
         if change and context:
@@ -139,6 +152,13 @@ class PillowBase(metaclass=ABCMeta):
         else:
             return self.processors
 
+    def _get_chunk_pipeline(self):
+        if self.processor_pipeline_depth and any(
+            processor.supports_pipelined_processing for processor in self.batch_processors
+        ):
+            return ChunkPipeline(self, self.processor_pipeline_depth)
+        return None
+
     def process_changes(self, since, forever):
         """
         Process changes on all the pillow processors.
@@ -149,13 +169,25 @@ class PillowBase(metaclass=ABCMeta):
         """
         context = PillowRuntimeContext(changes_seen=0)
         min_wait_seconds = 30
+        pipeline = self._get_chunk_pipeline()
 
-        def process_offset_chunk(chunk, context):
-            if not chunk:
-                return
-            self._batch_process_with_error_handling(chunk)
+        def on_chunk_processed(chunk):
+            # update checkpoint for just the latest change
             self._update_checkpoint(chunk[-1], context)
 
+        def process_chunk(chunk):
+            if pipeline is not None:
+                pipeline.add(chunk, on_chunk_processed)
+            else:
+                self._batch_process_with_error_handling(chunk)
+                on_chunk_processed(chunk)
+
+        def process_offset_chunk(chunk, context):
+            if chunk:
+                process_chunk(chunk)
+            if pipeline is not None:
+                pipeline.drain(on_chunk_processed)
+
         # keep track of chunk for batch processors
         changes_chunk = []
         last_process_time = datetime.utcnow()
@@ -172,9 +204,7 @@ class PillowBase(metaclass=ABCMeta):
                         time_elapsed = (datetime.utcnow() - last_process_time).seconds > min_wait_seconds
                         if chunk_full or time_elapsed:
                             last_process_time = datetime.utcnow()
-                            self._batch_process_with_error_handling(changes_chunk)
-                            # update checkpoint for just the latest change
-                            self._update_checkpoint(changes_chunk[-1], context)
+                            process_chunk(changes_chunk)
                             # reset for next chunk
                             changes_chunk = []
                     else:
@@ -183,16 +213,29 @@ class PillowBase(metaclass=ABCMeta):
                         self._record_change_in_datadog(change, processing_time)
                         self._update_checkpoint(change, context)
                 else:
+                    if pipeline is not None:
+                        # load the chunks prepared before the feed went idle,
+                        # rather than waiting for the next chunk to be added
+                        pipeline.drain(on_chunk_processed)
                     self._update_checkpoint(None, None)
             process_offset_chunk(changes_chunk, context)
         except PillowtopCheckpointReset:
             process_offset_chunk(changes_chunk, context)
+            if pipeline is not None:
+                # the recursive call starts a pipeline of its own
+                pipeline.close()
+                pipeline = None
             self.process_changes(since=self.get_last_checkpoint_sequence(), forever=forever)
+        finally:
+            if pipeline is not None:
+                # chunks that were not loaded are processed again after a restart,
+                # since the checkpoint was not updated past them
+                pipeline.close()
         if forever:
             if context.changes_seen and change:
                 self._update_checkpoint(change, context)
 
-    def _batch_process_with_error_handling(self, changes_chunk):
+    def _batch_process_with_error_handling(self, changes_chunk, prepared_chunks=None):
         """
         Process given chunk in batch mode first on batch-processors
             and only latter on serial processors one by one, so that
@@ -203,6 +246,9 @@ class PillowBase(metaclass=ABCMeta):
 
             If there is an exception in chunked processing, falls back
             to serial processing.
+
+        :param prepared_chunks: optional list returned by ``_prepare_changes_chunk``
+            for this chunk. Processors with a prepared chunk only load it.
         """
         processing_time = 0
 
@@ -210,15 +256,19 @@ class PillowBase(metaclass=ABCMeta):
             for change in chunk:
                 self.process_with_error_handling(change, processor)
 
-        for processor in self.batch_processors:
+        for index, processor in enumerate(self.batch_processors):
             if not changes_chunk:
                 return set(), 0
 
             changes_chunk = self._deduplicate_changes(changes_chunk)
+            prepared = prepared_chunks[index] if prepared_chunks else None
             timer = TimingContext()
             with timer:
                 try:
-                    retry_changes, change_exceptions = processor.process_changes_chunk(changes_chunk)
+                    if prepared is not None:
+                        retry_changes, change_exceptions = processor.load_prepared_changes_chunk(prepared)
+                    else:
+                        retry_changes, change_exceptions = processor.process_changes_chunk(changes_chunk)
                 except Exception as ex:
                     notify_exception(
                         None,
@@ -243,6 +293,24 @@ class PillowBase(metaclass=ABCMeta):
             processing_time += self.process_with_error_handling(change)
         self._record_datadog_metrics(changes_chunk, processing_time)
 
+    def _prepare_changes_chunk(self, changes_chunk):
+        """
+        Prepare the chunk for the batch processors that support pipelined
+        processing. Runs on a worker thread in pipelined pillows.
+
+        :returns: list with the prepared chunk of each batch processor, or None
+            for processors that do not support pipelined processing.
+        """
+        changes_chunk = self._deduplicate_changes(changes_chunk)
+        try:
+            return [
+                processor.prepare_changes_chunk(changes_chunk)
+                if processor.supports_pipelined_processing else None
+                for processor in self.batch_processors
+            ]
+        finally:
+            close_old_connections()
+
     def process_with_error_handling(self, change, processor=None):
         # process given change on all serial processors or given processor.
         # Tracks success/fail in datadog but not the timer metric, caller updates that
@@ -401,6 +469,65 @@ class PillowBase(metaclass=ABCMeta):
         return unique
 
 
+class ChunkPipeline(object):
+    """
+    Prepares chunks of changes for a pillow's batch processors on a worker
+    thread, so that the documents of the next chunks are fetched and
+    transformed while the current chunk is loaded.
+
+    Chunks are loaded by the thread that adds them, in the order they were
+    added, and no more than ``depth`` chunks are waiting to be loaded at a
+    time. If preparing a chunk fails, it is processed as if the pillow
+    were not pipelined.
+    """
+
+    def __init__(self, pillow, depth):
+        self.pillow = pillow
+        self.depth = depth
+        self._pending = deque()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pillow-pipeline')
+
+    def add(self, changes_chunk, on_chunk_processed):
+        """
+        Start preparing the chunk, and load chunks until no more than ``depth``
+        are waiting. ``on_chunk_processed`` is called with each loaded chunk.
+        """
+        # the feed has been read up to the end of this chunk, but may be read
+        # further before the chunk is loaded, so that checkpoints must only
+        # include the changes read so far
+        changes_chunk[-1].processed_offsets = self.pillow.get_change_feed().get_processed_offsets()
+        future = self._executor.submit(self.pillow._prepare_changes_chunk, changes_chunk)
+        self._pending.append((changes_chunk, future))
+        while len(self._pending) > self.depth:
+            self._process_next(on_chunk_processed)
+
+    def drain(self, on_chunk_processed):
+        while self._pending:
+            self._process_next(on_chunk_processed)
+
+    def close(self):
+        self._pending.clear()
+        self._executor.shutdown(wait=True)
+
+    def _process_next(self, on_chunk_processed):
+        changes_chunk, future = self._pending.popleft()
+        try:
+            prepared_chunks = future.result()
+        except Exception as ex:
+            notify_exception(
+                None,
+                "{pillow_name} Error in preparing changes chunk: {ex}".format(
+                    pillow_name=self.pillow.get_name(),
+                    ex=ex
+                ),
+                details={
+                    'change_ids': [c.id for c in changes_chunk]
+                })
+            prepared_chunks = None
+        self.pillow._batch_process_with_error_handling(changes_chunk, prepared_chunks)
+        on_chunk_processed(changes_chunk)
+
+
 class ChangeEventHandler(metaclass=ABCMeta):
     """
     A change-event-handler object used in constructed pillows.
@@ -140,8 +140,13 @@ class BulkElasticProcessor(ElasticProcessor, BulkPillowProcessor):
       - ES
     """
 
+    supports_pipelined_processing = True
+
     def process_changes_chunk(self, changes_chunk):
         logger.info('Processing chunk of changes in BulkElasticProcessor')
+        return self.load_prepared_changes_chunk(self.prepare_changes_chunk(changes_chunk))
+
+    def prepare_changes_chunk(self, changes_chunk):
         if self.change_filter_fn:
             changes_chunk = [
                 change for change in changes_chunk
@@ -164,10 +169,13 @@ class BulkElasticProcessor(ElasticProcessor, BulkPillowProcessor):
                 error_collector,
             )
             error_changes = error_collector.errors
+        return retry_changes, error_changes, changes_to_process, es_actions
 
+    def load_prepared_changes_chunk(self, prepared_chunk):
+        retry_changes, error_changes, changes_to_process, es_actions = prepared_chunk
         try:
             with self._datadog_timing('bulk_load'):
-                _, errors = self.adapter.bulk(
+                _, errors = self.adapter.bulk_ndjson(
                     es_actions,
                     raise_errors=False,
                 )
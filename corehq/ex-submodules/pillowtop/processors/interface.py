@@ -14,12 +14,21 @@ class PillowProcessor(metaclass=ABCMeta):
     def bootstrap_if_needed(self):
         pass
 
+    def shutdown(self):
+        """Release any resources (e.g. worker threads) held by the processor.
+        Called when the pillow stops running."""
+        pass
+
 
 class BulkPillowProcessor(PillowProcessor):
     # To make the pillow process in chunks, create and use a processor
     #   that extends this class.
 
     supports_batch_processing = True
+    # Set to True in processors that implement prepare_changes_chunk and
+    #   load_prepared_changes_chunk, so that pipelined pillows can prepare
+    #   the next chunk while the current one is being loaded.
+    supports_pipelined_processing = False
 
     @abstractmethod
     def process_changes_chunk(self, changes_chunk):
@@ -32,3 +41,21 @@ class BulkPillowProcessor(PillowProcessor):
             reprocessed but for which exceptions are to be handled by handle_pillow_error
         """
         pass
+
+    def prepare_changes_chunk(self, changes_chunk):
+        """
+        Should do the part of processing changes_chunk that does not write
+            anything, e.g. fetching and transforming documents, and return
+            whatever load_prepared_changes_chunk needs to finish processing it.
+
+            Runs on a worker thread while earlier chunks are loaded.
+        """
+        raise NotImplementedError
+
+    def load_prepared_changes_chunk(self, prepared_chunk):
+        """
+        Should finish processing a chunk prepared by prepare_changes_chunk.
+
+            Must return the same as process_changes_chunk.
+        """
+        raise NotImplementedError
@@ -1,11 +1,14 @@
+import threading
 import uuid
 from unittest.mock import patch
 
 from django.test import SimpleTestCase, TestCase
 
 from pillowtop.feed.interface import Change, ChangeMeta
-from pillowtop.pillow.interface import PillowBase
+from pillowtop.feed.mock import MockChangeFeed
+from pillowtop.pillow.interface import ChangeEventHandler, ConstructedPillow, PillowBase
 from pillowtop.processors.elastic import BulkElasticProcessor
+from pillowtop.processors.interface import BulkPillowProcessor
 from pillowtop.utils import bulk_fetch_changes_docs, get_errors_with_ids
 
 from corehq.apps.change_feed.data_sources import SOURCE_COUCH
@@ -48,6 +51,117 @@ class BulkTest(SimpleTestCase):
         self.assertEqual([(1, 'e1'), (2, 'e2')], errors)
 
 
+class PipelinedPillowTest(SimpleTestCase):
+
+    def _get_pillow(self, processor, pipeline_depth=1, idle_after=None):
+        changes = [
+            Change(
+                id=str(seq),
+                sequence_id=seq,
+                metadata=ChangeMeta(document_id=str(seq), data_source_type='test', data_source_name='test'),
+            )
+            for seq in range(6)
+        ]
+        if idle_after is not None:
+            # the feed yields None when there are no new changes
+            changes.insert(idle_after, None)
+        self.checkpoint_handler = RecordingCheckpointEventHandler()
+        pillow = ConstructedPillow(
+            name='pipelined-pillow',
+            checkpoint=None,
+            change_feed=MockChangeFeed(changes),
+            processor=processor,
+            change_processed_event_handler=self.checkpoint_handler,
+            processor_chunk_size=2,
+        )
+        pillow.processor_pipeline_depth = pipeline_depth
+        return pillow
+
+    def test_pipelined_processing(self):
+        processor = PipelinedProcessor()
+        self._get_pillow(processor).process_changes(since=0, forever=False)
+
+        self.assertEqual(processor.loaded, [['0', '1'], ['2', '3'], ['4', '5']])
+        self.assertEqual(processor.processed, [])
+        self.assertNotIn(threading.get_ident(), processor.prepared_in_threads)
+        # checkpoints are updated in order, with the offsets read before each chunk was prepared
+        self.assertEqual(self.checkpoint_handler.checkpoints, [
+            ('1', {'test': 1}),
+            ('3', {'test': 3}),
+            ('5', {'test': 5}),
+        ])
+
+    def test_pipelining_disabled(self):
+        processor = PipelinedProcessor()
+        self._get_pillow(processor, pipeline_depth=0).process_changes(since=0, forever=False)
+
+        self.assertEqual(processor.processed, [['0', '1'], ['2', '3'], ['4', '5']])
+        self.assertEqual(processor.loaded, [])
+        self.assertEqual(
+            self.checkpoint_handler.checkpoints,
+            [('1', None), ('3', None), ('5', None)]
+        )
+
+    def test_failure_to_prepare_falls_back_to_serial_path(self):
+        processor = PipelinedProcessor(fail_to_prepare={'2'})
+        with patch('pillowtop.pillow.interface.notify_exception'):
+            self._get_pillow(processor).process_changes(since=0, forever=False)
+
+        self.assertEqual(processor.loaded, [['0', '1'], ['4', '5']])
+        self.assertEqual(processor.processed, [['2', '3']])
+        self.assertEqual([seq for seq, offsets in self.checkpoint_handler.checkpoints], ['1', '3', '5'])
+
+    def test_idle_feed_loads_prepared_chunks(self):
+        processor = PipelinedProcessor()
+        pillow = self._get_pillow(processor, pipeline_depth=2, idle_after=2)
+        loaded_when_idle = []
+        with patch.object(pillow, 'checkpoint') as checkpoint:
+            checkpoint.touch.side_effect = lambda **kw: loaded_when_idle.extend(processor.loaded)
+            pillow.process_changes(since=0, forever=False)
+
+        self.assertEqual(loaded_when_idle, [['0', '1']])
+        self.assertEqual(processor.loaded, [['0', '1'], ['2', '3'], ['4', '5']])
+        self.assertEqual([seq for seq, offsets in self.checkpoint_handler.checkpoints], ['1', '3', '5'])
+
+
+class PipelinedProcessor(BulkPillowProcessor):
+    supports_pipelined_processing = True
+
+    def __init__(self, fail_to_prepare=()):
+        self.fail_to_prepare = set(fail_to_prepare)
+        self.prepared_in_threads = set()
+        self.loaded = []
+        self.processed = []
+
+    def process_change(self, change):
+        raise NotImplementedError
+
+    def process_changes_chunk(self, changes_chunk):
+        self.processed.append([change.id for change in changes_chunk])
+        return [], []
+
+    def prepare_changes_chunk(self, changes_chunk):
+        self.prepared_in_threads.add(threading.get_ident())
+        change_ids = [change.id for change in changes_chunk]
+        if self.fail_to_prepare.intersection(change_ids):
+            raise ValueError('failed to prepare')
+        return change_ids
+
+    def load_prepared_changes_chunk(self, prepared_chunk):
+        self.loaded.append(prepared_chunk)
+        return [], []
+
+
+class RecordingCheckpointEventHandler(ChangeEventHandler):
+
+    def __init__(self):
+        self.checkpoints = []
+
+    def update_checkpoint(self, change, context):
+        self.checkpoints.append((change.id, change.processed_offsets))
+        return False
+
+
 @sharded
 @es_test(requires=[case_adapter], setup_class=True)
 class TestBulkDocOperations(TestCase):
@@ -115,7 +229,7 @@ class TestBulkDocOperations(TestCase):
         missing_case_ids = [uuid.uuid4().hex, uuid.uuid4().hex]
         changes = self._changes_from_ids(self.case_ids + missing_case_ids)
 
-        with patch.object(case_adapter, 'bulk', return_value=mock_response):
+        with patch.object(case_adapter, 'bulk_ndjson', return_value=mock_response):
             retry, errors = processor.process_changes_chunk(changes)
         self.assertEqual(
             set(missing_case_ids),
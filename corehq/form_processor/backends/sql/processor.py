@@ -10,6 +10,7 @@ from lxml import etree
 
 from casexml.apps.case import const
 from casexml.apps.case.xform import get_case_updates
+from corehq.apps.change_feed.producer import producer
 from corehq.form_processor.backends.sql.update_strategy import SqlCaseUpdateStrategy
 from corehq.form_processor.backends.sql.dbaccessors import LedgerAccessorSQL
 from corehq.form_processor.change_publishers import (
@@ -140,8 +141,17 @@ class FormProcessorSQL(object):
         except Exception as e:
             raise KafkaPublishingError(e)
 
+    @classmethod
+    def publish_changes_to_kafka(cls, processed_forms, cases, stock_result):
+        domain = processed_forms.submitted.domain
+        if toggles.BATCH_FORM_PROCESSING_KAFKA_CHANGES.enabled(domain, toggles.NAMESPACE_DOMAIN):
+            with producer.batch():
+                cls._publish_changes_to_kafka(processed_forms, cases, stock_result)
+        else:
+            cls._publish_changes_to_kafka(processed_forms, cases, stock_result)
+
     @staticmethod
-    def publish_changes_to_kafka(processed_forms, cases, stock_result):
+    def _publish_changes_to_kafka(processed_forms, cases, stock_result):
         publish_form_saved(processed_forms.submitted)
         cases = cases or []
         for case in cases:
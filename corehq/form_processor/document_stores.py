@@ -47,7 +47,7 @@ class FormDocumentStore(DocumentStore):
         return iter(XFormInstance.objects.iter_form_ids_by_xmlns(self.domain, self.xmlns))
 
     def iter_documents(self, ids):
-        for wrapped_form in XFormInstance.objects.iter_forms(ids, self.domain):
+        for wrapped_form in XFormInstance.objects.iter_forms(ids, self.domain, prefetch_xml=True):
             try:
                 yield self._to_json(wrapped_form)
             except (DocumentNotFoundError, MissingFormXml):
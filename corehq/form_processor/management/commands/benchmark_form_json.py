@@ -0,0 +1,94 @@
+import copy
+import os
+import timeit
+
+from django.core.management.base import BaseCommand
+
+import iso8601
+
+from couchforms import XMLSyntaxError
+from dimagi.utils.parsing import json_format_datetime
+
+import corehq
+from corehq.form_processor.utils.xform import (
+    RE_DATETIME_MATCH,
+    adjust_datetimes,
+    adjust_text_to_datetime,
+    convert_xform_to_json,
+)
+
+DEFAULT_XML_DIR = os.path.join(
+    os.path.dirname(corehq.__file__), 'ex-submodules', 'couchforms', 'tests', 'data'
+)
+
+
+class Command(BaseCommand):
+    help = "Time converting form XML to form JSON over a directory of XML files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--xml-dir', default=DEFAULT_XML_DIR,
+                            help='Directory to (recursively) read form XML files from')
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, xml_dir, iterations, **options):
+        forms = list(_iter_form_json(xml_dir))
+        if not forms:
+            print("No form XML found in {}".format(xml_dir))
+            return
+
+        def _parse():
+            for xml, _ in forms:
+                convert_xform_to_json(xml)
+
+        def _adjust_recursive():
+            for _, form_json in forms:
+                _recursive_adjust_datetimes(copy.deepcopy(form_json))
+
+        def _adjust():
+            for _, form_json in forms:
+                adjust_datetimes(copy.deepcopy(form_json))
+
+        def _copy():
+            for _, form_json in forms:
+                copy.deepcopy(form_json)
+
+        copy_seconds = timeit.timeit(_copy, number=iterations)
+        print("{} forms from {}".format(len(forms), xml_dir))
+        for label, func, overhead in [
+            ('parse XML', _parse, 0),
+            ('adjust datetimes (recursive)', _adjust_recursive, copy_seconds),
+            ('adjust datetimes', _adjust, copy_seconds),
+        ]:
+            seconds = timeit.timeit(func, number=iterations) - overhead
+            print("{}: {:,.0f} forms/sec".format(label, len(forms) * iterations / seconds))
+
+
+def _iter_form_json(xml_dir):
+    for dirpath, dirnames, filenames in os.walk(xml_dir):
+        for filename in sorted(filenames):
+            if not filename.endswith('.xml'):
+                continue
+            with open(os.path.join(dirpath, filename), 'rb') as f:
+                xml = f.read()
+            try:
+                yield xml, convert_xform_to_json(xml)
+            except XMLSyntaxError:
+                pass
+
+
+def _recursive_adjust_datetimes(data, parent=None, key=None):
+    # the previous implementation of adjust_datetimes, for comparison
+    if isinstance(data, str) and RE_DATETIME_MATCH.match(data):
+        try:
+            parent[key] = str(json_format_datetime(
+                adjust_text_to_datetime(data)
+            ))
+        except (iso8601.ParseError, ValueError):
+            pass
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            _recursive_adjust_datetimes(value, parent=data, key=key)
+    elif isinstance(data, list):
+        for i, value in enumerate(data):
+            _recursive_adjust_datetimes(value, parent=data, key=i)
+    return data
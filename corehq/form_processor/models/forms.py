@@ -87,13 +87,47 @@ class XFormInstanceManager(RequireDBManager):
             sort_with_id_list(forms, form_ids, 'form_id')
         return forms
 
-    def iter_forms(self, form_ids, domain=None):
+    def iter_forms(self, form_ids, domain=None, prefetch_xml=False):
         """
         :param form_ids: list of form_ids.
         :param domain: See the same parameter of `get_forms`.
+        :param prefetch_xml: Load the attachment metadata and XML of each
+            chunk of forms in bulk. See `prefetch_xml`.
         """
         for chunk in chunked(form_ids, 100):
-            yield from self.get_forms([_f for _f in chunk if _f], domain)
+            forms = self.get_forms([_f for _f in chunk if _f], domain)
+            if prefetch_xml:
+                self.prefetch_xml(forms)
+            yield from forms
+
+    @staticmethod
+    def prefetch_xml(forms):
+        """Load the attachment metadata and XML of the given forms in bulk
+
+        The XML is read from the blob db concurrently. Afterwards the
+        forms' `get_attachments()` and `get_xml()` methods do not need to
+        query the database or the blob db.
+        """
+        forms = [form for form in forms if not hasattr(form, '_attachments_list')]
+        if not forms:
+            return
+        blob_db = get_blob_db()
+        attachments = sorted(
+            blob_db.metadb.get_for_parents([form.form_id for form in forms]),
+            key=lambda meta: meta.parent_id
+        )
+        forms_by_id = {form.form_id: form for form in forms}
+        attach_prefetch_models(forms_by_id, attachments, 'parent_id', 'attachments_list')
+
+        xml_metas = {
+            meta.parent_id: meta
+            for meta in attachments
+            if meta.name == 'form.xml'
+        }
+        xml_by_key = blob_db.bulk_get(list(xml_metas.values()))
+        for form_id, meta in xml_metas.items():
+            if meta.key in xml_by_key:
+                forms_by_id[form_id]._prefetched_xml = xml_by_key[meta.key]
 
     @staticmethod
     def get_attachments(form_id):
@@ -594,17 +628,12 @@ class XFormInstance(PartitionedModel, models.Model, RedisLockableMixIn,
     def form_data(self):
         """Returns the JSON representation of the form XML"""
         from couchforms import XMLSyntaxError
-        from ..utils import convert_xform_to_json, adjust_datetimes
-        from corehq.form_processor.utils.metadata import scrub_form_meta
+        from ..utils import convert_form_xml_to_json
         xml = self.get_xml()
         try:
-            form_json = convert_xform_to_json(xml)
+            return convert_form_xml_to_json(self.form_id, xml)
         except XMLSyntaxError:
             return {}
-        adjust_datetimes(form_json)
-
-        scrub_form_meta(self.form_id, form_json)
-        return form_json
 
     @property
     @memoized
@@ -676,6 +705,9 @@ class XFormInstance(PartitionedModel, models.Model, RedisLockableMixIn,
 
     @memoized
     def get_xml(self):
+        xml = self.__dict__.pop('_prefetched_xml', None)
+        if xml is not None:
+            return xml
         try:
             return self.get_attachment('form.xml')
         except (NotFound, AttachmentNotFound):
@@ -1,5 +1,7 @@
 import uuid
 from datetime import datetime
+from operator import itemgetter
+from unittest.mock import patch
 
 from django.conf import settings
 from django.core.files.uploadedfile import UploadedFile
@@ -12,6 +14,7 @@ from corehq.sql_db.util import get_db_alias_for_partitioned_doc
 from corehq.util.test_utils import trap_extra_setup
 
 from ..backends.sql.processor import FormProcessorSQL
+from ..document_stores import FormDocumentStore
 from ..exceptions import AttachmentNotFound, XFormNotFound
 from ..interfaces.processor import ProcessedForms
 from ..models import CaseTransaction, XFormInstance, XFormOperation
@@ -146,6 +149,60 @@ class XFormInstanceManagerTest(TestCase):
             self.assertEqual(1, len(attachments))
             self.assertEqual(expected, {att.name: att.content_type for att in attachments})
 
+    def test_iter_forms_prefetch_xml(self):
+        form_ids = sorted(create_form_for_test(DOMAIN).form_id for i in range(3))
+        blob_db = get_blob_db()
+
+        with patch.object(blob_db.metadb, 'get_for_parent') as get_for_parent, \
+                patch.object(blob_db, 'bulk_get', wraps=blob_db.bulk_get) as bulk_get:
+            forms = list(XFormInstance.objects.iter_forms(form_ids, DOMAIN, prefetch_xml=True))
+        get_for_parent.assert_not_called()
+        bulk_get.assert_called_once()
+        self.assertEqual(form_ids, sorted(f.form_id for f in forms))
+
+        with patch.object(blob_db, 'get') as get:
+            for form in forms:
+                with self.assertNumQueries(0, using=form.db):
+                    self.assertEqual(['form.xml'], [att.name for att in form.get_attachments()])
+                    self.assertEqual(get_simple_form_xml(form.form_id), form.get_xml().decode('utf-8'))
+        get.assert_not_called()
+
+    def test_form_document_store_iter_documents(self):
+        attachment_file = open('./corehq/ex-submodules/casexml/apps/case/tests/data/attachments/fruity.jpg', 'rb')
+        self.addCleanup(attachment_file.close)
+        attachments = {
+            'pic.jpg': UploadedFile(attachment_file, 'pic.jpg', content_type='image/jpeg')
+        }
+        form_ids = [
+            create_form_for_test(DOMAIN, attachments=attachments).form_id,
+            create_form_for_test(DOMAIN).form_id,
+        ]
+        expected = [
+            FormDocumentStore._to_json(form)
+            for form in XFormInstance.objects.iter_forms(form_ids, DOMAIN)
+        ]
+
+        docs = list(FormDocumentStore(DOMAIN).iter_documents(form_ids))
+
+        key = itemgetter('_id')
+        self.assertEqual(sorted(expected, key=key), sorted(docs, key=key))
+
+    def test_form_document_store_iter_documents_missing_xml(self):
+        form_ids = [create_form_for_test(DOMAIN).form_id for i in range(3)]
+        missing_key = XFormInstance.objects.get_attachment_by_name(form_ids[1], 'form.xml').key
+        blob_db = get_blob_db()
+        real_get = blob_db.get
+
+        def get(key=None, type_code=None, meta=None):
+            if (meta.key if meta is not None else key) == missing_key:
+                raise BlobNotFound(missing_key)
+            return real_get(key=key, type_code=type_code, meta=meta)
+
+        with patch.object(blob_db, 'get', get):
+            docs = list(FormDocumentStore(DOMAIN).iter_documents(form_ids))
+
+        self.assertEqual({form_ids[0], form_ids[2]}, {doc['_id'] for doc in docs})
+
     def test_get_forms_by_type(self):
         form1 = create_form_for_test(DOMAIN)
         form2 = create_form_for_test(DOMAIN)
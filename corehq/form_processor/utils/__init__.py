@@ -6,6 +6,7 @@ from .xform import (  # noqa: F401
     extract_meta_instance_id,
     extract_meta_user_id,
     convert_xform_to_json,
+    convert_form_xml_to_json,
     adjust_datetimes,
     get_simple_form_xml,
     get_simple_wrapped_form,
@@ -195,11 +195,43 @@ def convert_xform_to_json(xml_string):
     return json_form
 
 
+def convert_form_xml_to_json(form_id, xml_string):
+    """
+    Converts form XML to the form JSON as stored on a form, i.e. with
+    datetimes normalised and old format metadata cleaned up.
+
+    Raises couchforms.XMLSyntaxError if the XML is not valid.
+    """
+    from corehq.form_processor.utils.metadata import scrub_form_meta
+    form_json = convert_xform_to_json(xml_string)
+    adjust_datetimes(form_json)
+    scrub_form_meta(form_id, form_json)
+    return form_json
+
+
 def adjust_text_to_datetime(text):
     matching_datetime = iso8601.parse_date(text)
     return matching_datetime.astimezone(pytz.utc).replace(tzinfo=None)
 
 
+# the shortest string RE_DATETIME_MATCH can match, e.g. '20150101T1200'
+MIN_DATETIME_LENGTH = 13
+
+
+def _adjust_datetime_text(text):
+    """
+    Returns text reformatted as a datetime if it looks like one,
+    otherwise None.
+    """
+    # cheap checks first, since most values in a form are not datetimes
+    if len(text) < MIN_DATETIME_LENGTH or not text[0].isdecimal() or not RE_DATETIME_MATCH.match(text):
+        return None
+    try:
+        return str(json_format_datetime(adjust_text_to_datetime(text)))
+    except (iso8601.ParseError, ValueError):
+        return None
+
+
 def adjust_datetimes(data, parent=None, key=None):
     """
     find all datetime-like strings within data (deserialized json)
@@ -207,19 +239,29 @@ def adjust_datetimes(data, parent=None, key=None):
     """
     # this strips the timezone like we've always done
     # todo: in the future this will convert to UTC
-    if isinstance(data, str) and RE_DATETIME_MATCH.match(data):
-        try:
-            parent[key] = str(json_format_datetime(
-                adjust_text_to_datetime(data)
-            ))
-        except (iso8601.ParseError, ValueError):
-            pass
-    elif isinstance(data, dict):
-        for key, value in data.items():
-            adjust_datetimes(value, parent=data, key=key)
-    elif isinstance(data, list):
-        for i, value in enumerate(data):
-            adjust_datetimes(value, parent=data, key=i)
+    if isinstance(data, str):
+        adjusted = _adjust_datetime_text(data)
+        if adjusted is not None:
+            parent[key] = adjusted
+        return data
+
+    # walk the tree with a stack rather than recursively, since forms can be large
+    stack = [data]
+    while stack:
+        container = stack.pop()
+        if isinstance(container, dict):
+            items = container.items()
+        elif isinstance(container, list):
+            items = enumerate(container)
+        else:
+            continue
+        for item_key, value in items:
+            if isinstance(value, str):
+                adjusted = _adjust_datetime_text(value)
+                if adjusted is not None:
+                    container[item_key] = adjusted
+            elif isinstance(value, (dict, list)):
+                stack.append(value)
 
     # return data, just for convenience in testing
     # this is the original input, modified, not a new data structure
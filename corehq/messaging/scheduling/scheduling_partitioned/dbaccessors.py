@@ -1,10 +1,13 @@
+from collections import defaultdict
 from uuid import UUID
 
 from django.db.models import Q
 
 from corehq.sql_db.util import (
+    get_db_alias_for_partitioned_doc,
     get_db_aliases_for_partitioned_query,
     paginate_query_across_partitioned_databases,
+    split_list_by_db_partition,
 )
 from corehq.util.metrics.load_counters import load_counter_for_model
 
@@ -260,6 +263,72 @@ def get_case_timed_schedule_instances_for_schedule_id(case_id, schedule_id):
     )
 
 
+def _get_case_schedule_id_field(cls):
+    from corehq.messaging.scheduling.scheduling_partitioned.models import (
+        CaseAlertScheduleInstance,
+        CaseTimedScheduleInstance,
+    )
+
+    if cls is CaseAlertScheduleInstance:
+        return 'alert_schedule_id'
+    elif cls is CaseTimedScheduleInstance:
+        return 'timed_schedule_id'
+    raise TypeError("Expected CaseAlertScheduleInstance or CaseTimedScheduleInstance")
+
+
+def get_case_schedule_instances_for_cases(cls, case_ids, schedule_id):
+    """Get the instances of the schedule for all of the given cases"""
+    schedule_id_field = _get_case_schedule_id_field(cls)
+    for db_name, db_case_ids in split_list_by_db_partition(case_ids):
+        yield from cls.objects.using(db_name).filter(
+            case_id__in=db_case_ids,
+            **{schedule_id_field: schedule_id}
+        )
+
+
+def delete_case_schedule_instances_for_cases(cls, case_ids, schedule_id):
+    schedule_id_field = _get_case_schedule_id_field(cls)
+    for db_name, db_case_ids in split_list_by_db_partition(case_ids):
+        cls.objects.using(db_name).filter(
+            case_id__in=db_case_ids,
+            **{schedule_id_field: schedule_id}
+        ).delete()
+
+
+def bulk_save_case_schedule_instances(cls, instances):
+    """Insert new instances and update existing instances of ``cls``
+
+    Unlike ``save_case_schedule_instance`` this does not call ``save()``
+    on each instance.
+    """
+    _get_case_schedule_id_field(cls)
+    new_instances_by_db = defaultdict(list)
+    existing_instances_by_db = defaultdict(list)
+    for instance in instances:
+        _validate_class(instance, cls)
+        _validate_uuid(instance.schedule_instance_id)
+        by_db = new_instances_by_db if instance._state.adding else existing_instances_by_db
+        by_db[get_db_alias_for_partitioned_doc(instance.case_id)].append(instance)
+
+    fields = [field.name for field in cls._meta.concrete_fields if not field.primary_key]
+    for db_name, db_instances in new_instances_by_db.items():
+        cls.objects.using(db_name).bulk_create(db_instances)
+    for db_name, db_instances in existing_instances_by_db.items():
+        cls.objects.using(db_name).bulk_update(db_instances, fields)
+
+
+def bulk_delete_case_schedule_instances(cls, instances):
+    """Delete instances of ``cls`` with one query per partition"""
+    _get_case_schedule_id_field(cls)
+    ids_by_db = defaultdict(list)
+    for instance in instances:
+        _validate_class(instance, cls)
+        ids_by_db[get_db_alias_for_partitioned_doc(instance.case_id)].append(instance.schedule_instance_id)
+
+    for db_name, db_ids in ids_by_db.items():
+        cls.objects.using(db_name).filter(schedule_instance_id__in=db_ids).delete()
+
+
 def get_case_alert_schedule_instances_for_schedule(case_id, schedule):
     from corehq.messaging.scheduling.models import AlertSchedule
 
@@ -1,4 +1,5 @@
 import uuid
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 from django.conf import settings
@@ -13,9 +14,12 @@ from corehq.messaging.scheduling.models import (
     TimedSchedule,
 )
 from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
+    bulk_delete_case_schedule_instances,
+    bulk_save_case_schedule_instances,
     delete_alert_schedule_instance,
     delete_alert_schedule_instances_for_schedule,
     delete_case_schedule_instance,
+    delete_case_schedule_instances_for_cases,
     delete_schedule_instances_by_case_id,
     delete_timed_schedule_instance,
     delete_timed_schedule_instances_for_schedule,
@@ -23,6 +27,7 @@ from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
     get_alert_schedule_instances_for_schedule,
     get_case_alert_schedule_instances_for_schedule,
     get_case_schedule_instance,
+    get_case_schedule_instances_for_cases,
     get_case_timed_schedule_instances_for_schedule,
     get_timed_schedule_instance,
     get_timed_schedule_instances_for_schedule,
@@ -204,14 +209,94 @@ class TimedScheduleInstanceRefresher(ScheduleInstanceRefresher):
         return False
 
 
-class CaseAlertScheduleInstanceRefresher(ScheduleInstanceRefresher):
+class CaseScheduleInstanceBatch(object):
+    """
+    Loads the schedule instances of a chunk of cases in bulk, and collects the
+    changes made to them by rules so that they can be saved in bulk with flush().
+    Used when running a messaging rule for many cases at once.
+    """
+
+    def __init__(self, case_ids):
+        self.case_ids = list(case_ids)
+        self._instances = {}
+        self._to_save = {}
+        self._to_delete = defaultdict(set)
+        self._instances_to_delete = {}
+
+    def get_instances(self, cls, case_id, schedule_id):
+        key = (cls, schedule_id)
+        if key not in self._instances:
+            instances_by_case_id = defaultdict(list)
+            for instance in get_case_schedule_instances_for_cases(cls, self.case_ids, schedule_id):
+                instances_by_case_id[instance.case_id].append(instance)
+            self._instances[key] = instances_by_case_id
+        return self._instances[key][case_id]
+
+    def save(self, instance):
+        self._to_save[instance.schedule_instance_id] = instance
+
+    def delete(self, instance):
+        """Delete the instance when flush() is called"""
+        self._to_save.pop(instance.schedule_instance_id, None)
+        self._instances_to_delete[instance.schedule_instance_id] = instance
+
+    def delete_instances(self, cls, case_id, schedule_id):
+        """Delete the case's instances of the schedule when flush() is called"""
+        instances = self.get_instances(cls, case_id, schedule_id)
+        if instances:
+            self._to_delete[(cls, schedule_id)].add(case_id)
+            for instance in instances:
+                self._to_save.pop(instance.schedule_instance_id, None)
+            instances.clear()
+
+    def flush(self):
+        for (cls, schedule_id), case_ids in self._to_delete.items():
+            delete_case_schedule_instances_for_cases(cls, list(case_ids), schedule_id)
+
+        instances_by_class = defaultdict(list)
+        for instance in self._instances_to_delete.values():
+            instances_by_class[type(instance)].append(instance)
+        for cls, instances in instances_by_class.items():
+            bulk_delete_case_schedule_instances(cls, instances)
+
+        instances_by_class = defaultdict(list)
+        for instance in self._to_save.values():
+            instances_by_class[type(instance)].append(instance)
+        for cls, instances in instances_by_class.items():
+            bulk_save_case_schedule_instances(cls, instances)
+
+        self._to_save = {}
+        self._to_delete = defaultdict(set)
+        self._instances_to_delete = {}
+
+
+class CaseScheduleInstanceRefresherMixin(object):
+
+    schedule_instance_batch = None
+
+    def delete_instance(self, instance):
+        if self.schedule_instance_batch is not None:
+            self.schedule_instance_batch.delete(instance)
+        else:
+            super().delete_instance(instance)
+
+    def save_instance(self, instance):
+        if self.schedule_instance_batch is not None:
+            self.schedule_instance_batch.save(instance)
+        else:
+            super().save_instance(instance)
+
+
+class CaseAlertScheduleInstanceRefresher(CaseScheduleInstanceRefresherMixin, ScheduleInstanceRefresher):
 
-    def __init__(self, case, action_definition, rule, schedule, new_recipients, existing_instances):
+    def __init__(self, case, action_definition, rule, schedule, new_recipients, existing_instances,
+                 schedule_instance_batch=None):
         super(CaseAlertScheduleInstanceRefresher, self).__init__(schedule, new_recipients, existing_instances)
         self.case = case
         self.action_definition = action_definition
         self.rule = rule
         self.reset_case_property_value = self._get_reset_case_property_value(case, action_definition)
+        self.schedule_instance_batch = schedule_instance_batch
 
     def create_new_instance_for_recipient(self, recipient_type, recipient_id):
         if self.model_instance:
@@ -244,10 +329,10 @@ class CaseAlertScheduleInstanceRefresher(ScheduleInstanceRefresher):
         return False
 
 
-class CaseTimedScheduleInstanceRefresher(ScheduleInstanceRefresher):
+class CaseTimedScheduleInstanceRefresher(CaseScheduleInstanceRefresherMixin, ScheduleInstanceRefresher):
 
     def __init__(self, case, action_definition, rule, schedule,
-                 new_recipients, existing_instances, start_date=None):
+                 new_recipients, existing_instances, start_date=None, schedule_instance_batch=None):
         super(CaseTimedScheduleInstanceRefresher, self).__init__(schedule, new_recipients, existing_instances)
         self.case = case
         self.action_definition = action_definition
@@ -255,6 +340,7 @@ class CaseTimedScheduleInstanceRefresher(ScheduleInstanceRefresher):
         self.reset_case_property_value = self._get_reset_case_property_value(case, action_definition)
         self.start_date = start_date
         self.schedule_revision = schedule.get_schedule_revision(case=case)
+        self.schedule_instance_batch = schedule_instance_batch
 
     def create_new_instance_for_recipient(self, recipient_type, recipient_id):
         start_date = self.start_date
@@ -391,7 +477,8 @@ def handle_case_alert_schedule_instance_reset(instance, schedule, reset_case_pro
     return False
 
 
-def refresh_case_alert_schedule_instances(case, schedule, action_definition, rule):
+def refresh_case_alert_schedule_instances(case, schedule, action_definition, rule,
+                                          schedule_instance_batch=None):
     """
     :param case: the CommCareCase/SQL
     :param schedule: the AlertSchedule
@@ -399,18 +486,27 @@ def refresh_case_alert_schedule_instances(case, schedule, action_definition, rul
     causing the schedule instances to be refreshed
     :param rule: the AutomaticUpdateRule that is causing the schedule instances
     to be refreshed
+    :param schedule_instance_batch: an optional CaseScheduleInstanceBatch to load
+    the existing instances from and save the refreshed instances to
     """
+    if schedule_instance_batch is not None:
+        existing_instances = schedule_instance_batch.get_instances(
+            CaseAlertScheduleInstance, case.case_id, schedule.schedule_id)
+    else:
+        existing_instances = get_case_alert_schedule_instances_for_schedule(case.case_id, schedule)
     CaseAlertScheduleInstanceRefresher(
         case,
         action_definition,
         rule,
         schedule,
         action_definition.recipients,
-        get_case_alert_schedule_instances_for_schedule(case.case_id, schedule)
+        existing_instances,
+        schedule_instance_batch=schedule_instance_batch,
     ).refresh()
 
 
-def refresh_case_timed_schedule_instances(case, schedule, action_definition, rule, start_date=None):
+def refresh_case_timed_schedule_instances(case, schedule, action_definition, rule, start_date=None,
+                                          schedule_instance_batch=None):
     """
     :param case: the CommCareCase/SQL
     :param schedule: the TimedSchedule
@@ -419,15 +515,23 @@ def refresh_case_timed_schedule_instances(case, schedule, action_definition, rul
     :param rule: the AutomaticUpdateRule that is causing the schedule instances
     to be refreshed
     :param start_date: the date to start the TimedSchedule
+    :param schedule_instance_batch: an optional CaseScheduleInstanceBatch to load
+    the existing instances from and save the refreshed instances to
     """
+    if schedule_instance_batch is not None:
+        existing_instances = schedule_instance_batch.get_instances(
+            CaseTimedScheduleInstance, case.case_id, schedule.schedule_id)
+    else:
+        existing_instances = get_case_timed_schedule_instances_for_schedule(case.case_id, schedule)
     CaseTimedScheduleInstanceRefresher(
         case,
         action_definition,
         rule,
         schedule,
         action_definition.recipients,
-        get_case_timed_schedule_instances_for_schedule(case.case_id, schedule),
-        start_date=start_date
+        existing_instances,
+        start_date=start_date,
+        schedule_instance_batch=schedule_instance_batch,
     ).refresh()
 
 
@@ -1,17 +1,24 @@
+from contextlib import ExitStack
+
 from django.conf import settings
 from django.db import transaction
 from django.db.models import Q
 
 from dimagi.utils.chunked import chunked
-from dimagi.utils.couch import CriticalSection
+from dimagi.utils.couch import CriticalSection, get_redis_lock, release_lock
+from dimagi.utils.logging import notify_exception
 from field_audit.models import AuditAction
 
-from corehq.apps.data_interfaces.models import AutomaticUpdateRule
+from corehq.apps.data_interfaces.models import (
+    AutomaticUpdateRule,
+    CaseUpdateBatch,
+)
 from corehq.apps.es import CaseES
 from corehq.apps.sms import tasks as sms_tasks
 from corehq.form_processor.exceptions import CaseNotFound
-from corehq.form_processor.models import CommCareCase
+from corehq.form_processor.models import CommCareCase, CommCareCaseIndex
 from corehq.messaging.scheduling.tasks import (
+    CaseScheduleInstanceBatch,
     delete_schedule_instances_for_cases,
 )
 from corehq.messaging.scheduling.util import utcnow
@@ -20,6 +27,11 @@ from corehq.sql_db.util import (
     get_db_aliases_for_partitioned_query,
     paginate_query,
     paginate_query_across_partitioned_databases,
+    split_list_by_db_partition,
+)
+from corehq.toggles import (
+    BULK_SYNC_MESSAGING_RULE_CHUNKS,
+    CASE_UPDATE_RULES_BATCH_SUBMISSIONS,
 )
 from corehq.util.celery_utils import no_result_task
 from corehq.util.metrics.load_counters import case_load_counter
@@ -51,11 +63,59 @@ def sync_case_for_messaging_rule(self, domain, case_id, rule_id):
 
 @no_result_task(queue=settings.CELERY_REMINDER_CASE_UPDATE_BULK_QUEUE, acks_late=True)
 def sync_case_chunk_for_messaging_rule(domain, case_id_chunk, rule_id):
-    for case_id in case_id_chunk:
-        try:
-            with CriticalSection([get_sync_key(case_id)], timeout=5 * 60):
-                _sync_case_for_messaging_rule(domain, case_id, rule_id)
-        except Exception:
+    case_update_batch = None
+    if CASE_UPDATE_RULES_BATCH_SUBMISSIONS.enabled(domain):
+        case_update_batch = CaseUpdateBatch(domain)
+    # The sync lock of each case is held until the case updates are flushed
+    # so that a sync of the same case cannot run between the rule and its
+    # case update. Locks are not waited for while others are held; cases
+    # that are being synced elsewhere are synced by their own task instead.
+    with ExitStack() as sync_locks:
+        locked_case_ids = []
+        for case_id in case_id_chunk:
+            if _lock_case_for_sync(sync_locks, case_id):
+                locked_case_ids.append(case_id)
+            else:
+                sync_case_for_messaging_rule.delay(domain, case_id, rule_id)
+        if locked_case_ids and BULK_SYNC_MESSAGING_RULE_CHUNKS.enabled(domain):
+            try:
+                _sync_case_chunk_for_messaging_rule(domain, locked_case_ids, rule_id, case_update_batch)
+            except Exception:
+                notify_exception(None, "Error syncing case chunk for messaging rule, syncing cases one at a time",
+                                 details={'domain': domain, 'rule_id': rule_id})
+                # discard any updates from the failed chunk; they are redone below
+                case_update_batch = CaseUpdateBatch(domain) if case_update_batch is not None else None
+            else:
+                locked_case_ids = []
+        for case_id in locked_case_ids:
+            try:
+                _sync_case_for_messaging_rule(domain, case_id, rule_id, case_update_batch)
+            except Exception:
+                sync_case_for_messaging_rule.delay(domain, case_id, rule_id)
+        if case_update_batch is not None:
+            _flush_case_update_batch(domain, rule_id, case_update_batch)
+
+
+def _lock_case_for_sync(sync_locks, case_id):
+    """
+    Acquire the sync lock of a case without waiting for it, and hold it until
+    sync_locks is closed. Returns False if the case is being synced elsewhere.
+    """
+    lock = get_redis_lock(get_sync_key(case_id), timeout=5 * 60, name='sync_case')
+    if not lock.acquire(blocking=False):
+        return False
+    sync_locks.callback(release_lock, lock, True)
+    return True
+
+
+def _flush_case_update_batch(domain, rule_id, case_update_batch):
+    """
+    Submit the case updates of the batch, and sync the cases whose updates
+    failed again one at a time
+    """
+    result = case_update_batch.flush()
+    if result.num_errors:
+        for case_id in case_update_batch.failed_case_ids:
             sync_case_for_messaging_rule.delay(domain, case_id, rule_id)
 
 
@@ -101,7 +161,7 @@ def get_cached_rule(domain, rule_id):
         return rules[0]
 
 
-def _sync_case_for_messaging_rule(domain, case_id, rule_id):
+def _sync_case_for_messaging_rule(domain, case_id, rule_id, case_update_batch=None):
     case_load_counter("messaging_rule_sync", domain)()
     try:
         case = CommCareCase.objects.get_case(case_id, domain)
@@ -110,10 +170,52 @@ def _sync_case_for_messaging_rule(domain, case_id, rule_id):
         return
     rule = get_cached_rule(domain, rule_id)
     if rule:
-        rule.run_rule(case, utcnow())
+        rule.run_rule(case, utcnow(), case_update_batch=case_update_batch)
         MessagingRuleProgressHelper(rule_id).increment_current_case_count()
 
 
+def _sync_case_chunk_for_messaging_rule(domain, case_ids, rule_id, case_update_batch=None):
+    """
+    Same as running _sync_case_for_messaging_rule for each case in the chunk,
+    but loads the cases and their schedule instances, and saves the schedule
+    instances, in bulk. Case updates are added to case_update_batch, which the
+    caller is responsible for flushing. The caller must hold the sync locks of
+    the cases until then.
+    """
+    case_ids = list(case_ids)
+    case_load_counter("messaging_rule_sync", domain)(len(case_ids))
+    cases = _get_cases_with_indices(domain, case_ids)
+    missing_case_ids = set(case_ids) - {case.case_id for case in cases}
+    if missing_case_ids:
+        sms_tasks.delete_phone_numbers_for_owners(list(missing_case_ids))
+        delete_schedule_instances_for_cases(domain, list(missing_case_ids))
+
+    rule = get_cached_rule(domain, rule_id)
+    if not rule or not cases:
+        return
+
+    schedule_instance_batch = CaseScheduleInstanceBatch([case.case_id for case in cases])
+    now = utcnow()
+    for case in cases:
+        rule.run_rule(case, now, case_update_batch=case_update_batch,
+                      schedule_instance_batch=schedule_instance_batch)
+    schedule_instance_batch.flush()
+
+    MessagingRuleProgressHelper(rule_id).increment_current_case_count(count=len(cases))
+
+
+def _get_cases_with_indices(domain, case_ids):
+    indices = []
+    for db_alias, db_case_ids in split_list_by_db_partition(case_ids):
+        indices.extend(
+            CommCareCaseIndex.objects.using(db_alias)
+            .filter(domain=domain, case_id__in=db_case_ids)
+            .order_by('case_id')
+        )
+    cases = CommCareCase.objects.get_cases(case_ids, domain, ordered=True, prefetched_indices=indices)
+    return [case for case in cases if case.domain == domain]
+
+
 def initiate_messaging_rule_run(rule):
     if not rule.active:
         return
@@ -7,6 +7,7 @@ from corehq.apps.case_search.const import (
 )
 from corehq.apps.case_search.exceptions import CaseSearchNotEnabledException
 from corehq.apps.case_search.models import DomainsNotInCaseSearchIndex
+from corehq.apps.case_search.result_cache import clear_case_search_result_cache
 from corehq.apps.change_feed import topics
 from corehq.apps.change_feed.consumer.feed import (
     KafkaChangeFeed,
@@ -18,6 +19,7 @@ from corehq.apps.es.client import manager
 from corehq.form_processor.backends.sql.dbaccessors import CaseReindexAccessor
 from corehq.pillows.base import is_couch_change_for_sql_domain
 from corehq.toggles import (
+    CASE_SEARCH_RESULT_CACHE,
     USH_CASE_CLAIM_UPDATES,
 )
 from corehq.util.doc_processor.sql import SqlDocumentProvider
@@ -116,6 +118,17 @@ class CaseSearchPillowProcessor(ElasticProcessor):
 
         if domain and domain_needs_search_index(domain):
             super(CaseSearchPillowProcessor, self).process_change(change)
+            if CASE_SEARCH_RESULT_CACHE.enabled(domain):
+                self._clear_result_cache(domain, change)
+
+    @staticmethod
+    def _clear_result_cache(domain, change):
+        case_type = change.metadata.document_subtype if change.metadata is not None else None
+        if not case_type:
+            doc = change.get_document()
+            case_type = doc.get('type') if doc else None
+        if case_type:
+            clear_case_search_result_cache(domain, case_type)
 
 
 def get_case_search_processor():
@@ -0,0 +1,45 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from corehq.sql_db.util import (
+    get_db_aliases_for_partitioned_query,
+    paginate_query_across_partitioned_databases,
+    paginate_query_across_partitioned_databases_concurrently,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time iterating over a domain's rows of a partitioned model one database "
+        "at a time and across all partitioned databases concurrently"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('domain')
+        parser.add_argument('--model', default='form_processor.CommCareCase',
+                            help='app_label.ModelName of a partitioned model with a domain field')
+        parser.add_argument('--values', nargs='*', default=None,
+                            help='Only fetch these fields (default: whole objects)')
+        parser.add_argument('--query-size', type=int, default=5000)
+
+    def handle(self, domain, model, values, query_size, **options):
+        model_class = apps.get_model(model)
+        q_expression = Q(domain=domain)
+        print("{} partitioned databases".format(len(get_db_aliases_for_partitioned_query())))
+        for label, paginate, kwargs in [
+            ('serial', paginate_query_across_partitioned_databases, {}),
+            ('concurrent', paginate_query_across_partitioned_databases_concurrently, {}),
+            ('concurrent, ordered', paginate_query_across_partitioned_databases_concurrently,
+             {'ordered': True}),
+        ]:
+            start = time.perf_counter()
+            count = sum(1 for row in paginate(
+                model_class, q_expression, query_size=query_size, values=values, **kwargs
+            ))
+            seconds = time.perf_counter() - start
+            print("{}: {:,} rows in {:.2f}s ({:,.0f} rows/sec)".format(
+                label, count, seconds, count / seconds if seconds else 0
+            ))
@@ -1,6 +1,9 @@
+import threading
+from unittest.mock import patch
+
 from django.test import SimpleTestCase
 
-from corehq.sql_db.util import create_unique_index_name
+from corehq.sql_db.util import _iter_pages_concurrently, create_unique_index_name
 
 
 class TestCreateUniqueIndexName(SimpleTestCase):
@@ -42,3 +45,54 @@ class TestCreateUniqueIndexName(SimpleTestCase):
     def test_raises_error_if_fields_is_not_a_list(self):
         with self.assertRaises(AssertionError):
             create_unique_index_name('app', 'table', 'field_one')
+
+
+class TestIterPagesConcurrently(SimpleTestCase):
+    pages = {
+        'db1': [[(1, 'a'), (4, 'd')], [(7, 'g')]],
+        'db2': [[(2, 'b')]],
+        'db3': [[(3, 'c'), (5, 'e')], [(6, 'f')]],
+    }
+
+    def setUp(self):
+        patcher = patch('corehq.sql_db.util.connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_pages(self, db_name):
+        return iter(self.pages[db_name])
+
+    def test_ordered(self):
+        rows = _iter_pages_concurrently(list(self.pages), self.get_pages, ordered=True)
+        self.assertEqual(list(rows), [(1, 'a'), (2, 'b'), (3, 'c'), (4, 'd'), (5, 'e'), (6, 'f'), (7, 'g')])
+
+    def test_unordered(self):
+        rows = _iter_pages_concurrently(list(self.pages), self.get_pages, max_workers=2)
+        self.assertEqual(sorted(rows), [(1, 'a'), (2, 'b'), (3, 'c'), (4, 'd'), (5, 'e'), (6, 'f'), (7, 'g')])
+
+    def test_pages_stay_in_order_for_each_database(self):
+        rows = list(_iter_pages_concurrently(list(self.pages), self.get_pages))
+        for db_name, pages in self.pages.items():
+            db_rows = [row for page in pages for row in page]
+            self.assertEqual([row for row in rows if row in db_rows], db_rows)
+
+    def test_error_is_raised(self):
+        def get_pages(db_name):
+            yield [(1, db_name)]
+            raise ValueError(db_name)
+
+        with self.assertRaises(ValueError):
+            list(_iter_pages_concurrently(list(self.pages), get_pages, ordered=True))
+
+    def test_stops_fetching_when_closed(self):
+        def get_pages(db_name):
+            for i in range(1000):
+                yield [(i, db_name)]
+
+        rows = _iter_pages_concurrently(list(self.pages), get_pages, prefetch_pages=1)
+        next(rows)
+        rows.close()
+        self.assertEqual(
+            [thread for thread in threading.enumerate() if thread.name.startswith('paginate-query')],
+            []
+        )
@@ -1,8 +1,12 @@
 import hashlib
+import heapq
+import queue
 import random
 import re
+import threading
 import uuid
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from looseversion import LooseVersion
 from functools import wraps
 
@@ -44,7 +48,7 @@ REPLICATION_SQL_9_6 = """
 
 
 def paginate_query_across_partitioned_databases(model_class, q_expression, annotate=None, query_size=5000,
-                                                values=None, load_source=None):
+                                                values=None, load_source=None, alias=None):
     """
     Runs a query across all partitioned databases in small chunks and produces a generator
     with the results.
@@ -60,16 +64,19 @@ def paginate_query_across_partitioned_databases(model_class, q_expression, annot
     :param values: (optional) If specified, should be a list of values to retrieve rather
     than retrieving entire objects.
 
+    :param alias: (optional) See ``paginate_query``
+
     :return: A generator with the results
     """
     db_names = get_db_aliases_for_partitioned_query()
     for db_name in db_names:
-        for row in paginate_query(db_name, model_class, q_expression, annotate, query_size, values, load_source):
+        for row in paginate_query(db_name, model_class, q_expression, annotate, query_size, values, load_source,
+                                  alias):
             yield row
 
 
 def paginate_query(db_name, model_class, q_expression, annotate=None, query_size=5000, values=None,
-                   load_source=None):
+                   load_source=None, alias=None):
     """
     Runs a query on the given database in small chunks and produces a generator
     with the results.
@@ -87,10 +94,26 @@ def paginate_query(db_name, model_class, q_expression, annotate=None, query_size
     :param values: (optional) If specified, should be a list of values to retrieve rather
     than retrieving entire objects.
 
+    :param alias: (optional) Like ``annotate``, but the fields are only available to
+    ``q_expression`` and are not selected. The dictionary will be splatted into ``.alias``
+
     :return: A generator with the results
     """
 
     track_load = load_counter_for_model(model_class)(load_source, None)
+    pages = _paginate_query_pages(db_name, model_class, q_expression, annotate, query_size, values, alias)
+    for page in pages:
+        for pk, row in page:
+            track_load()
+            yield row
+
+
+def _paginate_query_pages(db_name, model_class, q_expression, annotate=None, query_size=5000, values=None,
+                          alias=None):
+    """
+    Runs a query on the given database in small chunks and produces a generator
+    with a list of ``(pk, result)`` pairs for each chunk. See ``paginate_query``
+    """
     sort_col = 'pk'
 
     return_values = None
@@ -100,6 +123,8 @@ def paginate_query(db_name, model_class, q_expression, annotate=None, query_size
     qs = model_class.objects.using(db_name)
     if annotate:
         qs = qs.annotate(**annotate)
+    if alias:
+        qs = qs.alias(**alias)
 
     qs = qs.filter(q_expression).order_by(sort_col)
 
@@ -109,19 +134,133 @@ def paginate_query(db_name, model_class, q_expression, annotate=None, query_size
     filter_expression = {}
     while True:
         results = qs.filter(**filter_expression)[:query_size]
-        for row in results:
-            track_load()
-            if return_values:
-                value = row[0]
-                yield row[1:]
-            else:
-                value = row.pk
-                yield row
+        if return_values:
+            page = [(row[0], row[1:]) for row in results]
+        else:
+            page = [(row.pk, row) for row in results]
+        if page:
+            yield page
 
-        if len(results) < query_size:
+        if len(page) < query_size:
             break
 
-        filter_expression = {'{}__gt'.format(sort_col): value}
+        filter_expression = {'{}__gt'.format(sort_col): page[-1][0]}
+
+
+def paginate_query_across_partitioned_databases_concurrently(
+        model_class, q_expression, annotate=None, query_size=5000, values=None, load_source=None,
+        max_workers=None, ordered=False, prefetch_pages=2):
+    """
+    Like ``paginate_query_across_partitioned_databases`` but queries all the
+    partitioned databases at the same time, each from its own thread with its
+    own connection, instead of one database after the other.
+
+    :param max_workers: (optional) The maximum number of databases to query at
+    once. Defaults to all of them. Ignored if ``ordered`` is True.
+
+    :param ordered: If True, results are merged in primary key order.
+    Otherwise results are yielded a page at a time as they arrive.
+
+    :param prefetch_pages: The number of pages each database may fetch ahead of
+    the caller, which bounds the number of results held in memory to about
+    ``query_size * prefetch_pages`` for each database that is being queried.
+
+    Note that the queries run on other connections, so they won't see
+    uncommitted changes made by the calling thread (e.g. in a TestCase).
+
+    :return: A generator with the results
+    """
+    db_names = get_db_aliases_for_partitioned_query()
+    track_load = load_counter_for_model(model_class)(load_source, None)
+
+    def get_pages(db_name):
+        return _paginate_query_pages(db_name, model_class, q_expression, annotate, query_size, values)
+
+    rows = _iter_pages_concurrently(db_names, get_pages, max_workers, ordered, prefetch_pages)
+    for pk, row in rows:
+        track_load()
+        yield row
+
+
+_PAGES_DONE = object()
+
+
+def _iter_pages_concurrently(db_names, get_pages, max_workers=None, ordered=False, prefetch_pages=2):
+    """
+    Fetches the pages of ``get_pages(db_name)`` for each database on a thread
+    pool and yields the ``(pk, result)`` pairs in them. Threads wait for space
+    in a bounded queue of pages before fetching the next page.
+    """
+    if not db_names:
+        return
+    if ordered or not max_workers:
+        # merging in pk order needs the next page of every database, so
+        # every database needs its own thread
+        max_workers = len(db_names)
+    max_workers = min(max_workers, len(db_names))
+    stop = threading.Event()
+    if ordered:
+        queues = {db_name: queue.Queue(maxsize=prefetch_pages) for db_name in db_names}
+    else:
+        shared_queue = queue.Queue(maxsize=prefetch_pages * max_workers)
+        queues = {db_name: shared_queue for db_name in db_names}
+
+    def put(page_queue, item):
+        while not stop.is_set():
+            try:
+                page_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def fetch_pages(db_name):
+        page_queue = queues[db_name]
+        try:
+            for page in get_pages(db_name):
+                if not put(page_queue, page):
+                    return
+            put(page_queue, _PAGES_DONE)
+        except BaseException as e:
+            put(page_queue, e)
+        finally:
+            connections[db_name].close()
+
+    def iter_db_rows(db_name):
+        page_queue = queues[db_name]
+        while True:
+            page = page_queue.get()
+            if page is _PAGES_DONE:
+                return
+            if isinstance(page, BaseException):
+                raise page
+            yield from page
+
+    def iter_rows_as_they_arrive():
+        remaining = len(db_names)
+        while remaining:
+            page = shared_queue.get()
+            if page is _PAGES_DONE:
+                remaining -= 1
+            elif isinstance(page, BaseException):
+                raise page
+            else:
+                yield from page
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='paginate-query')
+    try:
+        for db_name in db_names:
+            executor.submit(fetch_pages, db_name)
+        if ordered:
+            yield from heapq.merge(
+                *[iter_db_rows(db_name) for db_name in db_names],
+                key=lambda pk_row: pk_row[0],
+            )
+        else:
+            yield from iter_rows_as_they_arrive()
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
 
 
 def estimate_partitioned_row_count(model_class, q_expression):
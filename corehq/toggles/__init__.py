@@ -1416,6 +1416,28 @@ RUN_AUTO_CASE_UPDATES_ON_SAVE = StaticToggle(
     [NAMESPACE_DOMAIN],
 )
 
+CASE_UPDATE_RULES_SQL_FILTER = StaticToggle(
+    'case_update_rules_sql_filter',
+    'Only load the cases that Auto Case Update rules could match',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Filters the cases loaded for a rule run in SQL using the rules' case property "
+        "and server modified criteria. Every loaded case is still checked against the rules."
+    ),
+)
+
+CASE_UPDATE_RULES_BATCH_SUBMISSIONS = StaticToggle(
+    'case_update_rules_batch_submissions',
+    'Submit the case updates made by Auto Case Update and messaging rules in batches',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Case updates made by a rule run are submitted in forms of up to 100 case blocks "
+        "instead of one form per case."
+    ),
+)
+
 CASE_DEDUPE = StaticToggle(
     'case_dedupe',
     'Case deduplication feature',
@@ -1424,6 +1446,78 @@ CASE_DEDUPE = StaticToggle(
     help_link='https://confluence.dimagi.com/display/saas/Surfacing+Case+Duplicates+in+CommCare',
 )
 
+CASE_DEDUPE_BULK_BACKFILL = StaticToggle(
+    'case_dedupe_bulk_backfill',
+    'Find duplicates for many cases at a time when backfilling deduplication rules',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Searches for the duplicates of a batch of cases in one Elasticsearch request, or "
+        "for 'ALL' rules, with an index of the case type's property values built from one "
+        "scroll. Case duplicates are saved in bulk."
+    ),
+)
+
+CACHE_LOOKUP_TABLE_OWNER_ROWS = StaticToggle(
+    'cache_lookup_table_owner_rows',
+    'Cache the restore XML of lookup table rows for each user, group and location',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "User lookup table fixtures are built from the cached rows of each of the user's owners "
+        "instead of being queried and serialized on every restore. The cache is cleared when the "
+        "domain's lookup tables change."
+    ),
+)
+
+PARALLEL_APP_BUILD_FILES = StaticToggle(
+    'parallel_app_build_files',
+    'Generate app build files concurrently and reuse unchanged forms from the previous build',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Profiles, suite files, app strings and forms are generated in a thread pool when making a "
+        "build. The forms of build profiles that have not changed since the previous build are "
+        "copied from it instead of being rendered again."
+    ),
+)
+
+CASE_SEARCH_RESULT_CACHE = StaticToggle(
+    'case_search_result_cache',
+    'Cache the results of identical case searches for a short time',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "The IDs of the cases matched by a case search are cached for a minute, and repeated "
+        "searches are served with the current version of those cases. Changes to cases of a searched "
+        "case type invalidate the cached results."
+    ),
+)
+
+BULK_SYNC_MESSAGING_RULE_CHUNKS = StaticToggle(
+    'bulk_sync_messaging_rule_chunks',
+    'Process each chunk of cases in a messaging rule run in bulk',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "When a messaging rule is run for all cases, each chunk of cases is loaded in one query, and "
+        "the schedule instances of the chunk are loaded and saved in bulk. If processing a chunk fails, "
+        "its cases are processed one at a time."
+    ),
+)
+
+BATCH_FORM_PROCESSING_KAFKA_CHANGES = StaticToggle(
+    'batch_form_processing_kafka_changes',
+    'Publish the changes from a form submission to Kafka together',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "The changes to the form, cases and ledgers saved by a form submission are sent to Kafka "
+        "together, and the submission waits once for all of them to be sent instead of waiting for "
+        "each change in turn."
+    ),
+)
+
 LEGACY_SYNC_SUPPORT = StaticToggle(
     'legacy_sync_support',
     "Support mobile sync bugs in older projects (2.9 and below).",
@@ -1710,6 +1804,17 @@ AGGREGATE_UCRS = StaticToggle(
     notification_emails=['czue'],
 )
 
+UCR_COMPILED_EXPRESSIONS = StaticToggle(
+    'ucr_compiled_expressions',
+    'Evaluate UCR data source indicators and filters using compiled expressions',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+    description=(
+        "Lowers each data source's filters and indicators into Python closures once, "
+        "instead of walking the expression tree for every row."
+    ),
+)
+
 SHOW_RAW_DATA_SOURCES_IN_REPORT_BUILDER = StaticToggle(
     'show_raw_data_sources_in_report_builder',
     'Allow building report builder reports directly from raw UCR Data Sources',
@@ -2052,6 +2157,17 @@ CLEAN_OLD_FORMPLAYER_SYNCS = DynamicallyPredictablyRandomToggle(
     default_randomness=0.001
 )
 
+COMPACT_SYNCLOG_CASE_IDS = StaticToggle(
+    'compact_synclog_case_ids',
+    'Store the case ids on sync logs in a compact binary format',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+    description=(
+        "Stores the case ids on the phone as sorted arrays of UUID bytes instead of JSON lists "
+        "in the sync log doc. Sync logs in either format can always be read."
+    ),
+)
+
 PRIME_FORMPLAYER_DBS = StaticToggle(
     'prime_formplayer_dbs',
     'USH: Control which domains will be included in the prime formplayer task runs',
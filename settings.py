@@ -1031,6 +1031,17 @@ HQ_PRIVATE_KEY = None
 
 KAFKA_BROKERS = ['localhost:9092']
 KAFKA_API_VERSION = None
+# Settings of the producer that publishes changes to Kafka. Changes that are
+# published in a batch (see ChangeProducer.batch) are sent together, so a
+# longer linger and compression are more useful for them.
+KAFKA_PRODUCER_LINGER_MS = 0
+KAFKA_PRODUCER_BATCH_SIZE = 16384
+KAFKA_PRODUCER_COMPRESSION_TYPE = None  # 'gzip', 'snappy', 'lz4' or 'zstd'
+
+# Size in bytes of the cache of form and case documents shared by the processors
+# of a pillow process (see corehq.apps.change_feed.document_cache). 0 disables it.
+PILLOW_DOCUMENT_CACHE_SIZE = 0
+PILLOW_DOCUMENT_CACHE_MAX_AGE = 60  # seconds
 
 MOBILE_INTEGRATION_TEST_TOKEN = None
 